@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     "maintenance",
     "water",
     "payments",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.QueryStatsMiddleware',
 ]
 
 ROOT_URLCONF = 'RealEstateDemo.urls'
@@ -135,6 +137,25 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Per-request SQL instrumentation (accounts.middleware): the share of requests sampled.
+# Raise it while profiling locally; the X-Query-* headers only go to staff/admins or DEBUG.
+QUERY_STATS_SAMPLE_RATE = 0.05
+QUERY_STATS_WINDOW = 200
+
+# Admin notification stream (accounts.notification_feed). Streaming requires an ASGI
+# server (RealEstateDemo.asgi under uvicorn/daphne); under WSGI the stream answers once
+# and clients fall back to polling every NOTIFICATION_POLL_SECONDS. Open streams share
+# one cached newest-id check per poll interval, and each stream closes after
+# NOTIFICATION_STREAM_MAX_SECONDS so EventSource reconnects with Last-Event-ID.
+NOTIFICATION_STREAM_POLL_SECONDS = 3
+NOTIFICATION_STREAM_MAX_SECONDS = 300
+NOTIFICATION_POLL_SECONDS = 10
+
+# Days a *read* notification is kept, per notification_type, before `prune_notifications`
+# archives and deletes it (None keeps that type forever). Unlisted types use
+# rentals.notification_retention.DEFAULT_RETENTION_DAYS.
+NOTIFICATION_RETENTION_DAYS = {}
+
 GCASH_NUMBER = "09219429053"
 GCASH_NAME = "John Arvin Tumbagahon"
 GCASH_QR_URL = "/static/img/qr.jpg"
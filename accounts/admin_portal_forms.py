@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from rentals.models import TenantProfile, Lease, Unit
 from announcements.models import Announcement
 from billing.models import MonthlyBill
+from billing.services import save_edited_bill, unfreeze_interest
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -161,4 +162,23 @@ class MonthlyBillForm(forms.ModelForm):
             "status",
             "paid_at",
             "payment_reference",
-        ]
\ No newline at end of file
+        ]
+
+    # interest on an unpaid bill is derived on read (billing.services.accrue_interest)
+    DERIVED_WHILE_UNPAID = ("interest", "total_due")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.status == "UNPAID":
+            for name in self.DERIVED_WHILE_UNPAID:
+                self.fields[name].disabled = True
+                self.fields[name].help_text = "Computed: unpaid bills store rent + water only; interest is added when displayed."
+
+    def save(self, commit=True):
+        bill = super().save(commit=False)
+        if commit:
+            # freezes/unfreezes interest and keeps RevenueRollup in step with the edit
+            save_edited_bill(bill)
+        elif bill.status == "UNPAID":
+            unfreeze_interest(bill)
+        return bill
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Query helpers shared by the admin portal views: single-pass status counts,
+cached inventory counts and keyset (cursor) pagination for large listings.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import QueryDict
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+PER_PAGE = 50
+
+UNIT_STATS_VERSION_KEY = "admin_units:stats:version"
+UNIT_STATS_TIMEOUT = 300  # seconds; invalidation normally happens well before this
+
+
+def status_counts(queryset, buckets, total="total"):
+    """
+    Count every bucket of `queryset` in one aggregate query.
+
+    `buckets` maps a result key to a Q, e.g. {"paid": Q(status="PAID")};
+    `total` names the unconditional count (None to skip it). Filters already
+    on the queryset apply to every bucket, so a status-filtered queryset
+    reports 0 for the other statuses.
+    """
+    aggregates = {name: Count("pk", filter=condition) for name, condition in buckets.items()}
+    if total:
+        aggregates[total] = Count("pk")
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def _unit_stats_version():
+    version = cache.get(UNIT_STATS_VERSION_KEY)
+    if version is None:
+        # a fresh (never reused) version, so nothing cached under an evicted one can resurface
+        cache.add(UNIT_STATS_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(UNIT_STATS_VERSION_KEY)
+    return version
+
+
+def invalidate_unit_stats():
+    """Make every cached unit_stats() result stale (called from Unit/Lease signals)."""
+    try:
+        cache.incr(UNIT_STATS_VERSION_KEY)
+    except ValueError:
+        cache.set(UNIT_STATS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def unit_stats(units, status_filter="all", search_query=""):
+    """
+    Total/available/occupied/maintenance counts for the filtered `units`
+    queryset in one conditional-aggregate query, cached per filter until the
+    next invalidate_unit_stats().
+    """
+    search_key = hashlib.md5(search_query.encode()).hexdigest()
+    key = f"admin_units:stats:{_unit_stats_version()}:{status_filter}:{search_key}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = status_counts(units, {
+            "available_units": Q(status="AVAILABLE"),
+            "occupied_units": Q(status="OCCUPIED"),
+            "maintenance_units": Q(status="MAINTENANCE"),
+        }, total="total_units")
+        cache.set(key, stats, UNIT_STATS_TIMEOUT)
+    return stats
+
+
+class CursorPage:
+    """One keyset page: the rows plus opaque cursors (and ready-made query strings) for its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _query(self, direction, cursor):
+        params = self._params.copy() if self._params is not None else QueryDict(mutable=True)
+        params.pop("after", None)
+        params.pop("before", None)
+        params[direction] = cursor
+        return "?" + params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query("after", self.next_cursor) if self.has_next else ""
+
+    @property
+    def prev_query(self):
+        return self._query("before", self.prev_cursor) if self.has_previous else ""
+
+
+def _cursor_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_cursor(obj, ordering):
+    values = [_cursor_value(getattr(obj, field.lstrip("-"))) for field in ordering]
+    return urlsafe_base64_encode(json.dumps(values, cls=DjangoJSONEncoder).encode())
+
+
+def decode_cursor(cursor, model, ordering):
+    """Ordering-key values from a cursor, or None when it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(urlsafe_base64_decode(cursor))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [model._meta.get_field(field.lstrip("-")).to_python(value) for field, value in zip(ordering, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek(ordering, values, backwards):
+    """
+    Rows strictly after `values` in `ordering` (before, when `backwards`), as a
+    Q: (a > x) OR (a = x AND b > y) OR ..., with > / < per field direction.
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != backwards
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for previous, value in zip(ordering[:index], values):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def keyset_paginate(queryset, ordering, after=None, before=None, per_page=PER_PAGE, params=None):
+    """
+    One page of `queryset` in `ordering`, seeking from a cursor instead of an
+    OFFSET, so deep pages cost the same as the first and nothing is cut off.
+
+    `ordering` must be local, non-null fields ending in a unique one (usually
+    "id" / "-id") so every row has a distinct position. `after`/`before` are
+    cursors from a previous page's next_cursor/prev_cursor; `params` (normally
+    request.GET) is carried into next_query/prev_query.
+    """
+    model = queryset.model
+    ordering = list(ordering)
+    reversed_ordering = [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+    position = decode_cursor(before, model, ordering)
+    if position:
+        rows = list(queryset.filter(_seek(ordering, position, backwards=True)).order_by(*reversed_ordering)[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        position = decode_cursor(after, model, ordering)
+        if position:
+            queryset = queryset.filter(_seek(ordering, position, backwards=False))
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = position is not None
+
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], ordering) if rows and has_next else None,
+        prev_cursor=encode_cursor(rows[0], ordering) if rows and has_previous else None,
+        params=params,
+    )
+
+
+def paginate_request(request, queryset, ordering, per_page=PER_PAGE):
+    """keyset_paginate() driven by the request's ?after= / ?before= cursors."""
+    return keyset_paginate(
+        queryset,
+        ordering,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=per_page,
+        params=request.GET,
+    )
@@ -8,6 +8,7 @@ from .admin_portal_views import (
     admin_maintenance,
     admin_announcements,
     admin_notifications,
+    admin_notification_stream,
     admin_create_tenant_profile,
     admin_create_announcement,
     admin_create_lease,
@@ -30,6 +31,9 @@ from .admin_portal_views import (
     admin_edit_unit,
     admin_tenant_risk,
     admin_update_tenant_risks,
+    admin_job_status,
+    admin_run_data_fix,
+    admin_query_stats,
     admin_delete_unit,
     admin_toggle_unit_status,
     admin_mark_notification_read,
@@ -60,9 +64,17 @@ urlpatterns = [
     # Tenant Risk Classification
     path("tenant-risk/", admin_tenant_risk, name="admin_tenant_risk"),
     path("tenant-risk/update/", admin_update_tenant_risks, name="admin_update_tenant_risks"),
+
+    # Background jobs
+    path("jobs/<int:job_id>/", admin_job_status, name="admin_job_status"),
+    path("data-fixes/<str:command>/", admin_run_data_fix, name="admin_run_data_fix"),
+
+    # Per-view SQL stats (accounts.middleware.QueryStatsMiddleware)
+    path("query-stats/", admin_query_stats, name="admin_query_stats"),
     
     # Notifications
     path("notifications/", admin_notifications, name="admin_notifications"),
+    path("notifications/stream/", admin_notification_stream, name="admin_notification_stream"),
     path("notifications/<int:notification_id>/read/", admin_mark_notification_read, name="admin_mark_notification_read"),
     path("notifications/mark-all-read/", admin_mark_all_notifications_read, name="admin_mark_all_notifications_read"),
     path("notifications/<int:notification_id>/delete/", admin_delete_notification, name="admin_delete_notification"),
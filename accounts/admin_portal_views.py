@@ -1,125 +1,102 @@
 from datetime import date, datetime, timedelta
 import logging
 
-from django.db.models import Sum, Q
+from django.db.models import Count, Exists, OuterRef, Sum, Q
 from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.utils.timezone import now
 import json
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 from rentals.models import Lease, Unit, TenantProfile, Notification, TenantRiskClassification
-from billing.models import MonthlyBill
-from billing.services import ensure_bills_since_move_in, set_bill_status, approve_manual_payment, reject_manual_payment
-from payments.models import ManualPayment
+from rentals.notification_emitter import NotificationEmitter
+from billing.models import MonthlyBill, RevenueRollup
+from billing.services import accrue_interest, add_months, invalidate_billing, set_bill_status, approve_manual_payment, reject_manual_payment
+from payments.models import ManualPayment, PaymentAllocation
 from maintenance.models import MaintenanceRequest
 from announcements.models import Announcement
 from maintenance.forms import AdminMaintenanceUpdateForm
-from rentals.services import TenantRiskService
+from jobs.models import Job
+from jobs.services import enqueue_job
 
 from .admin_portal_forms import TenantProfileForm, AnnouncementForm, LeaseForm
 from .admin_portal_forms import TenantProfileEditForm
 from .admin_portal_forms import UnitForm
 from django.utils import timezone as dj_timezone
 from django.contrib import messages
+from .admin_portal_queries import paginate_request, status_counts, unit_stats
 from .decorators import admin_required
+from .notification_feed import (
+    event_stream,
+    feed_payload,
+    feed_queryset,
+    is_asgi,
+    latest_notification_id,
+    one_shot_events,
+    parse_cursor,
+    parse_limit,
+    unread_count,
+)
+from .search import search, search_q
+from .middleware import query_stats
 
 logger = logging.getLogger(__name__)
 
 
 @admin_required
 def admin_dashboard(request):
-    total_tenants = Lease.objects.filter(is_active=True).values("tenant").distinct().count()
-    occupied_units = Lease.objects.filter(is_active=True).count()
-    vacant_units = Unit.objects.filter(is_active=True).count() - occupied_units
-
     today = timezone.now().date()
-    # Count revenue by when bills were actually paid (paid_at), not by their billing month.
-    # This ensures advance payments approved now are included in this month's revenue.
-    total_revenue = (
-        MonthlyBill.objects.filter(status="PAID", paid_at__year=today.year, paid_at__month=today.month)
-        .aggregate(total=Sum("total_due"))["total"] or 0
+    current_month_start = today.replace(day=1)
+    # chart window: 11 months ago through the current month (inclusive)
+    chart_months = [add_months(current_month_start, -i) for i in range(12)]
+
+    lease_stats = Lease.objects.filter(is_active=True).aggregate(
+        total_tenants=Count("tenant", distinct=True),
+        occupied_units=Count("id"),
+        expected_revenue=Sum("monthly_rent"),
+    )
+    occupied_units = lease_stats["occupied_units"]
+    vacant_units = Unit.objects.filter(is_active=True).count() - occupied_units
+    expected_revenue = lease_stats["expected_revenue"] or 0
+
+    # Revenue is counted by when bills were actually paid (paid_at), not by their billing month,
+    # so advance payments approved now are included in this month's revenue.
+    # Read from the incrementally maintained rollup: one row per chart month.
+    revenue_by_month = dict(
+        RevenueRollup.objects.filter(month__gte=chart_months[-1], month__lte=current_month_start)
+        .values_list("month", "paid_total")
     )
+    total_revenue = revenue_by_month.get(current_month_start) or 0
     overdue_payments = MonthlyBill.objects.filter(status="UNPAID", due_date__lt=today).count()
 
-    # Get monthly rental income data for the past 12 months including current month
     monthly_income_data = []
     months_labels = []
-    
-    # Debug: Check if we have any data
-    logger.info(f"DEBUG: Today is {today}")
-    logger.info(f"DEBUG: Total paid bills: {MonthlyBill.objects.filter(status='PAID').count()}")
-    logger.info(f"DEBUG: Active leases: {Lease.objects.filter(is_active=True).count()}")
-    
-    # Calculate months from 11 months ago to current month (inclusive)
-    current_month_start = today.replace(day=1)
-    
-    for i in range(12):
-        # Calculate month date: current month minus i months
-        if i == 0:
-            # Current month
-            month_date = current_month_start
-        else:
-            # Previous months
-            # Go back i months from current month
-            month_year = current_month_start.year
-            month_month = current_month_start.month - i
-            
-            # Adjust year if month goes below 1
-            while month_month <= 0:
-                month_month += 12
-                month_year -= 1
-            
-            month_date = datetime(month_year, month_month, 1).date()
-        
-        # Get paid bills for this month
-        month_revenue = (
-            MonthlyBill.objects.filter(
-                status="PAID",
-                paid_at__year=month_date.year,
-                paid_at__month=month_date.month
-            ).aggregate(total=Sum("total_due"))["total"] or 0
-        )
-        
-        # Get expected revenue from active leases
-        expected_revenue = (
-            Lease.objects.filter(is_active=True)
-            .aggregate(total=Sum("monthly_rent"))["total"] or 0
-        )
-        
+    for month_date in chart_months:
         monthly_income_data.append({
             'month': month_date.strftime('%b %Y'),
-            'actual': float(month_revenue),
+            'actual': float(revenue_by_month.get(month_date) or 0),
             'expected': float(expected_revenue)
         })
         months_labels.append(month_date.strftime('%b'))
-        
-        # Debug: Log each month's data
-        logger.info(f"DEBUG: {month_date.strftime('%b %Y')} - Actual: {month_revenue}, Expected: {expected_revenue}")
-    
-    logger.info(f"DEBUG: Final monthly_income_data: {monthly_income_data}")
-    logger.info(f"DEBUG: Final months_labels: {months_labels}")
 
     # Get notifications for admin (all notifications, not just user-specific)
-    all_notifications = Notification.objects.all().order_by('-created_at')
-    notifications = all_notifications[:5]
-    unread_notifications = all_notifications.filter(is_read=False)
-    unread_count = unread_notifications.count()
+    notifications = Notification.objects.all().order_by('-created_at')[:5]
+    unread = unread_count()
 
     return render(request, "admin_portal/dashboard.html", {
-        "total_tenants": total_tenants,
+        "total_tenants": lease_stats["total_tenants"],
         "occupied_units": occupied_units,
         "vacant_units": max(vacant_units, 0),
         "total_revenue": total_revenue,
         "overdue_payments": overdue_payments,
         "notifications": notifications,
-        "unread_notifications": unread_notifications,
-        "unread_count": unread_count,
+        "unread_count": unread,
         "monthly_income_data": monthly_income_data,
         "months_labels": months_labels,
     })
@@ -131,15 +108,10 @@ def admin_tenants(request):
 
     tenants = TenantProfile.objects.select_related("user")
     if q:
-        tenants = tenants.filter(
-            Q(full_name__icontains=q) |
-            Q(contact_no__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(user__username__icontains=q)
-        )
+        tenants = search(tenants, q)
 
-    tenants = tenants.order_by("full_name")[:500]
-    return render(request, "admin_portal/tenants.html", {"tenants": tenants, "q": q})
+    page = paginate_request(request, tenants, ["full_name", "id"])
+    return render(request, "admin_portal/tenants.html", {"tenants": page, "page": page, "q": q})
 
 
 @admin_required
@@ -180,7 +152,7 @@ def admin_units(request):
     status_filter = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
-    units = Unit.objects.filter(is_active=True).select_related()
+    units = Unit.objects.filter(is_active=True)
     
     # Filter by status
     if status_filter != 'all':
@@ -194,20 +166,16 @@ def admin_units(request):
             Q(description__icontains=search_query)
         )
     
-    # Get statistics
-    total_units = units.count()
-    available_units = units.filter(status='AVAILABLE').count()
-    occupied_units = units.filter(status='OCCUPIED').count()
-    maintenance_units = units.filter(status='MAINTENANCE').count()
-    
+    # One cached conditional-aggregate query instead of four COUNTs
+    stats = unit_stats(units, status_filter, search_query)
+    page = paginate_request(request, units, ['floor_level', 'number'])
+
     return render(request, "admin_portal/units.html", {
-        'units': units,
+        'units': page,
+        'page': page,
         'status_filter': status_filter,
         'search_query': search_query,
-        'total_units': total_units,
-        'available_units': available_units,
-        'occupied_units': occupied_units,
-        'maintenance_units': maintenance_units,
+        **stats,
     })
 
 
@@ -235,20 +203,18 @@ def admin_create_unit(request):
         
         if form.is_valid():
             try:
-                unit = form.save(commit=False)
-                unit.is_active = True
-                unit.save()
-                
-                # Create real-time notification for admin
-                try:
-                    Notification.create_notification(
+                with NotificationEmitter() as notifications:
+                    unit = form.save(commit=False)
+                    unit.is_active = True
+                    unit.save()
+                    
+                    # Real-time notification for admin, written when the unit commits
+                    notifications.emit(
                         title=f"New Unit Created",
                         message=f"Unit {unit.number} ({unit.get_unit_type_display()}) has been created successfully!",
                         notification_type='UNIT',
                         related_unit=unit
                     )
-                except Exception as e:
-                    logger.exception(f"Failed to create unit creation notification: {e}")
                 
                 messages.success(request, f'Unit {unit.number} has been created successfully!')
                 return redirect("admin_units")
@@ -387,19 +353,17 @@ def admin_create_lease(request):
     form = LeaseForm(request.POST or None, initial=initial)
 
     if request.method == "POST" and form.is_valid():
-        lease = form.save()
-        
-        # Create real-time notification for admin about new lease
-        try:
-            Notification.create_notification(
+        with NotificationEmitter() as notifications:
+            lease = form.save()
+            
+            # Real-time notification for admin about the new lease, written when the lease commits
+            notifications.emit(
                 title=f"New Lease Created",
                 message=f"Lease created for {lease.tenant.email} in Unit {lease.unit.number} (Monthly Rent: ₱{lease.monthly_rent:,.2f})",
                 notification_type='LEASE',
                 related_tenant=lease.tenant,
                 related_unit=lease.unit
             )
-        except Exception as e:
-            logger.exception(f"Failed to create lease notification: {e}")
         
         # Update unit status to OCCUPIED when lease is created
         try:
@@ -411,13 +375,14 @@ def admin_create_lease(request):
             logger.exception(f"Failed to update unit status for lease {lease.id}: {e}")
             # Don't block lease creation if unit status update fails
         
-        # create initial monthly bill rows from move-in until today
+        # create initial monthly bill rows from move-in until today (in the background;
+        # tenant pages also regenerate on demand until the job has run)
         try:
-            ensure_bills_since_move_in(lease)
+            enqueue_job("billing.generate_lease_bills", lease_id=lease.pk, created_by=request.user)
         except Exception:
-            # don't block creation if billing generation fails; admin can regenerate later
-            logger.exception("ensure_bills_since_move_in failed for lease id %s", getattr(lease, 'id', None))
-            messages.warning(request, "Failed to generate initial bills; you can regenerate later.")
+            # don't block creation if the job can't be queued; admin can regenerate later
+            logger.exception("Failed to queue bill generation for lease id %s", getattr(lease, 'id', None))
+            messages.warning(request, "Failed to queue initial bill generation; you can regenerate later.")
         
         messages.success(request, f'Lease created successfully! Unit {lease.unit.number} is now occupied.')
         return redirect("admin_tenants")
@@ -464,9 +429,11 @@ def admin_edit_lease(request, lease_id: int):
     if request.method == "POST" and form.is_valid():
         lease = form.save()
         try:
-            ensure_bills_since_move_in(lease)
+            # rent/due day/start date may have changed; make tenant pages regenerate
+            invalidate_billing(lease_ids=[lease.pk])
+            enqueue_job("billing.generate_lease_bills", lease_id=lease.pk, created_by=request.user)
         except Exception:
-            logger.exception("ensure_bills_since_move_in failed while editing lease id %s", getattr(lease, 'id', None))
+            logger.exception("Failed to queue bill regeneration while editing lease id %s", getattr(lease, 'id', None))
             messages.warning(request, "Failed to update billing rows; please regenerate bills if needed.")
         return redirect("admin_tenant_detail", tenant_id=lease.tenant.tenantprofile.id if hasattr(lease.tenant, 'tenantprofile') else lease.tenant.id)
     return render(request, "admin_portal/form.html", {
@@ -614,48 +581,50 @@ def admin_delete_announcement(request, ann_id: int):
 
 @admin_required
 def admin_notifications(request):
-    """Admin portal: view all notifications"""
-    # Admins should see all notifications, not just user-specific ones
-    notifications = Notification.objects.all().order_by('-created_at')
-    unread_count = notifications.filter(is_read=False).count()
-    
-    # Return JSON for AJAX requests (for auto-refresh)
+    """Admin portal: notifications, newest first; ?after_id= over AJAX returns the JSON delta feed."""
+    # Return JSON for AJAX requests (pollers)
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        from django.http import JsonResponse
-        return JsonResponse({
-            'unread_count': unread_count,
-            'notifications': [
-                {
-                    'id': n.id,
-                    'title': n.title,
-                    'message': n.message,
-                    'notification_type': n.notification_type,
-                    'is_read': n.is_read,
-                    'created_at': n.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'related_tenant': {
-                        'email': n.related_tenant.email if n.related_tenant else None,
-                        'name': n.related_tenant.tenantprofile.full_name if n.related_tenant and hasattr(n.related_tenant, 'tenantprofile') and n.related_tenant.tenantprofile else n.related_tenant.email if n.related_tenant else None
-                    } if n.related_tenant else None,
-                    'related_unit': {
-                        'number': n.related_unit.number if n.related_unit else None,
-                        'type': n.related_unit.get_unit_type_display() if n.related_unit else None
-                    } if n.related_unit else None
-                } for n in notifications
-            ]
-        })
-    
+        return JsonResponse(feed_payload(
+            parse_cursor(request.GET.get('after_id')),
+            parse_limit(request.GET.get('limit')),
+        ))
+
+    # Admins should see all notifications, not just user-specific ones
+    page = paginate_request(request, feed_queryset(), ['-id'])
     return render(request, "admin_portal/notifications.html", {
-        'notifications': notifications,
-        'unread_count': unread_count,
+        'notifications': page,
+        'page': page,
+        'unread_count': unread_count(),
+        'latest_notification_id': latest_notification_id(),
     })
 
 
+@admin_required
+async def admin_notification_stream(request):
+    """
+    Server-Sent Events stream of notifications created after the client's
+    cursor (Last-Event-ID on reconnect, else ?after_id=, else "from now").
+    """
+    after_id = parse_cursor(request.headers.get("Last-Event-ID"))
+    if after_id is None:
+        after_id = parse_cursor(request.GET.get("after_id"))
+    if after_id is None:
+        after_id = await sync_to_async(latest_notification_id)()
+
+    if is_asgi(request):
+        response = StreamingHttpResponse(event_stream(after_id), content_type="text/event-stream")
+    else:
+        response = HttpResponse(await sync_to_async(one_shot_events)(after_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
+
+
 @admin_required
 def admin_mark_notification_read(request, notification_id):
     """Admin portal: mark notification as read"""
     notification = get_object_or_404(Notification, id=notification_id)
-    notification.is_read = True
-    notification.save()
+    notification.mark_read()
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -666,7 +635,7 @@ def admin_mark_notification_read(request, notification_id):
 @admin_required
 def admin_mark_all_notifications_read(request):
     """Admin portal: mark all notifications as read"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    Notification.mark_all_read(Notification.objects.filter(user=request.user))
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -704,52 +673,21 @@ def admin_billing(request):
         bills = bills.filter(status=status)
 
     if q:
-        bills = bills.filter(
-            Q(lease__tenant__email__icontains=q) |
-            Q(lease__unit__number__icontains=q) |
-            Q(payment_reference__icontains=q)
-        )
+        bills = search(bills, q)
 
-    bills = bills.order_by("-billing_month")[:500]
-    
-    # Calculate paid bills count for statistics
-    if status == "PAID":
-        paid_bills_count = bills.count()
-    elif status == "UNPAID":
-        paid_bills_count = 0
-    else:
-        # Count paid bills from all bills (before filtering)
-        all_bills = MonthlyBill.objects.select_related("lease", "lease__unit", "lease__tenant")
-        if q:
-            all_bills = all_bills.filter(
-                Q(lease__tenant__email__icontains=q) |
-                Q(lease__unit__number__icontains=q) |
-                Q(payment_reference__icontains=q)
-            )
-        paid_bills_count = all_bills.filter(status="PAID").count()
-    
-    # Calculate unpaid bills count
-    if status == "PAID":
-        unpaid_bills_count = 0
-    elif status == "UNPAID":
-        unpaid_bills_count = bills.count()
-    else:
-        # Count unpaid bills from all bills (before filtering)
-        all_bills = MonthlyBill.objects.select_related("lease", "lease__unit", "lease__tenant")
-        if q:
-            all_bills = all_bills.filter(
-                Q(lease__tenant__email__icontains=q) |
-                Q(lease__unit__number__icontains=q) |
-                Q(payment_reference__icontains=q)
-            )
-        unpaid_bills_count = all_bills.filter(status="UNPAID").count()
-    
+    page = paginate_request(request, bills, ["-billing_month", "-id"])
+
+    counts = status_counts(bills, {"paid": Q(status="PAID"), "unpaid": Q(status="UNPAID")})
+
+    page.object_list = accrue_interest(page.object_list)
     return render(request, "admin_portal/billing.html", {
-        "bills": bills, 
-        "q": q, 
+        "bills": page,
+        "page": page,
+        "q": q,
         "status": status,
-        "paid_bills_count": paid_bills_count,
-        "unpaid_bills_count": unpaid_bills_count
+        "total_bills_count": counts["total"],
+        "paid_bills_count": counts["paid"],
+        "unpaid_bills_count": counts["unpaid"],
     })
 
 
@@ -773,51 +711,36 @@ def admin_payments(request):
     q = request.GET.get("q", "").strip()
     status = request.GET.get("status", "").strip()
 
-    payments = ManualPayment.objects.select_related("user")
+    matches = Q()
+    if q:
+        matches = search_q(q)
+        if q.isdigit():
+            # bill id lookup goes through the allocation table's bill index
+            matches |= Q(Exists(PaymentAllocation.objects.filter(payment=OuterRef("pk"), bill_id=int(q))))
+
+    payments = ManualPayment.objects.select_related("user").prefetch_related("allocations")
     if status in ("PENDING", "APPROVED", "REJECTED"):
         payments = payments.filter(status=status)
     if q:
-        payments = payments.filter(
-            Q(user__email__icontains=q) |
-            Q(reference_code__icontains=q) |
-            Q(bill_ids__icontains=q)
-        )
+        payments = payments.filter(matches)
+
+    page = paginate_request(request, payments, ["-created_at", "-id"])
+
+    counts = status_counts(payments, {
+        "pending": Q(status="PENDING"),
+        "approved": Q(status="APPROVED"),
+        "rejected": Q(status="REJECTED"),
+    })
 
-    payments = payments.order_by("-created_at")[:500]
-    
-    # Calculate payment status counts
-    all_payments = ManualPayment.objects.select_related("user")
-    if q:
-        all_payments = all_payments.filter(
-            Q(user__email__icontains=q) |
-            Q(reference_code__icontains=q) |
-            Q(bill_ids__icontains=q)
-        )
-    
-    if status == "PENDING":
-        pending_count = payments.count()
-        approved_count = 0
-        rejected_count = 0
-    elif status == "APPROVED":
-        pending_count = 0
-        approved_count = payments.count()
-        rejected_count = 0
-    elif status == "REJECTED":
-        pending_count = 0
-        approved_count = 0
-        rejected_count = payments.count()
-    else:
-        pending_count = all_payments.filter(status="PENDING").count()
-        approved_count = all_payments.filter(status="APPROVED").count()
-        rejected_count = all_payments.filter(status="REJECTED").count()
-    
     return render(request, "admin_portal/payments.html", {
-        "payments": payments, 
-        "q": q, 
+        "payments": page,
+        "page": page,
+        "q": q,
         "status": status,
-        "pending_count": pending_count,
-        "approved_count": approved_count,
-        "rejected_count": rejected_count
+        "total_count": counts["total"],
+        "pending_count": counts["pending"],
+        "approved_count": counts["approved"],
+        "rejected_count": counts["rejected"],
     })
 
 
@@ -846,36 +769,34 @@ def admin_tenant_risk(request):
     risk_classifications = TenantRiskClassification.objects.select_related('tenant').all()
     
     # Apply filters
+    filters = Q()
     if risk_filter in ("LOW", "MEDIUM", "HIGH"):
-        risk_classifications = risk_classifications.filter(risk_level=risk_filter)
+        filters &= Q(risk_level=risk_filter)
     
     if q:
-        risk_classifications = risk_classifications.filter(
-            Q(tenant__email__icontains=q) |
-            Q(tenant__tenantprofile__full_name__icontains=q)
-        )
+        filters &= Q(tenant__email__icontains=q) | Q(tenant__tenantprofile__full_name__icontains=q)
+    risk_classifications = risk_classifications.filter(filters)
+    
+    # Calculate statistics: the filtered total plus portfolio-wide buckets, in one query
+    counts = status_counts(TenantRiskClassification.objects.all(), {
+        'total_tenants': filters,
+        'low_risk_count': Q(risk_level='LOW'),
+        'medium_risk_count': Q(risk_level='MEDIUM'),
+        'high_risk_count': Q(risk_level='HIGH'),
+        'new_tenant_count': Q(is_new_tenant=True),
+    }, total=None)
     
     # Pagination
     paginator = Paginator(risk_classifications, 20)
+    paginator.count = counts['total_tenants']  # already counted above; skips the paginator's COUNT
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Calculate statistics
-    total_tenants = risk_classifications.count()
-    low_risk_count = TenantRiskClassification.objects.filter(risk_level='LOW').count()
-    medium_risk_count = TenantRiskClassification.objects.filter(risk_level='MEDIUM').count()
-    high_risk_count = TenantRiskClassification.objects.filter(risk_level='HIGH').count()
-    new_tenant_count = TenantRiskClassification.objects.filter(is_new_tenant=True).count()
-    
     context = {
         'page_obj': page_obj,
         'q': q,
         'risk': risk_filter,
-        'total_tenants': total_tenants,
-        'low_risk_count': low_risk_count,
-        'medium_risk_count': medium_risk_count,
-        'high_risk_count': high_risk_count,
-        'new_tenant_count': new_tenant_count,
+        **counts,
     }
     
     return render(request, "admin_portal/tenant_risk.html", context)
@@ -883,17 +804,49 @@ def admin_tenant_risk(request):
 
 @admin_required
 def admin_update_tenant_risks(request):
-    """Update all tenant risk classifications"""
+    """Queue a background job that rescores every tenant; progress is served by admin_job_status"""
     if request.method == 'POST':
         try:
-            updated_count = TenantRiskService.update_all_tenant_risks()
-            messages.success(request, f'Successfully updated risk classifications for {updated_count} tenants.')
+            job = enqueue_job('rentals.rescore_tenant_risks', created_by=request.user)
+            messages.success(request, f'Risk reclassification queued (job #{job.pk}). Scores refresh in the background.')
         except Exception as e:
             messages.error(request, f'Error updating risk classifications: {e}')
     
     return redirect('admin_tenant_risk')
 
 
+# demo-data repairs that run as background jobs (rentals/tasks.py)
+DATA_FIX_TASKS = ('fix_billing_status', 'fix_payment_dates', 'fix_chart_data')
+
+
+@admin_required
+@require_http_methods(["POST"])
+def admin_run_data_fix(request, command: str):
+    """Queue a data-fix command as a background job; returns its id and where to poll its progress"""
+    if command not in DATA_FIX_TASKS:
+        return JsonResponse({"error": f"Unknown data fix: {command}"}, status=404)
+    job = enqueue_job(f'rentals.{command}', created_by=request.user)
+    return JsonResponse(
+        {"job_id": job.pk, "status_url": reverse("admin_job_status", args=[job.pk])},
+        status=202,
+    )
+
+
+@admin_required
+def admin_job_status(request, job_id: int):
+    """JSON status/progress of a background job (polled by admin pages)."""
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse(job.as_status_dict())
+
+
+@admin_required
+def admin_query_stats(request):
+    """Rolling per-view SQL stats collected by QueryStatsMiddleware in this process. POST clears them."""
+    if request.method == "POST":
+        query_stats.clear()
+    return JsonResponse({"window": query_stats.window, "views": query_stats.snapshot()})
+
+
 @admin_required
 def admin_maintenance(request):
     q = request.GET.get("q", "").strip()
@@ -905,14 +858,19 @@ def admin_maintenance(request):
         reqs = reqs.filter(status=status)
 
     if q:
-        reqs = reqs.filter(
-            Q(lease__tenant__email__icontains=q) |
-            Q(lease__unit__number__icontains=q) |
-            Q(description__icontains=q)
-        )
+        reqs = search(reqs, q)
 
-    reqs = reqs.order_by("-created_at")[:500]
-    return render(request, "admin_portal/maintenance.html", {"reqs": reqs, "q": q, "status": status})
+    page = paginate_request(request, reqs, ["-created_at", "-id"])
+    counts = status_counts(reqs, {
+        value.lower(): Q(status=value) for value, _ in MaintenanceRequest.STATUS_CHOICES
+    })
+    return render(request, "admin_portal/maintenance.html", {
+        "reqs": page,
+        "page": page,
+        "q": q,
+        "status": status,
+        "counts": counts,
+    })
 
 
 @admin_required
@@ -920,9 +878,8 @@ def admin_announcements(request):
     q = request.GET.get("q", "").strip()
     items = Announcement.objects.all()
 
-    # FIX: model field is "body", not "content"
     if q:
-        items = items.filter(Q(title__icontains=q) | Q(body__icontains=q))
+        items = search(items, q)
 
     items = items.order_by("-created_at")[:200]
     return render(request, "admin_portal/announcements.html", {"items": items, "q": q})
@@ -0,0 +1,287 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "portal_baseline.json"
+
+# (name, who, url name, query string)
+PORTAL_VIEWS = [
+    ("tenant_dashboard", "tenant", "tenant_dashboard", {}),
+    ("tenant_billing", "tenant", "tenant_billing", {}),
+    ("tenant_pay_advance", "tenant", "tenant_pay_advance", {"months_to_pay": 6}),
+    ("admin_dashboard", "admin", "admin_dashboard", {}),
+    ("admin_billing", "admin", "admin_billing", {}),
+    ("admin_payments", "admin", "admin_payments", {}),
+    ("admin_tenant_risk", "admin", "admin_tenant_risk", {}),
+]
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper hook: counts statements and rows touched. Rows
+    read are counted as the cursor's fetch calls return them (drivers do not
+    agree on rowcount for SELECTs: SQLite always reports -1); rows written
+    come from rowcount.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        cursor = context["cursor"]
+        if cursor.description is None:
+            self.rows += max(cursor.rowcount, 0)
+        elif getattr(cursor, "_rows_counted_by", None) is not self:
+            self.count_fetches(cursor)
+        return result
+
+    def count_fetches(self, cursor):
+        """Wrap the cursor's fetch methods; the rows are fetched after execute() returns."""
+        cursor._rows_counted_by = self
+        fetchone, fetchmany, fetchall = cursor.fetchone, cursor.fetchmany, cursor.fetchall
+
+        def counted_fetchone():
+            row = fetchone()
+            self.rows += row is not None
+            return row
+
+        def counted_fetchmany(*args, **kwargs):
+            rows = fetchmany(*args, **kwargs)
+            self.rows += len(rows)
+            return rows
+
+        def counted_fetchall():
+            rows = fetchall()
+            self.rows += len(rows)
+            return rows
+
+        cursor.fetchone, cursor.fetchmany, cursor.fetchall = counted_fetchone, counted_fetchmany, counted_fetchall
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main tenant/admin portal views with the test client and record wall time, "
+        "query count and rows touched per view. Compares against a JSON baseline and fails on "
+        "regressions; --update-baseline rewrites it. Everything runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--baseline",
+            default=str(DEFAULT_BASELINE),
+            help="Baseline JSON file (default benchmarks/portal_baseline.json).",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write this run's results as the new baseline instead of comparing.",
+        )
+        parser.add_argument(
+            "--generate",
+            action="store_true",
+            help="Benchmark against a freshly generated dataset (see generate_load_data) instead of the current data.",
+        )
+        parser.add_argument("--buildings", type=int, default=2, help="--generate: buildings (default 2).")
+        parser.add_argument("--units-per-building", type=int, default=100, help="--generate: units per building (default 100).")
+        parser.add_argument("--years", type=int, default=2, help="--generate: years of history (default 2).")
+        parser.add_argument("--seed", type=int, default=42, help="--generate: random seed (default 42).")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed requests per view; the median wall time is reported (default 5).",
+        )
+        parser.add_argument(
+            "--query-slack",
+            type=int,
+            default=0,
+            help="Extra queries per view tolerated over the baseline (default 0).",
+        )
+        parser.add_argument(
+            "--row-factor",
+            type=float,
+            default=1.1,
+            help="Fail when rows touched exceed baseline x this factor (default 1.1).",
+        )
+        parser.add_argument(
+            "--time-factor",
+            type=float,
+            default=1.5,
+            help="Fail when wall time exceeds baseline x this factor (default 1.5)...",
+        )
+        parser.add_argument(
+            "--time-floor-ms",
+            type=float,
+            default=25.0,
+            help="...and is also more than this many ms slower (default 25; absorbs machine noise).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        try:
+            setup_test_environment()  # allows the test client's "testserver" host
+            owns_environment = True
+        except RuntimeError:  # already inside the test runner
+            owns_environment = False
+
+        results = {}
+        try:
+            with transaction.atomic():
+                if options["generate"]:
+                    self.generate_dataset(options)
+                dataset = self.dataset_summary()
+                tenant, admin = self.pick_users()
+                results = self.run_views(tenant, admin, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if owns_environment:
+                teardown_test_environment()
+
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "dataset": dataset,
+                "repeat": options["repeat"],
+                "recorded_at": timezone.now().isoformat(timespec="seconds"),
+            },
+            "views": results,
+        }
+
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+            self.print_table(results, {})
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.print_table(results, {})
+            raise CommandError(f"No baseline at {baseline_path}; run with --update-baseline first.")
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("meta", {}).get("dataset") != dataset:
+            self.stdout.write(self.style.WARNING(
+                "Dataset differs from the baseline's; query counts should still match, row counts and timings may not."
+            ))
+        regressions = self.compare(results, baseline.get("views", {}), options)
+        self.print_table(results, baseline.get("views", {}))
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def generate_dataset(self, options):
+        from rentals.datagen import LoadProfile, clear_load_data, generate
+
+        clear_load_data()  # a previous generate_load_data run would collide (all rolled back anyway)
+        profile = LoadProfile(
+            buildings=options["buildings"],
+            units_per_building=options["units_per_building"],
+            years=options["years"],
+            seed=options["seed"],
+        )
+        counts = generate(profile)
+        self.stdout.write("Generated " + ", ".join(f"{count:,} {name}" for name, count in counts.items()))
+
+    def dataset_summary(self):
+        from billing.models import MonthlyBill
+        from payments.models import ManualPayment
+        from rentals.models import Lease
+
+        return {
+            "leases": Lease.objects.count(),
+            "bills": MonthlyBill.objects.count(),
+            "payments": ManualPayment.objects.count(),
+        }
+
+    def pick_users(self):
+        from accounts.models import User
+        from rentals.models import Lease
+
+        # the longest-running active lease: the heaviest tenant pages
+        lease = Lease.objects.filter(is_active=True).select_related("tenant").order_by("start_date", "pk").first()
+        if lease is None:
+            raise CommandError("No active lease to benchmark tenant pages with; use --generate.")
+        admin = User.objects.create_user(
+            email="portal-benchmark@benchmark.local",
+            username="portal-benchmark",
+            password=None,
+            role=User.Role.ADMIN,
+        )
+        return lease.tenant, admin
+
+    def run_views(self, tenant, admin, repeat):
+        clients = {}
+        for who, user in (("tenant", tenant), ("admin", admin)):
+            clients[who] = Client()
+            clients[who].force_login(user)
+
+        results = {}
+        for name, who, url_name, params in PORTAL_VIEWS:
+            client = clients[who]
+            url = reverse(url_name)
+
+            response = client.get(url, params)  # warm-up; also lets lazy billing catch up
+            if response.status_code != 200:
+                raise CommandError(f"{name}: GET {url} returned {response.status_code}")
+
+            timings, queries, rows = [], 0, 0
+            for _ in range(repeat):
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    client.get(url, params)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, counter.queries)
+                rows = max(rows, counter.rows)
+
+            results[name] = {
+                "wall_ms": round(statistics.median(timings), 2),
+                "queries": queries,
+                "rows": rows,
+            }
+        return results
+
+    def compare(self, results, baseline, options):
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if current["queries"] > previous["queries"] + options["query_slack"]:
+                regressions.append(f"{name}: {current['queries']} queries (baseline {previous['queries']})")
+            if current["rows"] > previous["rows"] * options["row_factor"]:
+                regressions.append(f"{name}: {current['rows']} rows (baseline {previous['rows']})")
+            slower_ms = current["wall_ms"] - previous["wall_ms"]
+            if current["wall_ms"] > previous["wall_ms"] * options["time_factor"] and slower_ms > options["time_floor_ms"]:
+                regressions.append(f"{name}: {current['wall_ms']:.1f} ms (baseline {previous['wall_ms']:.1f} ms)")
+        return regressions
+
+    def print_table(self, results, baseline):
+        self.stdout.write(f"{'view':<22}{'wall ms':>10}{'queries':>9}{'rows':>8}   baseline (ms / queries / rows)")
+        for name, current in results.items():
+            previous = baseline.get(name)
+            reference = f"{previous['wall_ms']:.1f} / {previous['queries']} / {previous['rows']}" if previous else "-"
+            self.stdout.write(
+                f"{name:<22}{current['wall_ms']:>10.1f}{current['queries']:>9}{current['rows']:>8}   {reference}"
+            )
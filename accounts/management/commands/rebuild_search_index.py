@@ -0,0 +1,18 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from accounts.search import SEARCH_FIELDS, refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild search_document for every searchable model. Normally kept in sync by signals; "
+        "run this after raw SQL or other bulk writes that bypass them."
+    )
+
+    def handle(self, *args, **options):
+        for label in SEARCH_FIELDS:
+            model = apps.get_model(label)
+            rows = refresh_search_documents(model._base_manager.all())
+            self.stdout.write(f"{label}: {rows:,} rows")
+        self.stdout.write(self.style.SUCCESS("Search documents rebuilt."))
@@ -3,8 +3,9 @@ from django.utils import timezone
 from django.db.models import Sum
 import uuid
 
-from billing.models import MonthlyBill
-from payments.models import ManualPayment
+from billing.models import MonthlyBill, RevenueRollup
+from billing.services import accrue_interest, month_start, set_bill_status
+from payments.models import ManualPayment, PaymentAllocation
 
 
 class Command(BaseCommand):
@@ -31,15 +32,21 @@ class Command(BaseCommand):
         now = timezone.now()
         today = now.date()
 
-        total_before = (
+        total_before = self.dashboard_revenue(today)
+
+        self.stdout.write(f"Total revenue (by payment date) before: {total_before}")
+
+        raw_total = (
             MonthlyBill.objects.filter(
                 status="PAID", paid_at__year=today.year, paid_at__month=today.month
             )
             .aggregate(total=Sum("total_due"))["total"]
             or 0
         )
-
-        self.stdout.write(f"Total revenue (by payment date) before: {total_before}")
+        if raw_total != total_before:
+            self.stderr.write(
+                f"Revenue rollup is out of sync (raw bills say {raw_total}); run rebuild_revenue_rollup."
+            )
 
         if bill_id:
             try:
@@ -53,6 +60,7 @@ class Command(BaseCommand):
                 self.stderr.write("No UNPAID MonthlyBill found to approve.")
                 return
 
+        accrue_interest([bill], today=today)
         self.stdout.write(
             f"Target bill: id={bill.id} billing_month={bill.billing_month} total_due={bill.total_due} status={bill.status}"
         )
@@ -67,19 +75,16 @@ class Command(BaseCommand):
 
         # Persist: create ManualPayment and mark bill paid
         user = bill.lease.tenant
-        mp = ManualPayment.objects.create(user=user, reference_code=ref, bill_ids=str(bill.id), status="APPROVED")
-        bill.status = "PAID"
-        bill.paid_at = now
-        bill.payment_reference = ref
-        bill.save()
+        mp = ManualPayment.objects.create(user=user, reference_code=ref, status="APPROVED")
+        bill = set_bill_status(bill, status="PAID", payment_reference=ref, paid_at=now)
+        PaymentAllocation.objects.create(payment=mp, bill=bill, amount=bill.total_due)
 
-        total_after = (
-            MonthlyBill.objects.filter(
-                status="PAID", paid_at__year=today.year, paid_at__month=today.month
-            )
-            .aggregate(total=Sum("total_due"))["total"]
-            or 0
-        )
+        total_after = self.dashboard_revenue(today)
 
         self.stdout.write(f"Created ManualPayment id={mp.id} ref={mp.reference_code}")
         self.stdout.write(f"Total revenue (by payment date) after: {total_after}")
+
+    def dashboard_revenue(self, today):
+        """This month's revenue as the dashboard reads it (from the rollup)."""
+        row = RevenueRollup.objects.filter(month=month_start(today)).first()
+        return row.paid_total if row else 0
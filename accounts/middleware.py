@@ -0,0 +1,185 @@
+"""
+Per-request SQL instrumentation.
+
+QueryStatsMiddleware wraps a sampled share of requests in
+connection.execute_wrapper and records, per request, the number of queries,
+total SQL time, repeated statements (by fingerprint) and the slowest
+statement. Results go to:
+
+  * response headers (X-Query-Count, X-Query-Time-Ms, X-Query-Duplicates and
+    a Server-Timing "db" entry that browser dev tools display), only for
+    staff and admin users or when DEBUG is on, so backend timings are not
+    exposed to tenants or anonymous clients,
+  * one structured log line on the "accounts.query_stats" logger,
+  * an in-process rolling window per view, served to admins as JSON by
+    admin_query_stats.
+
+Settings (all optional):
+  QUERY_STATS_SAMPLE_RATE  share of requests instrumented, 0..1 (default 0.05)
+  QUERY_STATS_WINDOW       requests kept per view for the rolling stats (default 200)
+
+Parameters are never recorded, only the parameterised SQL, so nothing
+tenant-specific ends up in logs or headers.
+"""
+from collections import Counter, defaultdict, deque
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("accounts.query_stats")
+
+MAX_SQL_LENGTH = 300
+
+# "IN (%s, %s, %s)" -> "IN (%s...)" so batches of different sizes share a fingerprint
+_PLACEHOLDER_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def fingerprint(sql: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(%s...)", sql)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook collecting one request's statements."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ""
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.fingerprints[sql] += 1
+            if elapsed_ms > self.slowest_ms:
+                self.slowest_ms = elapsed_ms
+                self.slowest_sql = sql
+
+    def duplicates(self) -> dict:
+        """fingerprint -> executions, for statements run more than once."""
+        merged = Counter()
+        for sql, executions in self.fingerprints.items():
+            merged[fingerprint(sql)] += executions
+        return {sql: executions for sql, executions in merged.items() if executions > 1}
+
+    def summary(self) -> dict:
+        duplicates = self.duplicates()
+        return {
+            "queries": self.count,
+            "sql_ms": round(self.total_ms, 2),
+            "duplicate_queries": sum(duplicates.values()) - len(duplicates),
+            "duplicates": {sql[:MAX_SQL_LENGTH]: executions for sql, executions in duplicates.items()},
+            "slowest_ms": round(self.slowest_ms, 2),
+            "slowest_sql": self.slowest_sql[:MAX_SQL_LENGTH],
+        }
+
+
+class QueryStatsStore:
+    """Rolling per-view window of request summaries, shared by the process's threads."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: deque(maxlen=self.window))
+
+    def add(self, view: str, summary: dict):
+        with self._lock:
+            self._views[view].append(summary)
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            views = {view: list(samples) for view, samples in self._views.items()}
+        return {view: self._aggregate(samples) for view, samples in sorted(views.items())}
+
+    @staticmethod
+    def _aggregate(samples: list) -> dict:
+        queries = sorted(sample["queries"] for sample in samples)
+        sql_ms = sorted(sample["sql_ms"] for sample in samples)
+        duplicates = Counter()
+        for sample in samples:
+            duplicates.update(sample["duplicates"])
+        slowest = max(samples, key=lambda sample: sample["slowest_ms"])
+        return {
+            "requests": len(samples),
+            "queries_avg": round(sum(queries) / len(queries), 1),
+            "queries_max": queries[-1],
+            "sql_ms_p50": _percentile(sql_ms, 50),
+            "sql_ms_p95": _percentile(sql_ms, 95),
+            "sql_ms_max": sql_ms[-1],
+            "slowest_ms": slowest["slowest_ms"],
+            "slowest_sql": slowest["slowest_sql"],
+            "top_duplicates": [
+                {"sql": sql, "executions": executions} for sql, executions in duplicates.most_common(5)
+            ],
+        }
+
+
+def _percentile(ordered: list, percent: int):
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+query_stats = QueryStatsStore(window=getattr(settings, "QUERY_STATS_WINDOW", 200))
+
+
+def _shows_query_headers(request) -> bool:
+    if settings.DEBUG:
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and (user.is_staff or getattr(user, "role", "") == "ADMIN"))
+
+
+class QueryStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "QUERY_STATS_SAMPLE_RATE", 0.05)
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        summary = recorder.summary()
+        query_stats.add(view, summary)
+
+        if _shows_query_headers(request):
+            response["X-Query-Count"] = str(summary["queries"])
+            response["X-Query-Time-Ms"] = f"{summary['sql_ms']:.1f}"
+            response["X-Query-Duplicates"] = str(summary["duplicate_queries"])
+            response["Server-Timing"] = f'db;dur={summary["sql_ms"]:.1f};desc="{summary["queries"]} queries"'
+
+        logger.info(
+            "view=%s method=%s status=%s wall_ms=%.1f queries=%d sql_ms=%.1f duplicates=%d slowest_ms=%.1f",
+            view,
+            request.method,
+            response.status_code,
+            wall_ms,
+            summary["queries"],
+            summary["sql_ms"],
+            summary["duplicate_queries"],
+            summary["slowest_ms"],
+            extra={"query_stats": dict(summary, view=view, method=request.method, status=response.status_code, wall_ms=round(wall_ms, 2))},
+        )
+        return response
@@ -0,0 +1,185 @@
+"""
+Incremental admin notification feed.
+
+Clients keep the id of the newest notification they have seen and ask only
+for rows after it. That is a primary-key range scan, and its cost does not
+depend on how many notifications exist.
+
+It is served two ways:
+
+  * admin_notification_stream: Server-Sent Events. The SSE id is the
+    notification id, so a reconnecting EventSource resumes from
+    Last-Event-ID without gaps.
+  * admin_notifications' JSON branch (`?after_id=&limit=`): a bounded
+    delta feed for clients that poll. When nothing is new, the response
+    is a few dozen bytes.
+
+Both read the unread count from the "all" NotificationCounter row, a
+primary-key lookup kept in step with every notification write.
+
+Open streams share one "newest notification id" lookup through the cache,
+refreshed at most once per NOTIFICATION_STREAM_POLL_SECONDS. A stream only
+queries for rows when that id is past its cursor, so N idle admin tabs cost
+one query per poll interval, not N. Each stream also ends after
+NOTIFICATION_STREAM_MAX_SECONDS; EventSource then reconnects with
+Last-Event-ID and picks up where it stopped.
+
+The streaming loop only runs under ASGI (RealEstateDemo.asgi with uvicorn,
+daphne, ...). Under WSGI a stream would pin a worker for its whole
+lifetime. There the endpoint answers once with whatever is new, and
+EventSource reconnects after `retry` ms, which degrades to cheap polling.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+
+from rentals.models import Notification, NotificationCounter
+
+FEED_BATCH_SIZE = 50
+FEED_MAX_LIMIT = 100
+LATEST_ID_CACHE_KEY = "notifications:latest_id"
+
+
+def feed_queryset():
+    return Notification.objects.select_related("related_tenant__tenantprofile", "related_unit")
+
+
+def latest_notification_id() -> int:
+    return Notification.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def shared_latest_notification_id() -> int:
+    """latest_notification_id(), cached for one stream poll interval and shared by every stream."""
+    timeout = getattr(settings, "NOTIFICATION_STREAM_POLL_SECONDS", 3)
+    return cache.get_or_set(LATEST_ID_CACHE_KEY, latest_notification_id, timeout)
+
+
+def notifications_after(after_id: int, limit: int = FEED_BATCH_SIZE) -> list:
+    """Up to `limit` notifications newer than `after_id`, oldest first."""
+    return list(feed_queryset().filter(id__gt=after_id).order_by("id")[:limit])
+
+
+def unread_count() -> int:
+    return NotificationCounter.unread_for(NotificationCounter.ALL)
+
+
+def serialize_notification(notification) -> dict:
+    tenant = notification.related_tenant
+    unit = notification.related_unit
+    profile = getattr(tenant, "tenantprofile", None) if tenant else None
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": notification.message,
+        "notification_type": notification.notification_type,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "related_tenant": {
+            "email": tenant.email,
+            "name": profile.full_name if profile else tenant.email,
+        } if tenant else None,
+        "related_unit": {
+            "number": unit.number,
+            "type": unit.get_unit_type_display(),
+        } if unit else None,
+    }
+
+
+def parse_cursor(value) -> int | None:
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+def parse_limit(value) -> int:
+    limit = parse_cursor(value)
+    return min(limit, FEED_MAX_LIMIT) if limit else FEED_BATCH_SIZE
+
+
+def feed_payload(after_id: int | None, limit: int = FEED_BATCH_SIZE) -> dict:
+    """
+    JSON delta feed: up to `limit` notifications after `after_id`, oldest
+    first. With no cursor it returns the newest `limit`, so a client can
+    bootstrap. `cursor` is what to send as after_id next time; `has_more`
+    means another request would return rows right away.
+    """
+    if after_id is None:
+        rows = list(feed_queryset().order_by("-id")[:limit + 1])
+        has_more = False  # older rows are history, not news
+        rows = rows[:limit][::-1]
+        cursor = rows[-1].id if rows else 0
+    else:
+        rows = notifications_after(after_id, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = rows[-1].id if rows else after_id
+    return {
+        "cursor": cursor,
+        "has_more": has_more,
+        "unread_count": unread_count(),
+        "notifications": [serialize_notification(n) for n in rows],
+    }
+
+
+def sse_event(event: str, data: dict, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _delta_events(after_id: int) -> tuple[list[str], int, bool]:
+    """
+    SSE events for one batch after `after_id` (plus the new unread count),
+    the new cursor, and whether more rows are already waiting.
+    """
+    if shared_latest_notification_id() <= after_id:
+        return [], after_id, False
+    batch = notifications_after(after_id)
+    if not batch:
+        return [], after_id, False
+    events = [sse_event("notification", serialize_notification(n), n.id) for n in batch]
+    events.append(sse_event("unread", {"unread_count": unread_count()}))
+    return events, batch[-1].id, len(batch) == FEED_BATCH_SIZE
+
+
+async def event_stream(after_id: int):
+    poll_seconds = getattr(settings, "NOTIFICATION_STREAM_POLL_SECONDS", 3)
+    max_seconds = getattr(settings, "NOTIFICATION_STREAM_MAX_SECONDS", 300)
+    heartbeat_seconds = 15
+    started = last_sent = time.monotonic()
+
+    yield f"retry: {poll_seconds * 1000}\n\n"
+    while True:
+        events, after_id, more = await sync_to_async(_delta_events)(after_id)
+        if events:
+            yield "".join(events)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= heartbeat_seconds:
+            yield ": keep-alive\n\n"  # stops proxies from closing an idle stream
+            last_sent = time.monotonic()
+        if time.monotonic() - started >= max_seconds:
+            # end the stream; EventSource reconnects with Last-Event-ID
+            return
+        if not more:
+            await asyncio.sleep(poll_seconds)
+
+
+def is_asgi(request) -> bool:
+    return isinstance(request, ASGIRequest)
+
+
+def one_shot_events(after_id: int) -> str:
+    """A complete SSE body for WSGI: one batch, then let EventSource reconnect."""
+    events, _, more = _delta_events(after_id)
+    retry_ms = 0 if more else getattr(settings, "NOTIFICATION_POLL_SECONDS", 10) * 1000
+    return f"retry: {retry_ms}\n\n" + "".join(events)
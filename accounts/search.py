@@ -0,0 +1,89 @@
+"""
+Admin portal search.
+
+Each searchable model carries a `search_document` column: the normalized
+text (lower-cased, whitespace collapsed) of every field the admin portal
+searches on, including fields reached through joins (tenant email, unit
+number, ...). A search is then a single `search_document LIKE '%term%'` on
+one table, with the term normalized the same way. On PostgreSQL that LIKE
+is answered by a pg_trgm GIN index (created by each app's migration), so it
+no longer scans and joins whole tables the way chains of `icontains` did.
+
+refresh_search_documents() rebuilds documents: the joined text is selected
+in one query per batch, normalized by normalize(), and only rows whose
+document changed are written back with bulk_update. accounts.signals calls
+it when a searchable row, or a row its text is copied from, changes. Bulk
+writers such as generate_bills call it for the rows they create.
+
+Terms shorter than three characters cannot use a trigram index and fall
+back to a scan. They are still correct, just not fast.
+
+The migrations that added the columns carry frozen copies of the backfill
+and index SQL. Changing SEARCH_FIELDS does not rewrite them; run
+`rebuild_search_index` after such a change.
+"""
+from django.db.models import F, Q, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+REFRESH_BATCH_SIZE = 500
+
+# "app_label.ModelName" -> the fields (or lookup paths) concatenated into search_document
+SEARCH_FIELDS = {
+    "billing.MonthlyBill": ["lease__tenant__email", "lease__unit__number", "payment_reference"],
+    "payments.ManualPayment": ["user__email", "reference_code"],
+    "rentals.TenantProfile": ["full_name", "contact_no", "user__email", "user__username"],
+    "maintenance.MaintenanceRequest": ["lease__tenant__email", "lease__unit__number", "description"],
+    "announcements.Announcement": ["title", "body"],
+}
+
+
+def normalize(term: str) -> str:
+    return " ".join(term.split()).lower()
+
+
+def document_expression(paths):
+    """The raw (not yet normalized) document text for `paths`, as a database expression."""
+    parts = []
+    for path in paths:
+        if parts:
+            parts.append(Value(" "))
+        parts.append(Coalesce(F(path), Value(""), output_field=TextField()))
+    if len(parts) == 1:
+        return parts[0]
+    return Concat(*parts, output_field=TextField())
+
+
+def refresh_search_documents(queryset, paths=None, batch_size=REFRESH_BATCH_SIZE) -> int:
+    """
+    Rebuild search_document for every row of `queryset`, in primary-key
+    batches. Only changed documents are written. Returns the rows examined.
+    """
+    model = queryset.model
+    paths = paths or SEARCH_FIELDS[model._meta.label]
+    rows = queryset.order_by("pk").annotate(_search_document=document_expression(paths))
+    examined, last_pk = 0, None
+    while True:
+        batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        batch = list(batch.values_list("pk", "_search_document", "search_document")[:batch_size])
+        if not batch:
+            return examined
+        changed = []
+        for pk, raw, stored in batch:
+            document = normalize(raw or "")
+            if document != stored:
+                changed.append(model(pk=pk, search_document=document))
+        if changed:
+            model._base_manager.using(queryset.db).bulk_update(changed, ["search_document"])
+        examined += len(batch)
+        last_pk = batch[-1][0]
+
+
+def search_q(term: str) -> Q:
+    """The search condition as a Q, for OR-ing with other lookups."""
+    term = normalize(term)
+    return Q(search_document__contains=term) if term else Q()
+
+
+def search(queryset, term: str):
+    """Rows of `queryset` whose search_document contains `term` (case-insensitive)."""
+    return queryset.filter(search_q(term))
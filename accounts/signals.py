@@ -0,0 +1,81 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from announcements.models import Announcement
+from billing.models import MonthlyBill
+from maintenance.models import MaintenanceRequest
+from payments.models import ManualPayment
+from rentals.models import Lease, Notification, NotificationCounter, TenantProfile, Unit
+
+from .admin_portal_queries import invalidate_unit_stats
+from .search import SEARCH_FIELDS, refresh_search_documents
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def invalidate_unit_stats_after_unit_change(sender, instance, **kwargs):
+    invalidate_unit_stats()
+
+
+@receiver(post_save, sender=Lease)
+def invalidate_unit_stats_after_lease_created(sender, instance, created, **kwargs):
+    # lease edits that change a unit's status save the Unit itself
+    if created:
+        invalidate_unit_stats()
+
+
+@receiver(post_delete, sender=Lease)
+def invalidate_unit_stats_after_lease_deleted(sender, instance, **kwargs):
+    invalidate_unit_stats()
+
+
+def _touches(update_fields, fields):
+    """False only when a save(update_fields=...) provably left `fields` alone."""
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(post_save, sender=MonthlyBill)
+@receiver(post_save, sender=ManualPayment)
+@receiver(post_save, sender=TenantProfile)
+@receiver(post_save, sender=MaintenanceRequest)
+@receiver(post_save, sender=Announcement)
+def refresh_search_document(sender, instance, created, update_fields=None, **kwargs):
+    # "lease__unit__number" -> "lease": the local field a path starts from
+    local_fields = {path.split("__")[0] for path in SEARCH_FIELDS[sender._meta.label]}
+    if created or _touches(update_fields, local_fields):
+        refresh_search_documents(sender._base_manager.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=User)
+def refresh_search_documents_after_user_change(sender, instance, created, update_fields=None, **kwargs):
+    # logins save last_login only; a new user has nothing indexed yet
+    if created or not _touches(update_fields, {"email", "username"}):
+        return
+    refresh_search_documents(MonthlyBill.objects.filter(lease__tenant=instance))
+    refresh_search_documents(ManualPayment.objects.filter(user=instance))
+    refresh_search_documents(TenantProfile.objects.filter(user=instance))
+    refresh_search_documents(MaintenanceRequest.objects.filter(lease__tenant=instance))
+
+
+@receiver(post_save, sender=Unit)
+def refresh_search_documents_after_unit_change(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _touches(update_fields, {"number"}):
+        return
+    refresh_search_documents(MonthlyBill.objects.filter(lease__unit=instance))
+    refresh_search_documents(MaintenanceRequest.objects.filter(lease__unit=instance))
+
+
+@receiver(post_save, sender=Lease)
+def refresh_search_documents_after_lease_change(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _touches(update_fields, {"tenant", "unit"}):
+        return
+    refresh_search_documents(MonthlyBill.objects.filter(lease=instance))
+    refresh_search_documents(MaintenanceRequest.objects.filter(lease=instance))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    # runs inside the deletion's transaction, for cascades and queryset deletes too
+    if not instance.is_read:
+        NotificationCounter.adjust(NotificationCounter.deltas([instance.user_id], -1))
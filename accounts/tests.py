@@ -1,3 +1,352 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+import tempfile
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Q
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.middleware import QueryRecorder, fingerprint, query_stats
+from accounts.admin_portal_queries import PER_PAGE, keyset_paginate, status_counts
+from accounts.models import User
+from announcements.models import Announcement
+from billing.models import MonthlyBill
+from billing.services import generate_bills
+from payments.models import ManualPayment
+from rentals.models import Lease, Notification, TenantProfile, Unit
+
+
+class AdminPortalTestCase(TestCase):
+    """Logged in as an admin, with an empty cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="password123",
+            role=User.Role.ADMIN,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+
+class BenchmarkPortalCommandTests(TestCase):
+    def setUp(self):
+        self.baseline = Path(tempfile.mkdtemp()) / "portal_baseline.json"
+
+    def _run(self, *args):
+        call_command(
+            "benchmark_portal",
+            "--generate",
+            "--buildings=1",
+            "--units-per-building=4",
+            "--years=1",
+            "--repeat=1",
+            f"--baseline={self.baseline}",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_records_baseline_and_flags_query_regressions(self):
+        self._run("--update-baseline")
+        report = json.loads(self.baseline.read_text())
+        self.assertEqual(report["meta"]["dataset"]["leases"], 3)
+        self.assertTrue(all(view["queries"] > 0 for view in report["views"].values()))
+        self.assertTrue(all(view["rows"] > 0 for view in report["views"].values()))
+
+        self._run("--time-floor-ms=100000")
+
+        report["views"]["tenant_billing"]["queries"] -= 1
+        self.baseline.write_text(json.dumps(report))
+        with self.assertRaisesMessage(CommandError, "tenant_billing"):
+            self._run("--time-floor-ms=100000")
+
+        report["views"]["tenant_billing"]["queries"] += 1
+        report["views"]["admin_billing"]["rows"] //= 2
+        self.baseline.write_text(json.dumps(report))
+        with self.assertRaisesMessage(CommandError, "admin_billing: "):
+            self._run("--time-floor-ms=100000")
+
+
+@override_settings(QUERY_STATS_SAMPLE_RATE=1.0)
+class QueryStatsMiddlewareTests(AdminPortalTestCase):
+    def setUp(self):
+        super().setUp()
+        query_stats.clear()
+
+    def test_fingerprint_collapses_placeholder_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s,%s)'),
+        )
+
+    def test_recorder_reports_duplicates_and_slowest(self):
+        recorder = QueryRecorder()
+        execute = lambda sql, params, many, context: None
+        for sql in ("SELECT a WHERE id IN (%s, %s)", "SELECT a WHERE id IN (%s)", "SELECT b"):
+            recorder(execute, sql, (), False, {})
+
+        summary = recorder.summary()
+        self.assertEqual(summary["queries"], 3)
+        self.assertEqual(summary["duplicate_queries"], 1)
+        self.assertEqual(summary["duplicates"], {"SELECT a WHERE id IN (%s...)": 2})
+
+    def test_headers_and_rolling_stats(self):
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertGreater(int(response["X-Query-Count"]), 0)
+        self.assertIn("X-Query-Time-Ms", response)
+        self.assertTrue(response["Server-Timing"].startswith("db;dur="))
+
+        stats = self.client.get(reverse("admin_query_stats")).json()
+        dashboard = stats["views"]["admin_dashboard"]
+        self.assertEqual(dashboard["requests"], 1)
+        self.assertEqual(dashboard["queries_max"], int(response["X-Query-Count"]))
+
+    def test_headers_are_only_sent_to_admins(self):
+        self.client.logout()
+        response = self.client.get(reverse("login"))
+        self.assertNotIn("X-Query-Count", response)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(query_stats.snapshot()["login"]["requests"], 1)  # still recorded
+
+    @override_settings(QUERY_STATS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_instrumented(self):
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertNotIn("X-Query-Count", response)
+
+
+class AdminUnitsViewTests(AdminPortalTestCase):
+    def setUp(self):
+        super().setUp()
+        Unit.objects.bulk_create([
+            Unit(number=f"{floor}{index:02d}", floor_level=floor, status="OCCUPIED" if index % 3 == 0 else "AVAILABLE")
+            for floor in range(1, 4)
+            for index in range(1, 21)
+        ])
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        first = self.client.get(reverse("admin_units"), {"status": "all"})
+        self.assertEqual(len(first.context["units"]), PER_PAGE)
+        self.assertFalse(first.context["page"].has_previous)
+        self.assertIn("status=all", first.context["page"].next_query)
+
+        second = self.client.get(reverse("admin_units") + first.context["page"].next_query)
+        self.assertEqual([unit.number for unit in second.context["units"]], [f"3{index:02d}" for index in range(11, 21)])
+        self.assertFalse(second.context["page"].has_next)
+
+        back = self.client.get(reverse("admin_units") + second.context["page"].prev_query)
+        self.assertEqual(list(back.context["units"]), list(first.context["units"]))
+        self.assertFalse(back.context["page"].has_previous)
+
+    def test_keyset_pages_break_ties_on_id_and_ignore_bad_cursors(self):
+        units = Unit.objects.all()
+        Unit.objects.update(floor_level=7)  # every row ties on the leading key
+        seen, page = [], keyset_paginate(units, ["-floor_level", "-id"], per_page=7)
+        while True:
+            seen.extend(unit.pk for unit in page)
+            if not page.has_next:
+                break
+            page = keyset_paginate(units, ["-floor_level", "-id"], after=page.next_cursor, per_page=7)
+        self.assertEqual(seen, sorted(units.values_list("pk", flat=True), reverse=True))
+
+        garbage = keyset_paginate(units, ["-floor_level", "-id"], after="not-a-cursor", per_page=7)
+        self.assertEqual([unit.pk for unit in garbage], seen[:7])
+
+    def test_status_counts_are_cached_until_a_unit_changes(self):
+        response = self.client.get(reverse("admin_units"))
+        self.assertEqual(
+            (response.context["total_units"], response.context["available_units"], response.context["occupied_units"]),
+            (60, 42, 18),
+        )
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(reverse("admin_units"))
+        self.assertFalse(any("COUNT" in query["sql"] for query in cached.captured_queries))
+
+        unit = Unit.objects.get(number="101")
+        unit.status = "MAINTENANCE"
+        unit.save()
+        response = self.client.get(reverse("admin_units"))
+        self.assertEqual((response.context["available_units"], response.context["maintenance_units"]), (41, 1))
+
+
+class AdminSearchTests(AdminPortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tenant = User.objects.create_user(
+            email="Maria.Santos@example.com",
+            username="msantos",
+            password="password123",
+            role=User.Role.TENANT,
+        )
+        TenantProfile.objects.create(user=self.tenant, full_name="Maria Santos", contact_no="0917")
+        self.unit = Unit.objects.create(number="C-301")
+        self.lease = Lease.objects.create(
+            tenant=self.tenant,
+            unit=self.unit,
+            monthly_rent=Decimal("8000.00"),
+            start_date=timezone.now().date().replace(day=1),
+        )
+        generate_bills([self.lease])
+
+    def _billing(self, q):
+        return list(self.client.get(reverse("admin_billing"), {"q": q}).context["bills"])
+
+    def test_bulk_created_bills_are_searchable_by_joined_fields(self):
+        bill = MonthlyBill.objects.get(lease=self.lease)
+        self.assertEqual(bill.search_document, "maria.santos@example.com c-301")
+        self.assertEqual(self._billing("SANTOS@"), [bill])
+        self.assertEqual(self._billing("c-301"), [bill])
+        self.assertEqual(self._billing("nobody"), [])
+
+    def test_documents_follow_changes_to_the_rows_they_copy(self):
+        self.unit.number = "D-404"
+        self.unit.save()
+        self.tenant.email = "maria.cruz@example.com"
+        self.tenant.save()
+
+        self.assertEqual(len(self._billing("d-404")), 1)
+        self.assertEqual(self._billing("santos@"), [])
+        tenants = self.client.get(reverse("admin_tenants"), {"q": "maria.cruz"}).context["tenants"]
+        self.assertEqual([profile.user_id for profile in tenants], [self.tenant.pk])
+
+    def test_documents_and_terms_share_whitespace_normalization(self):
+        Announcement.objects.create(title="Water  interruption", body="Tower\tB,\n  Friday")
+        for term in ("water interruption", "WATER   interruption", "tower b, friday"):
+            items = self.client.get(reverse("admin_announcements"), {"q": term}).context["items"]
+            self.assertEqual([item.title for item in items], ["Water  interruption"], term)
+
+    def test_payment_and_announcement_search(self):
+        payment = ManualPayment.objects.create(user=self.tenant, reference_code="GC-778899")
+        Announcement.objects.create(title="Water interruption", body="Tower B, Friday")
+        Announcement.objects.create(title="Pool schedule", body="Open daily")
+
+        payments = self.client.get(reverse("admin_payments"), {"q": "gc-7788"}).context["payments"]
+        self.assertEqual(list(payments), [payment])
+        items = self.client.get(reverse("admin_announcements"), {"q": "tower b"}).context["items"]
+        self.assertEqual([item.title for item in items], ["Water interruption"])
+
+
+class StatusCountsTests(TestCase):
+    def setUp(self):
+        tenant = User.objects.create_user(
+            email="counted@example.com",
+            username="counted",
+            password="password123",
+            role=User.Role.TENANT,
+        )
+        for index, status in enumerate(["PENDING", "PENDING", "APPROVED", "REJECTED"]):
+            ManualPayment.objects.create(user=tenant, reference_code=f"REF-{index}", status=status)
+
+    def test_all_buckets_in_one_query(self):
+        buckets = {"pending": Q(status="PENDING"), "approved": Q(status="APPROVED"), "rejected": Q(status="REJECTED")}
+        with self.assertNumQueries(1):
+            counts = status_counts(ManualPayment.objects.all(), buckets)
+        self.assertEqual(counts, {"pending": 2, "approved": 1, "rejected": 1, "total": 4})
+
+        filtered = status_counts(ManualPayment.objects.filter(status="PENDING"), buckets)
+        self.assertEqual(filtered, {"pending": 2, "approved": 0, "rejected": 0, "total": 2})
+        self.assertNotIn("total", status_counts(ManualPayment.objects.all(), buckets, total=None))
+
+
+class NotificationStreamTests(AdminPortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seen = Notification.create_notification("Old", "already rendered")
+        self.unit = Unit.objects.create(number="N-1")
+
+    def test_wsgi_answers_once_with_only_new_notifications(self):
+        Notification.create_notification("Lease created", "A new lease", "LEASE", related_unit=self.unit)
+
+        response = self.client.get(reverse("admin_notification_stream"), {"after_id": self.seen.pk})
+        body = response.content.decode()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(body.startswith("retry: 10000"))
+        self.assertNotIn('"title":"Old"', body)
+        self.assertIn('"title":"Lease created"', body)
+        self.assertIn('"related_unit":{"number":"N-1"', body)
+        self.assertIn('event: unread\ndata: {"unread_count":2}', body)
+
+        newest = Notification.objects.latest("id")
+        response = self.client.get(reverse("admin_notification_stream"), HTTP_LAST_EVENT_ID=str(newest.pk))
+        self.assertEqual(response.content.decode(), "retry: 10000\n\n")
+
+    @override_settings(NOTIFICATION_STREAM_MAX_SECONDS=0)
+    async def test_asgi_streams_events(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        await Notification.objects.acreate(title="Payment", message="GCash payment submitted")
+
+        response = await client.get(reverse("admin_notification_stream"), {"after_id": self.seen.pk})
+        self.assertTrue(response.streaming)
+        body = "".join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertTrue(body.startswith("retry: 3000"))
+        self.assertIn('"title":"Payment"', body)
+
+    def test_idle_streams_share_one_latest_id_query(self):
+        url = reverse("admin_notification_stream")
+        self.client.get(url, {"after_id": self.seen.pk})
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                self.client.get(url, {"after_id": self.seen.pk})
+        self.assertFalse([q for q in queries if "rentals_notification" in q["sql"]])
+
+    def test_streamed_cards_render_the_same_actions(self):
+        response = self.client.get(reverse("admin_notifications"))
+        body = response.content.decode()
+        self.assertIn("markRead: '/admin-portal/notifications/0/read/'", body)
+        self.assertIn("'Mark Read'", body)
+        self.assertIn("'Delete'", body)
+        self.assertIn("csrfmiddlewaretoken", body)
+
+    def test_stream_requires_admin(self):
+        self.client.logout()
+        response = self.client.get(reverse("admin_notification_stream"))
+        self.assertEqual(response.status_code, 302)
+
+
+class NotificationFeedTests(AdminPortalTestCase):
+    def setUp(self):
+        super().setUp()
+        tenant = User.objects.create_user(email="t@example.com", username="t", password="password123")
+        TenantProfile.objects.create(user=tenant, full_name="Tess Tenant")
+        unit = Unit.objects.create(number="F-1")
+        for index in range(12):
+            Notification.create_notification(f"Event {index}", "...", related_tenant=tenant, related_unit=unit)
+
+    def _feed(self, **params):
+        return self.client.get(reverse("admin_notifications"), params, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def test_delta_feed_is_bounded_and_cursor_based(self):
+        first = self._feed(limit=5).json()
+        self.assertEqual([n["title"] for n in first["notifications"]], [f"Event {i}" for i in range(7, 12)])
+        self.assertEqual(first["notifications"][0]["related_tenant"]["name"], "Tess Tenant")
+
+        oldest = Notification.objects.order_by("id").first()
+        with CaptureQueriesContext(connection) as queries:
+            page = self._feed(after_id=oldest.pk, limit=5).json()
+        self.assertEqual(len(page["notifications"]), 5)
+        self.assertTrue(page["has_more"])
+        self.assertEqual(page["unread_count"], 12)
+        # session + user + one feed query with the joins + the unread counter's primary-key read
+        self.assertLessEqual(len(queries.captured_queries), 4)
+
+        idle = self._feed(after_id=first["cursor"])
+        self.assertEqual(idle.json()["notifications"], [])
+        self.assertLess(len(idle.content), 120)
+
+    def test_unread_count_follows_writes(self):
+        self.assertEqual(self._feed(after_id=0, limit=1).json()["unread_count"], 12)
+        notification = Notification.objects.first()
+        self.client.post(reverse("admin_mark_notification_read", args=[notification.pk]))
+        self.assertEqual(self._feed(after_id=0, limit=1).json()["unread_count"], 11)
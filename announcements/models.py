@@ -7,6 +7,8 @@ class Announcement(models.Model):
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # lower-cased searchable text, maintained by accounts.search (trigram-indexed on PostgreSQL)
+    search_document = models.TextField(blank=True, default="", editable=False)
 
     def __str__(self):
         return self.title
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import MonthlyBill
+from .services import save_edited_bill
 
 
 @admin.register(MonthlyBill)
@@ -16,4 +17,14 @@ class MonthlyBillAdmin(admin.ModelAdmin):
     list_filter = ("status", "billing_month", "due_date")
     search_fields = ("lease__tenant__email", "lease__unit__number", "payment_reference")
     ordering = ("-billing_month",)
-    list_select_related = ("lease",)
\ No newline at end of file
+    list_select_related = ("lease",)
+
+    def get_readonly_fields(self, request, obj=None):
+        # unpaid bills store principal only; interest is derived on read and frozen at payment
+        if obj is None or obj.status == "UNPAID":
+            return ("interest", "total_due")
+        return ()
+
+    def save_model(self, request, obj, form, change):
+        # freezes/unfreezes interest and keeps RevenueRollup in step with the edit
+        save_edited_bill(obj)
\ No newline at end of file
@@ -0,0 +1 @@
+"""Commands package for billing management commands."""
@@ -0,0 +1,172 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+# Indexes added for the MonthlyBill/Lease hot paths (billing 0010, rentals 0010).
+HOT_PATH_INDEXES = (
+    "bill_lease_status_month_idx",
+    "bill_unpaid_due_idx",
+    "bill_unpaid_month_idx",
+    "bill_status_paid_at_idx",
+    "lease_tenant_active_idx",
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot MonthlyBill/Lease queries and print their EXPLAIN plans, with the "
+        "hot-path indexes in place and again with them dropped inside a rolled-back transaction. "
+        "Run it against a large dataset (see generate_load_data). Dropping the indexes holds an "
+        "ACCESS EXCLUSIVE lock on the bill and lease tables for the whole no-index run, blocking all "
+        "billing traffic, so that phase only runs with DEBUG on; never point it at a live database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs per query; the median is reported (default 20).",
+        )
+        parser.add_argument(
+            "--no-plans",
+            action="store_true",
+            help="Only print timings, not EXPLAIN output.",
+        )
+        parser.add_argument(
+            "--skip-baseline",
+            action="store_true",
+            help="Do not re-run the queries with the indexes dropped.",
+        )
+
+    def handle(self, *args, **options):
+        from billing.models import MonthlyBill
+        from rentals.models import Lease
+
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        if not options["skip_baseline"] and not settings.DEBUG:
+            raise CommandError(
+                "The no-index run drops indexes inside a transaction, locking the bill and lease tables "
+                "until it finishes. Run it with DEBUG on against a copy of the data, or pass --skip-baseline."
+            )
+        self.repeat = options["repeat"]
+        self.show_plans = not options["no_plans"]
+
+        lease_count = Lease.objects.count()
+        bill_count = MonthlyBill.objects.count()
+        if not bill_count:
+            raise CommandError("No MonthlyBill rows to benchmark; generate a dataset first.")
+        self.stdout.write(f"Dataset: {lease_count} leases, {bill_count} bills ({connection.vendor}).")
+
+        # fresh planner statistics, otherwise a just-generated dataset gets naive plans
+        with connection.cursor() as cursor:
+            for model in (MonthlyBill, Lease):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+        queries = self.hot_queries()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nWith hot-path indexes"))
+        indexed = self.measure(queries)
+
+        baseline = {}
+        if not options["skip_baseline"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("\nWithout hot-path indexes (rolled back afterwards)"))
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for name in HOT_PATH_INDEXES:
+                            cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+                    baseline = self.measure(queries)
+                    raise Rollback
+            except Rollback:
+                pass
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSummary (median ms)"))
+        self.stdout.write(f"{'query':<28}{'indexed':>12}{'no index':>12}{'speedup':>10}")
+        for name in queries:
+            with_index = indexed[name]
+            without_index = baseline.get(name)
+            if without_index is None:
+                self.stdout.write(f"{name:<28}{with_index:>12.3f}")
+            else:
+                speedup = without_index / with_index if with_index else float("inf")
+                self.stdout.write(f"{name:<28}{with_index:>12.3f}{without_index:>12.3f}{speedup:>9.1f}x")
+
+    def hot_queries(self):
+        """(queryset, evaluator) for each access pattern the indexes were designed for."""
+        from billing.models import MonthlyBill
+        from rentals.models import Lease
+
+        now = timezone.now()
+        today = now.date()
+        # an aware datetime bound, so the paid_at range can use (status, paid_at);
+        # paid_at__date would wrap the column in a time-zone conversion
+        month_start = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        leases = Lease.objects.filter(is_active=True).order_by("pk")
+        sample = leases[leases.count() // 2] if leases.exists() else Lease.objects.order_by("pk").first()
+
+        return {
+            "tenant_active_lease": (
+                Lease.objects.filter(tenant_id=sample.tenant_id, is_active=True),
+                lambda qs: qs.first(),
+            ),
+            "lease_unpaid_bills": (
+                MonthlyBill.objects.filter(lease=sample, status="UNPAID").order_by("billing_month"),
+                list,
+            ),
+            "tenant_bills_by_month": (
+                MonthlyBill.objects.filter(lease__tenant_id=sample.tenant_id, status="PAID").order_by("-billing_month"),
+                list,
+            ),
+            "overdue_count": (
+                MonthlyBill.objects.filter(status="UNPAID", due_date__lt=today).order_by(),
+                lambda qs: qs.count(),
+            ),
+            "newly_overdue_scan": (
+                MonthlyBill.objects.filter(
+                    status="UNPAID", due_date__lt=today, due_date__gte=today - timedelta(days=7),
+                ).values_list("lease__tenant_id", flat=True).order_by().distinct(),
+                list,
+            ),
+            "unpaid_newest_page": (
+                MonthlyBill.objects.filter(status="UNPAID").order_by("-billing_month")[:50],
+                list,
+            ),
+            "revenue_paid_this_month": (
+                MonthlyBill.objects.filter(status="PAID", paid_at__gte=month_start).order_by(),
+                lambda qs: qs.aggregate(total=Sum("total_due")),
+            ),
+            "recent_payments_6m": (
+                MonthlyBill.objects.filter(status="PAID", paid_at__gte=now - timedelta(days=180)).order_by(),
+                lambda qs: qs.count(),
+            ),
+        }
+
+    def measure(self, queries):
+        results = {}
+        for name, (queryset, evaluate) in queries.items():
+            evaluate(queryset.all())  # warm up
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                evaluate(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+
+            self.stdout.write(f"{name}: {results[name]:.3f} ms")
+            if self.show_plans:
+                for line in queryset.explain().splitlines():
+                    self.stdout.write(f"    {line}")
+        return results
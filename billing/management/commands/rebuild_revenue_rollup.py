@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from billing.services import rebuild_revenue_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the RevenueRollup table from scratch from MonthlyBill rows."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding revenue rollup...")
+        months = rebuild_revenue_rollup()
+        self.stdout.write(self.style.SUCCESS(f"Revenue rollup rebuilt for {months} months."))
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:42
+
+from django.db import migrations
+from django.db.models import F
+
+
+def strip_persisted_interest(apps, schema_editor):
+    # Interest on unpaid bills is now accrued on read; keep only the principal.
+    MonthlyBill = apps.get_model('billing', 'MonthlyBill')
+    MonthlyBill.objects.filter(status='UNPAID').exclude(interest=0).update(
+        total_due=F('total_due') - F('interest'),
+        interest=0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0007_remove_paymenttransaction_lease_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_persisted_interest, migrations.RunPython.noop),
+    ]
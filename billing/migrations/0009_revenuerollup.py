@@ -0,0 +1,72 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:05
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_revenue_rollup(apps, schema_editor):
+    MonthlyBill = apps.get_model('billing', 'MonthlyBill')
+    RevenueRollup = apps.get_model('billing', 'RevenueRollup')
+
+    rows = defaultdict(lambda: defaultdict(int))
+    billed = (
+        MonthlyBill.objects.values('billing_month')
+        .annotate(
+            billed_total=Sum('total_due'),
+            billed_count=Count('id'),
+            unpaid_total=Sum('total_due', filter=Q(status='UNPAID')),
+            unpaid_count=Count('id', filter=Q(status='UNPAID')),
+        )
+        .order_by()
+    )
+    for row in billed:
+        month = row.pop('billing_month').replace(day=1)
+        for field, value in row.items():
+            rows[month][field] += value or 0
+
+    paid = (
+        MonthlyBill.objects.filter(status='PAID', paid_at__isnull=False)
+        .annotate(month=TruncMonth('paid_at'))
+        .values('month')
+        .annotate(paid_total=Sum('total_due'), paid_count=Count('id'))
+        .order_by()
+    )
+    for row in paid:
+        month = row.pop('month').date()
+        for field, value in row.items():
+            rows[month][field] += value or 0
+
+    RevenueRollup.objects.bulk_create(
+        [RevenueRollup(month=month, **fields) for month, fields in rows.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0008_unpaid_bills_store_principal_only'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_count', models.IntegerField(default=0)),
+                ('billed_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('billed_count', models.IntegerField(default=0)),
+                ('unpaid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unpaid_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.RunPython(populate_revenue_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0009_revenuerollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlybill',
+            index=models.Index(fields=['lease', 'status', 'billing_month'], name='bill_lease_status_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlybill',
+            index=models.Index(condition=models.Q(('status', 'UNPAID')), fields=['due_date'], name='bill_unpaid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlybill',
+            index=models.Index(condition=models.Q(('status', 'UNPAID')), fields=['billing_month'], name='bill_unpaid_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlybill',
+            index=models.Index(fields=['status', 'paid_at'], name='bill_status_paid_at_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0010_monthlybill_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlybill',
+            index=models.Index(fields=['billing_month', 'id'], name='bill_month_id_idx'),
+        ),
+    ]
@@ -3,6 +3,16 @@ from django.utils import timezone
 
 
 class MonthlyBill(models.Model):
+    """
+    One month of rent (plus water) for a lease.
+
+    While a bill is UNPAID, the stored `interest` is 0 and `total_due` is the
+    principal only (base_rent + water_amount). Late interest is derived on
+    read by billing.services.accrue_interest and never saved. Paying the bill
+    freezes the interest owed on the payment date into both columns. Anything
+    summing stored totals, such as RevenueRollup.unpaid_total, therefore
+    counts principal only for unpaid bills.
+    """
     STATUS_CHOICES = [
         ("UNPAID", "Unpaid"),
         ("PAID", "Paid"),
@@ -20,13 +30,47 @@ class MonthlyBill(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="UNPAID")
     paid_at = models.DateTimeField(null=True, blank=True)
     payment_reference = models.CharField(max_length=80, blank=True, default="")
+    # lower-cased searchable text, maintained by accounts.search (trigram-indexed on PostgreSQL)
+    search_document = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         unique_together = ("lease", "billing_month")
         ordering = ("-billing_month",)
+        indexes = [
+            # tenant pages: a lease's unpaid/paid bills in month order
+            models.Index(fields=["lease", "status", "billing_month"], name="bill_lease_status_month_idx"),
+            # overdue counts and overdue scans only ever look at unpaid bills
+            models.Index(fields=["due_date"], name="bill_unpaid_due_idx", condition=models.Q(status="UNPAID")),
+            # admin billing "unpaid" filter, newest month first
+            models.Index(fields=["billing_month"], name="bill_unpaid_month_idx", condition=models.Q(status="UNPAID")),
+            # revenue by payment date and risk scoring's recent payments
+            models.Index(fields=["status", "paid_at"], name="bill_status_paid_at_idx"),
+            # admin billing list: keyset pages on (billing_month, id), newest first
+            models.Index(fields=["billing_month", "id"], name="bill_month_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.lease} - {self.billing_month} ({self.status})"
 
 
+class RevenueRollup(models.Model):
+    """
+    Monthly revenue totals kept in sync incrementally by billing.services.
+    Paid figures are keyed by the month the bill was paid (paid_at);
+    billed/unpaid figures by the bill's billing_month. Unpaid figures are
+    principal only (see MonthlyBill); accrued late interest is not included.
+    """
+    month = models.DateField(unique=True)  # month-start date
+
+    paid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_count = models.IntegerField(default=0)
+    billed_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    billed_count = models.IntegerField(default=0)
+    unpaid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unpaid_count = models.IntegerField(default=0)
 
+    class Meta:
+        ordering = ("-month",)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} paid={self.paid_total} billed={self.billed_total}"
@@ -1,16 +1,26 @@
+from collections import defaultdict
 from datetime import date
 from decimal import Decimal
 import calendar
 
 from django.db import transaction
+from django.db.models import Case, Count, DateField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
 from django.utils import timezone
 
-from billing.models import MonthlyBill
+from accounts.search import refresh_search_documents
+from billing.models import MonthlyBill, RevenueRollup
+from rentals.services import mark_tenants_dirty
 from water.models import WaterBill
 
 # 3% interest PER WEEK late (BASE RENT ONLY for now)
 WEEKLY_LATE_INTEREST_RATE = Decimal("0.03")
 
+# rows per INSERT/UPDATE statement for the bulk billing engine
+BULK_BATCH_SIZE = 500
+
+BILL_AMOUNT_FIELDS = ("due_date", "base_rent", "water_amount", "interest", "total_due")
+
 
 def month_start(d: date) -> date:
     return date(d.year, d.month, 1)
@@ -61,6 +71,45 @@ def compute_weekly_interest(base_rent: Decimal, due_date: date, today: date) ->
     return interest, True, weeks_late
 
 
+def compute_weekly_interest_batch(base_rents, due_dates, today: date) -> tuple[list[Decimal], list[bool], list[int]]:
+    """
+    Array version of compute_weekly_interest for aging/re-pricing jobs.
+
+    Runs in one pass on integer centavos and date ordinals instead of Decimal
+    arithmetic, rounding half-even like Decimal.quantize, so results are identical
+    to calling compute_weekly_interest per bill.
+    Returns parallel lists: (interest, is_late, weeks_late).
+    """
+    rate_num, rate_den = WEEKLY_LATE_INTEREST_RATE.as_integer_ratio()
+    today_ordinal = today.toordinal()
+
+    interests, late_flags, weeks = [], [], []
+    for base_rent, due_date in zip(base_rents, due_dates, strict=True):
+        days_late = today_ordinal - due_date.toordinal()
+        if days_late <= 0:
+            interests.append(Decimal("0.00"))
+            late_flags.append(False)
+            weeks.append(0)
+            continue
+
+        weeks_late = (days_late // 7) + 1
+        cents = Decimal(base_rent) * 100
+        if cents < 0 or cents != cents.to_integral_value():
+            # not a whole number of centavos; let Decimal handle the odd case
+            interest, _, _ = compute_weekly_interest(Decimal(base_rent), due_date, today)
+        else:
+            quotient, remainder = divmod(int(cents) * rate_num * weeks_late, rate_den)
+            if 2 * remainder > rate_den or (2 * remainder == rate_den and quotient % 2):
+                quotient += 1
+            interest = Decimal(quotient).scaleb(-2)
+
+        interests.append(interest)
+        late_flags.append(True)
+        weeks.append(weeks_late)
+
+    return interests, late_flags, weeks
+
+
 def get_water_amount_for_month(unit, billing_month: date) -> Decimal:
     """
     Pull the POSTED water bill for that month (if any).
@@ -75,9 +124,59 @@ def get_water_amount_for_month(unit, billing_month: date) -> Decimal:
     return wb.total_amount if wb else Decimal("0.00")
 
 
+def get_water_amounts_by_month(unit_ids, start: date, end: date) -> dict[tuple[int, date], Decimal]:
+    """
+    Bulk version of get_water_amount_for_month.
+    Returns {(unit_id, billing_month): amount} for every POSTED water bill whose
+    period starts between the start and end months (inclusive).
+    """
+    water_bills = (
+        WaterBill.objects.filter(
+            unit_id__in=unit_ids,
+            period_start__gte=month_start(start),
+            period_start__lt=add_months(end, 1),
+            status="POSTED",
+        )
+        .prefetch_related("charges")
+        .order_by("-period_end", "-id")
+    )
+
+    amounts = {}
+    for wb in water_bills:
+        # same ordering as WaterBill.Meta, so the first one seen wins like .first() does
+        amounts.setdefault((wb.unit_id, month_start(wb.period_start)), wb.total_amount)
+    return amounts
+
+
+def bill_amounts(due_date: date, base_rent: Decimal, water_amount: Decimal, interest: Decimal = Decimal("0.00")) -> dict:
+    """
+    MonthlyBill field values. Unpaid rows persist only the principal (interest 0.00);
+    late interest is derived on read by accrue_interest() and frozen at payment.
+    """
+    water_amount = Decimal(water_amount)
+    return {
+        "due_date": due_date,
+        "base_rent": base_rent,
+        "water_amount": water_amount,
+        "interest": interest,
+        "total_due": (base_rent + water_amount + interest).quantize(Decimal("0.01")),
+    }
+
+
+def apply_bill_amounts(bill: MonthlyBill, values: dict) -> bool:
+    """Copies computed values onto the bill. Returns True if anything changed."""
+    changed = False
+    for field, value in values.items():
+        if getattr(bill, field) != value:
+            setattr(bill, field, value)
+            changed = True
+    return changed
+
+
 def get_or_update_monthly_bill(lease, billing_month: date, today: date | None = None) -> MonthlyBill:
     """
-    Creates/updates MonthlyBill totals for the month.
+    Creates/updates the MonthlyBill principal for the month and returns it with
+    interest accrued as of today (in memory only).
     - Interest applies to BASE RENT only (as requested).
     - Water is included in total_due (but no interest yet).
     """
@@ -85,54 +184,192 @@ def get_or_update_monthly_bill(lease, billing_month: date, today: date | None =
         today = date.today()
 
     billing_month = month_start(billing_month)
-
     due_date = due_date_for_month(billing_month.year, billing_month.month, lease.due_day)
-    base_rent = normalized_monthly_rent(lease)
-    water_amount = Decimal(get_water_amount_for_month(lease.unit, billing_month))
-
-    interest, is_late, weeks_late = compute_weekly_interest(base_rent, due_date, today)
-    total_due = (base_rent + water_amount + interest).quantize(Decimal("0.01"))
+    water_amount = get_water_amount_for_month(lease.unit, billing_month)
+    values = bill_amounts(due_date, normalized_monthly_rent(lease), water_amount)
 
     bill, _ = MonthlyBill.objects.get_or_create(
         lease=lease,
         billing_month=billing_month,
-        defaults={
-            "due_date": due_date,
-            "base_rent": base_rent,
-            "water_amount": water_amount,
-            "interest": interest,
-            "total_due": total_due,
-            "status": "UNPAID",
-        },
+        defaults={**values, "status": "UNPAID"},
     )
 
-    # keep totals fresh (water/interest can change)
-    changed = False
-    if bill.due_date != due_date:
-        bill.due_date = due_date
-        changed = True
-    if bill.base_rent != base_rent:
-        bill.base_rent = base_rent
-        changed = True
-    if bill.water_amount != water_amount:
-        bill.water_amount = water_amount
-        changed = True
-    if bill.interest != interest:
-        bill.interest = interest
-        changed = True
-    if bill.total_due != total_due:
-        bill.total_due = total_due
-        changed = True
-
-    if changed:
+    # keep the principal fresh (water/rent can change); paid bills are frozen
+    if bill.status == "UNPAID" and apply_bill_amounts(bill, values):
         bill.save()
 
-    # extra values useful in UI
-    bill._is_late = is_late
-    bill._weeks_late = weeks_late
+    accrue_interest([bill], today=today)
     return bill
 
 
+def accrue_interest(bills, today: date | None = None) -> list[MonthlyBill]:
+    """
+    Derives late interest for UNPAID bills at read time and fills bill.interest /
+    bill.total_due in memory (never saved), plus _is_late / _weeks_late for the UI.
+    PAID bills keep the amounts frozen at payment time.
+    """
+    if today is None:
+        today = date.today()
+
+    bills = list(bills)
+    for bill in bills:
+        bill._is_late = False
+        bill._weeks_late = 0
+
+    unpaid = [bill for bill in bills if bill.status == "UNPAID" and bill.due_date]
+    interests, late_flags, weeks = compute_weekly_interest_batch(
+        [bill.base_rent for bill in unpaid],
+        [bill.due_date for bill in unpaid],
+        today,
+    )
+    for bill, interest, is_late, weeks_late in zip(unpaid, interests, late_flags, weeks):
+        bill.interest = interest
+        bill.total_due = (bill.base_rent + bill.water_amount + interest).quantize(Decimal("0.01"))
+        bill._is_late = is_late
+        bill._weeks_late = weeks_late
+
+    return bills
+
+
+def freeze_interest(bill: MonthlyBill, paid_at) -> None:
+    """Locks in the late interest owed on the payment date (in memory; caller saves)."""
+    paid_on = timezone.localdate(paid_at) if timezone.is_aware(paid_at) else paid_at.date()
+    interest = Decimal("0.00")
+    if bill.due_date:
+        interest, _, _ = compute_weekly_interest(bill.base_rent, bill.due_date, paid_on)
+    bill.interest = interest
+    bill.total_due = (bill.base_rent + bill.water_amount + interest).quantize(Decimal("0.01"))
+
+
+def unfreeze_interest(bill: MonthlyBill) -> None:
+    """Back to principal only; interest accrues on read again."""
+    bill.interest = Decimal("0.00")
+    bill.total_due = (bill.base_rent + bill.water_amount).quantize(Decimal("0.01"))
+
+
+def generate_bills(leases, end_month: date | None = None, today: date | None = None) -> tuple[int, int]:
+    """
+    Set-based billing for one lease or a whole portfolio.
+
+    Computes every MonthlyBill from each lease's move-in month up to end_month
+    (default: current month) in memory, using one prefetch of POSTED water bills
+    and one read of the existing rows, then writes missing rows with bulk_create
+    and stale ones with bulk_update. The query count does not grow with lease age.
+    Only the principal is written; PAID bills are left untouched.
+
+    Returns (created, updated).
+    """
+    if today is None:
+        today = date.today()
+
+    leases = [lease for lease in leases if lease is not None and getattr(lease, "is_active", True)]
+    if not leases:
+        return 0, 0
+
+    end = month_start(end_month or today)
+    start = min(month_start(lease.start_date) for lease in leases)
+    if start > end:
+        return 0, 0
+
+    water_amounts = get_water_amounts_by_month({lease.unit_id for lease in leases}, start, end)
+    existing = {
+        (bill.lease_id, bill.billing_month): bill
+        for bill in MonthlyBill.objects.filter(
+            lease__in=leases,
+            billing_month__gte=start,
+            billing_month__lte=end,
+        )
+    }
+
+    to_create = []
+    to_update = []
+    rollup_changes = []
+    for lease in leases:
+        base_rent = normalized_monthly_rent(lease)
+        for billing_month in months_between(month_start(lease.start_date), end):
+            due_date = due_date_for_month(billing_month.year, billing_month.month, lease.due_day)
+            water_amount = water_amounts.get((lease.unit_id, billing_month), Decimal("0.00"))
+            values = bill_amounts(due_date, base_rent, water_amount)
+
+            bill = existing.get((lease.pk, billing_month))
+            if bill is None:
+                bill = MonthlyBill(lease=lease, billing_month=billing_month, status="UNPAID", **values)
+                to_create.append(bill)
+                rollup_changes.append((None, rollup_state(bill)))
+            elif bill.status == "UNPAID":
+                before = rollup_state(bill)
+                if apply_bill_amounts(bill, values):
+                    to_update.append(bill)
+                    rollup_changes.append((before, rollup_state(bill)))
+
+    with transaction.atomic():
+        MonthlyBill.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        MonthlyBill.objects.bulk_update(to_update, BILL_AMOUNT_FIELDS, batch_size=BULK_BATCH_SIZE)
+        if to_create:
+            # bulk_create skips post_save, so index the new bills here
+            refresh_search_documents(MonthlyBill.objects.filter(lease__in=leases, search_document=""))
+        record_bill_changes(rollup_changes)
+        mark_billed(leases, end)
+        # Backfilled bills can already be past due; that changes the tenant's risk.
+        mark_tenants_dirty(
+            {bill.lease.tenant_id for bill in to_create if bill.due_date and bill.due_date < today},
+            reason="overdue",
+        )
+
+    return len(to_create), len(to_update)
+
+
+def mark_billed(leases, end: date):
+    """Moves the billing freshness watermark forward (never backwards) for the leases."""
+    from rentals.models import Lease
+
+    end_value = Value(end, output_field=DateField())
+    Lease.objects.filter(pk__in=[lease.pk for lease in leases]).update(
+        billed_through=Greatest(Coalesce("billed_through", end_value), end_value),
+    )
+    for lease in leases:
+        lease.billed_through = max(lease.billed_through or end, end)
+
+
+def invalidate_billing(unit_ids=None, lease_ids=None):
+    """Forces the next ensure_billing_fresh() for these leases to regenerate."""
+    from rentals.models import Lease
+
+    filters = Q()
+    if unit_ids:
+        filters |= Q(unit_id__in=unit_ids)
+    if lease_ids:
+        filters |= Q(pk__in=lease_ids)
+    if filters:
+        Lease.objects.filter(filters).update(billed_through=None)
+
+
+def billing_is_fresh(lease, through_month: date) -> bool:
+    # interest is derived on read, so only the billed month range can go stale
+    return lease.billed_through is not None and lease.billed_through >= month_start(through_month)
+
+
+def ensure_billing_fresh(lease, through_month: date | None = None, today: date | None = None) -> bool:
+    """
+    Read-path entry point: regenerates the lease's bills only when its watermark
+    (billed_through) is behind, so repeat page views are read-only.
+    Returns True if bills were regenerated.
+    """
+    if lease is None:
+        return False
+    if not getattr(lease, "is_active", True):
+        return False
+    if today is None:
+        today = date.today()
+
+    through_month = month_start(through_month or today)
+    if billing_is_fresh(lease, through_month):
+        return False
+
+    generate_bills([lease], through_month, today=today)
+    return True
+
+
 def ensure_bills_since_move_in(lease, today: date | None = None):
     if lease is None:
         return
@@ -141,11 +378,7 @@ def ensure_bills_since_move_in(lease, today: date | None = None):
     if today is None:
         today = date.today()
 
-    start = month_start(lease.start_date)
-    end = month_start(today)
-
-    for m in months_between(start, end):
-        get_or_update_monthly_bill(lease, m, today=today)
+    generate_bills([lease], month_start(today), today=today)
 
 
 def ensure_bills_up_to(lease, end_month: date, today: date | None = None):
@@ -159,11 +392,7 @@ def ensure_bills_up_to(lease, end_month: date, today: date | None = None):
     if today is None:
         today = date.today()
 
-    start = month_start(lease.start_date)
-    end = month_start(end_month)
-
-    for m in months_between(start, end):
-        get_or_update_monthly_bill(lease, m, today=today)
+    generate_bills([lease], month_start(end_month), today=today)
 
 
 def badge_for_bill(bill: MonthlyBill, today: date | None = None) -> str:
@@ -205,30 +434,78 @@ def parse_bill_ids(raw_bill_ids: str) -> list[int]:
     return bill_ids
 
 
-def serialize_bill_ids(bill_ids: list[int]) -> str:
-    return ",".join(str(bill_id) for bill_id in bill_ids)
+@transaction.atomic
+def allocate_payment(payment, bill_ids, today: date | None = None) -> list:
+    """
+    Record which bills a manual payment covers. Only the payer's own bills are
+    allocated (unknown or foreign ids are dropped); each allocation carries the
+    bill's amount due at submission time.
+    """
+    from payments.models import PaymentAllocation
+
+    bill_ids = parse_bill_ids(bill_ids) if isinstance(bill_ids, str) else list(dict.fromkeys(bill_ids))
+    if not bill_ids:
+        return []
+
+    bills = accrue_interest(
+        MonthlyBill.objects.filter(pk__in=bill_ids, lease__tenant_id=payment.user_id),
+        today=today,
+    )
+    return PaymentAllocation.objects.bulk_create(
+        [PaymentAllocation(payment=payment, bill=bill, amount=bill.total_due) for bill in bills],
+        ignore_conflicts=True,
+    )
 
 
 @transaction.atomic
 def set_bill_status(bill: MonthlyBill, *, status: str, payment_reference: str = "", paid_at=None) -> MonthlyBill:
     bill = MonthlyBill.objects.select_for_update().get(pk=bill.pk)
+    before = rollup_state(bill)
 
     if status == "PAID":
         bill.status = "PAID"
         bill.paid_at = paid_at or timezone.now()
         bill.payment_reference = payment_reference
+        freeze_interest(bill, bill.paid_at)
     else:
         bill.status = "UNPAID"
         bill.paid_at = None
         bill.payment_reference = ""
+        unfreeze_interest(bill)
 
-    bill.save(update_fields=["status", "paid_at", "payment_reference"])
+    bill.save(update_fields=["status", "paid_at", "payment_reference", "interest", "total_due"])
+    record_bill_changes([(before, rollup_state(bill))])
+    if before[1] != bill.status:
+        mark_tenants_dirty([bill.lease.tenant_id], reason="bill_status")
+    return bill
+
+
+@transaction.atomic
+def save_edited_bill(bill: MonthlyBill) -> MonthlyBill:
+    """
+    Saves a bill edited by hand (admin site, admin portal form) and records its
+    RevenueRollup change in the same transaction. Unpaid bills go back to the
+    principal; a bill newly marked PAID has its interest frozen as of paid_at.
+    """
+    stored = MonthlyBill.objects.select_for_update().filter(pk=bill.pk).first() if bill.pk else None
+    before = rollup_state(stored) if stored else None
+
+    if bill.status == "UNPAID":
+        unfreeze_interest(bill)
+    elif stored is None or stored.status != "PAID":
+        bill.paid_at = bill.paid_at or timezone.now()
+        freeze_interest(bill, bill.paid_at)
+
+    bill.save()
+    record_bill_changes([(before, rollup_state(bill))])
+    if before is None or before[1] != bill.status:
+        mark_tenants_dirty([bill.lease.tenant_id], reason="bill_status")
     return bill
 
 
 @transaction.atomic
 def approve_manual_payment(payment):
-    from payments.models import ManualPayment
+    from payments.models import ManualPayment, PaymentAllocation
 
     payment = ManualPayment.objects.select_for_update().select_related("user").get(pk=payment.pk)
     if payment.status == "APPROVED":
@@ -236,25 +513,30 @@ def approve_manual_payment(payment):
 
     payment.status = "APPROVED"
     payment.save(update_fields=["status"])
+    mark_tenants_dirty([payment.user_id], reason="payment_approved")
 
-    bill_ids = parse_bill_ids(payment.bill_ids)
-    if not bill_ids:
-        return payment
-
-    bills = MonthlyBill.objects.select_for_update().filter(
-        pk__in=bill_ids,
-        lease__tenant=payment.user,
+    allocations = list(
+        payment.allocations.select_for_update(of=("self", "bill")).select_related("bill").filter(bill__lease__tenant=payment.user)
     )
 
     approved_at = timezone.now()
-    for bill in bills:
+    rollup_changes = []
+    for allocation in allocations:
+        bill = allocation.bill
         if bill.status == "PAID" and bill.payment_reference == payment.reference_code:
             continue
+        before = rollup_state(bill)
         bill.status = "PAID"
         bill.paid_at = approved_at
         bill.payment_reference = payment.reference_code
-        bill.save(update_fields=["status", "paid_at", "payment_reference"])
-
+        freeze_interest(bill, approved_at)
+        bill.save(update_fields=["status", "paid_at", "payment_reference", "interest", "total_due"])
+        # the allocation keeps what was paid at submission; interest accrued since is owed on top
+        allocation.shortfall = max(bill.total_due - allocation.amount, Decimal("0.00"))
+        rollup_changes.append((before, rollup_state(bill)))
+
+    PaymentAllocation.objects.bulk_update(allocations, ["shortfall"], batch_size=BULK_BATCH_SIZE)
+    record_bill_changes(rollup_changes)
     return payment
 
 
@@ -266,18 +548,99 @@ def reject_manual_payment(payment):
     if payment.status != "REJECTED":
         payment.status = "REJECTED"
         payment.save(update_fields=["status"])
+        mark_tenants_dirty([payment.user_id], reason="payment_rejected")
     return payment
 
 
-@transaction.atomic
-def remove_bill_references_from_payment_history(bill_id: int):
-    from payments.models import ManualPayment
+def rollup_state(bill: MonthlyBill) -> tuple:
+    """Snapshot of what a bill contributes to RevenueRollup: (billing_month, status, paid_month, total_due)."""
+    paid_month = None
+    if bill.status == "PAID" and bill.paid_at:
+        paid_on = timezone.localdate(bill.paid_at) if timezone.is_aware(bill.paid_at) else bill.paid_at.date()
+        paid_month = month_start(paid_on)
+    return month_start(bill.billing_month), bill.status, paid_month, Decimal(bill.total_due or 0)
 
-    for payment in ManualPayment.objects.select_for_update().exclude(bill_ids=""):
-        current_ids = parse_bill_ids(payment.bill_ids)
-        if bill_id not in current_ids:
-            continue
 
-        remaining_ids = [current_id for current_id in current_ids if current_id != bill_id]
-        payment.bill_ids = serialize_bill_ids(remaining_ids)
-        payment.save(update_fields=["bill_ids"])
+def record_bill_changes(changes):
+    """
+    Applies (before, after) rollup_state pairs to RevenueRollup; use None for a
+    created (before) or deleted (after) bill. Costs one INSERT plus one UPDATE,
+    whatever the number of bills or months touched.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            billing_month, status, paid_month, total = state
+            deltas[billing_month]["billed_total"] += sign * total
+            deltas[billing_month]["billed_count"] += sign
+            if status == "UNPAID":
+                deltas[billing_month]["unpaid_total"] += sign * total
+                deltas[billing_month]["unpaid_count"] += sign
+            if paid_month:
+                deltas[paid_month]["paid_total"] += sign * total
+                deltas[paid_month]["paid_count"] += sign
+
+    deltas = {
+        month: {field: value for field, value in fields.items() if value}
+        for month, fields in deltas.items()
+    }
+    deltas = {month: fields for month, fields in deltas.items() if fields}
+    if not deltas:
+        return
+
+    updates = {}
+    for field in {field for fields in deltas.values() for field in fields}:
+        output_field = RevenueRollup._meta.get_field(field)
+        updates[field] = F(field) + Case(
+            *[
+                When(month=month, then=Value(fields[field], output_field=output_field))
+                for month, fields in deltas.items()
+                if field in fields
+            ],
+            default=Value(0, output_field=output_field),
+        )
+
+    with transaction.atomic():
+        RevenueRollup.objects.bulk_create([RevenueRollup(month=month) for month in deltas], ignore_conflicts=True)
+        RevenueRollup.objects.filter(month__in=list(deltas)).update(**updates)
+
+
+@transaction.atomic
+def rebuild_revenue_rollup() -> int:
+    """Recomputes RevenueRollup from scratch from MonthlyBill. Returns the number of months written."""
+    rows = defaultdict(dict)
+
+    billed = (
+        MonthlyBill.objects.values("billing_month")
+        .annotate(
+            billed_total=Sum("total_due"),
+            billed_count=Count("id"),
+            unpaid_total=Sum("total_due", filter=Q(status="UNPAID")),
+            unpaid_count=Count("id", filter=Q(status="UNPAID")),
+        )
+        .order_by()
+    )
+    for row in billed:
+        month = month_start(row.pop("billing_month"))
+        for field, value in row.items():
+            rows[month][field] = rows[month].get(field, 0) + (value or 0)
+
+    paid = (
+        MonthlyBill.objects.filter(status="PAID", paid_at__isnull=False)
+        .annotate(month=TruncMonth("paid_at"))
+        .values("month")
+        .annotate(paid_total=Sum("total_due"), paid_count=Count("id"))
+        .order_by()
+    )
+    for row in paid:
+        month = row.pop("month").date()
+        rows[month].update({field: value or 0 for field, value in row.items()})
+
+    RevenueRollup.objects.all().delete()
+    RevenueRollup.objects.bulk_create(
+        [RevenueRollup(month=month, **fields) for month, fields in rows.items()],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return len(rows)
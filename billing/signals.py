@@ -1,10 +1,34 @@
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from billing.models import MonthlyBill
-from billing.services import remove_bill_references_from_payment_history
+from billing.services import (
+    invalidate_billing,
+    record_bill_changes,
+    rollup_state,
+)
+from water.models import WaterBill, WaterCharge
 
 
 @receiver(post_delete, sender=MonthlyBill)
-def cleanup_payment_history_after_bill_delete(sender, instance, **kwargs):
-    remove_bill_references_from_payment_history(instance.pk)
+def remove_deleted_bill_from_revenue_rollup(sender, instance, **kwargs):
+    record_bill_changes([(rollup_state(instance), None)])
+
+
+@receiver(post_delete, sender=MonthlyBill)
+def invalidate_billing_after_bill_deleted(sender, instance, **kwargs):
+    # billed_through still covers the deleted month; reset it so the next read regenerates the bill
+    invalidate_billing(lease_ids=[instance.lease_id])
+
+
+@receiver(post_save, sender=WaterBill)
+@receiver(post_delete, sender=WaterBill)
+def invalidate_billing_after_water_bill_change(sender, instance, **kwargs):
+    # water amounts are folded into MonthlyBill totals; let the next read regenerate them
+    invalidate_billing(unit_ids=[instance.unit_id])
+
+
+@receiver(post_save, sender=WaterCharge)
+@receiver(post_delete, sender=WaterCharge)
+def invalidate_billing_after_water_charge_change(sender, instance, **kwargs):
+    invalidate_billing(unit_ids=[instance.bill.unit_id])
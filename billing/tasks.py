@@ -0,0 +1,16 @@
+from datetime import date
+
+from billing.services import generate_bills, month_start
+from jobs.registry import register_task
+from rentals.models import Lease
+
+
+@register_task("billing.generate_lease_bills")
+def generate_lease_bills(job, lease_id: int):
+    """Create/refresh a lease's MonthlyBill rows from move-in through the current month."""
+    lease = Lease.objects.filter(pk=lease_id, is_active=True).first()
+    if lease is None:
+        return {"lease_id": lease_id, "skipped": "lease missing or inactive"}
+
+    created, updated = generate_bills([lease], month_start(date.today()))
+    return {"lease_id": lease_id, "created": created, "updated": updated}
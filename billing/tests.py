@@ -1,16 +1,34 @@
-from datetime import date
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from io import StringIO
 
-from django.test import TestCase
+from django.contrib import admin
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
+from accounts.admin_portal_forms import MonthlyBillForm
 from accounts.models import User
-from billing.models import MonthlyBill
+from billing.admin import MonthlyBillAdmin
+from billing.models import MonthlyBill, RevenueRollup
 from billing.services import (
+    accrue_interest,
+    allocate_payment,
     approve_manual_payment,
+    compute_weekly_interest,
+    compute_weekly_interest_batch,
+    ensure_billing_fresh,
     ensure_bills_since_move_in,
-    parse_bill_ids,
+    generate_bills,
+    get_or_update_monthly_bill,
+    rebuild_revenue_rollup,
+    set_bill_status,
 )
 from payments.models import ManualPayment
+from rentals.datagen import LoadProfile, generate
 from rentals.models import Lease, Unit
 from water.models import WaterBill
 
@@ -72,6 +90,204 @@ class BillingWorkflowTests(TestCase):
         self.assertEqual(bills[0].due_date, date(2026, 1, 31))
         self.assertEqual(bills[1].water_amount, Decimal("50.00"))
 
+    def test_run_billing_cycle_bills_every_active_lease(self):
+        out = StringIO()
+        call_command("run_billing_cycle", "--date=2026-03-10", "--workers=1", "--chunk-size=1", stdout=out)
+
+        # January through next month (--months-ahead defaults to 1) for both leases
+        months = [date(2026, month, 1) for month in (1, 2, 3, 4)]
+        for lease in (self.lease, self.other_lease):
+            self.assertEqual(
+                list(MonthlyBill.objects.filter(lease=lease).order_by("billing_month").values_list("billing_month", flat=True)),
+                months,
+            )
+            lease.refresh_from_db()
+            self.assertEqual(lease.billed_through, date(2026, 4, 1))
+        output = out.getvalue()
+        self.assertIn("Billing 2 active leases through 2026-04 (2 chunks, 1 worker(s))", output)
+        self.assertRegex(output, r"2 leases \([\d.]+ leases/s\), 8 rows written \(8 created, 0 updated, [\d.]+ rows/s\)")
+
+    def test_run_billing_cycle_validates_options(self):
+        for option in ("--workers=0", "--chunk-size=0"):
+            with self.assertRaisesMessage(CommandError, "--workers and --chunk-size must be at least 1."):
+                call_command("run_billing_cycle", option, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "--date must be in YYYY-MM-DD format."):
+            call_command("run_billing_cycle", "--date=10/03/2026", stdout=StringIO())
+
+    def test_generate_bills_query_count_does_not_grow_with_lease_age(self):
+        with CaptureQueriesContext(connection) as short_lease:
+            generate_bills([self.lease], today=date(2026, 3, 3))
+        with CaptureQueriesContext(connection) as long_lease:
+            generate_bills([self.other_lease], today=date(2029, 3, 3))
+
+        self.assertEqual(MonthlyBill.objects.filter(lease=self.other_lease).count(), 39)
+        self.assertEqual(len(long_lease), len(short_lease))
+
+        # second run has nothing to write
+        with CaptureQueriesContext(connection) as rerun:
+            self.assertEqual(generate_bills([self.other_lease], today=date(2029, 3, 3)), (0, 0))
+        self.assertFalse([q for q in rerun.captured_queries if "billing_monthlybill" in q["sql"] and not q["sql"].startswith("SELECT")])
+
+    def test_ensure_billing_fresh_only_regenerates_when_watermark_is_stale(self):
+        self.assertTrue(ensure_billing_fresh(self.lease, date(2026, 4, 1), today=date(2026, 3, 3)))
+        self.lease.refresh_from_db()
+        self.assertEqual(self.lease.billed_through, date(2026, 4, 1))
+
+        # interest is derived on read, so a later day does not need a rewrite
+        with self.assertNumQueries(0):
+            self.assertFalse(ensure_billing_fresh(self.lease, date(2026, 3, 1), today=date(2026, 3, 20)))
+
+        # a newly posted water bill makes it stale again
+        WaterBill.objects.create(
+            unit=self.unit,
+            period_start=date(2026, 3, 1),
+            period_end=date(2026, 3, 31),
+            rate_per_cu_m=Decimal("10.00"),
+            prev_reading=Decimal("1.00"),
+            curr_reading=Decimal("3.00"),
+            status="POSTED",
+        )
+        self.lease.refresh_from_db()
+        self.assertTrue(ensure_billing_fresh(self.lease, date(2026, 3, 1), today=date(2026, 3, 4)))
+        self.assertEqual(MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 3, 1)).water_amount, Decimal("20.00"))
+
+    def test_deleted_bill_is_regenerated_on_next_read(self):
+        ensure_billing_fresh(self.lease, date(2026, 4, 1), today=date(2026, 3, 3))
+        MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 3, 1)).delete()
+
+        self.lease.refresh_from_db()
+        self.assertIsNone(self.lease.billed_through)
+        self.assertTrue(ensure_billing_fresh(self.lease, date(2026, 4, 1), today=date(2026, 3, 3)))
+        self.assertTrue(MonthlyBill.objects.filter(lease=self.lease, billing_month=date(2026, 3, 1)).exists())
+
+    def test_bill_form_ignores_interest_and_total_on_unpaid_bills(self):
+        bill = MonthlyBill.objects.create(
+            lease=self.lease,
+            billing_month=date(2026, 4, 1),
+            due_date=date(2026, 4, 30),
+            base_rent=Decimal("10000.00"),
+            water_amount=Decimal("20.00"),
+            total_due=Decimal("10020.00"),
+        )
+        form = MonthlyBillForm(instance=bill, data={
+            "lease": self.lease.pk,
+            "billing_month": "2026-04-01",
+            "due_date": "2026-04-30",
+            "base_rent": "11000.00",
+            "water_amount": "20.00",
+            "interest": "999.00",
+            "total_due": "1.00",
+            "status": "UNPAID",
+        })
+        self.assertTrue(form.fields["interest"].disabled)
+        self.assertTrue(form.is_valid(), form.errors)
+        bill = form.save()
+        self.assertEqual((bill.interest, bill.total_due), (Decimal("0.00"), Decimal("11020.00")))
+
+    def test_admin_bill_edits_freeze_interest_and_keep_the_rollup(self):
+        def snapshot():
+            return list(RevenueRollup.objects.order_by("month").values(
+                "month", "paid_total", "paid_count", "billed_total", "billed_count", "unpaid_total", "unpaid_count",
+            ))
+
+        generate_bills([self.lease], end_month=date(2026, 2, 1), today=date(2026, 3, 3))
+        january = MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 1, 1))
+        form = MonthlyBillForm(instance=january, data={
+            "lease": self.lease.pk,
+            "billing_month": "2026-01-01",
+            "due_date": "2026-01-31",
+            "base_rent": "10000.00",
+            "water_amount": "0.00",
+            "status": "PAID",
+            "paid_at": "2026-02-10 09:00",
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        january = form.save()
+        self.assertEqual((january.interest, january.total_due), (Decimal("600.00"), Decimal("10600.00")))
+
+        january.status = "UNPAID"
+        MonthlyBillAdmin(MonthlyBill, admin.site).save_model(None, january, None, change=True)
+        january.refresh_from_db()
+        self.assertEqual((january.interest, january.total_due), (Decimal("0.00"), Decimal("10000.00")))
+
+        incremental = snapshot()
+        rebuild_revenue_rollup()
+        self.assertEqual(incremental, snapshot())
+
+    def test_generate_bills_matches_single_bill_path(self):
+        generate_bills([self.lease, self.other_lease], end_month=date(2026, 5, 1), today=date(2026, 4, 20))
+
+        for bill in accrue_interest(MonthlyBill.objects.select_related("lease", "lease__unit"), today=date(2026, 4, 20)):
+            expected = get_or_update_monthly_bill(bill.lease, bill.billing_month, today=date(2026, 4, 20))
+            self.assertEqual(
+                (bill.due_date, bill.base_rent, bill.water_amount, bill.interest, bill.total_due),
+                (expected.due_date, expected.base_rent, expected.water_amount, expected.interest, expected.total_due),
+            )
+
+    def test_weekly_interest_batch_matches_decimal_path(self):
+        today = date(2026, 6, 15)
+        rents = [Decimal("10000.00"), Decimal("8333.33"), Decimal("7777.50"), Decimal("0.17"), Decimal("0.50"), Decimal("1234.5678")]
+        due_dates = [date(2026, 6, 15) - timedelta(days=days) for days in range(-3, 120, 4)]
+        pairs = [(rent, due) for rent in rents for due in due_dates]
+
+        interests, late_flags, weeks = compute_weekly_interest_batch(
+            [rent for rent, _ in pairs],
+            [due for _, due in pairs],
+            today,
+        )
+
+        for (rent, due), result in zip(pairs, zip(interests, late_flags, weeks)):
+            self.assertEqual(result, compute_weekly_interest(rent, due, today))
+            self.assertEqual(str(result[0]), str(compute_weekly_interest(rent, due, today)[0]))
+
+    def test_interest_accrues_on_read_and_is_frozen_at_payment(self):
+        ensure_bills_since_move_in(self.lease, today=date(2026, 3, 3))
+        january = MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 1, 1))
+
+        # stored row holds only the principal
+        self.assertEqual((january.interest, january.total_due), (Decimal("0.00"), Decimal("10000.00")))
+
+        accrue_interest([january], today=date(2026, 2, 10))
+        self.assertEqual((january.interest, january.total_due), (Decimal("600.00"), Decimal("10600.00")))
+        self.assertEqual((january._is_late, january._weeks_late), (True, 2))
+        january.refresh_from_db()
+        self.assertEqual(january.interest, Decimal("0.00"))
+
+        set_bill_status(january, status="PAID", paid_at=timezone.make_aware(datetime(2026, 2, 10, 9, 0)))
+        january.refresh_from_db()
+        self.assertEqual((january.interest, january.total_due), (Decimal("600.00"), Decimal("10600.00")))
+
+        # later reads and regenerations leave the paid amount alone
+        ensure_bills_since_move_in(self.lease, today=date(2026, 6, 1))
+        accrue_interest([january], today=date(2026, 6, 1))
+        january.refresh_from_db()
+        self.assertEqual(january.total_due, Decimal("10600.00"))
+
+        set_bill_status(january, status="UNPAID")
+        january.refresh_from_db()
+        self.assertEqual((january.interest, january.total_due), (Decimal("0.00"), Decimal("10000.00")))
+
+    def test_revenue_rollup_tracks_bill_changes_incrementally(self):
+        def snapshot():
+            return list(RevenueRollup.objects.order_by("month").values(
+                "month", "paid_total", "paid_count", "billed_total", "billed_count", "unpaid_total", "unpaid_count",
+            ))
+
+        generate_bills([self.lease, self.other_lease], today=date(2026, 3, 3))
+        march = MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 3, 1))
+        set_bill_status(march, status="PAID", paid_at=timezone.make_aware(datetime(2026, 3, 10)))
+        payment = ManualPayment.objects.create(user=self.other_tenant, reference_code="REF-ROLLUP")
+        allocate_payment(payment, MonthlyBill.objects.filter(lease=self.other_lease).values_list("pk", flat=True))
+        approve_manual_payment(payment)
+        set_bill_status(march, status="UNPAID")
+        MonthlyBill.objects.get(lease=self.lease, billing_month=date(2026, 1, 1)).delete()
+
+        incremental = snapshot()
+        rebuild_revenue_rollup()
+        self.assertEqual(incremental, snapshot())
+
+        self.assertEqual(RevenueRollup.objects.get(month=date(2026, 2, 1)).unpaid_total, Decimal("10000.00"))
+
     def test_approve_manual_payment_is_idempotent_and_scoped_to_payment_owner(self):
         tenant_bill = MonthlyBill.objects.create(
             lease=self.lease,
@@ -91,13 +307,12 @@ class BillingWorkflowTests(TestCase):
             interest=Decimal("0.00"),
             total_due=Decimal("8000.00"),
         )
-        payment = ManualPayment.objects.create(
-            user=self.tenant,
-            reference_code="REF-123",
-            bill_ids=f"{tenant_bill.id},{tenant_bill.id},{other_bill.id},invalid",
-        )
+        payment = ManualPayment.objects.create(user=self.tenant, reference_code="REF-123")
+        allocate_payment(payment, f"{tenant_bill.id},{tenant_bill.id},{other_bill.id},invalid", today=date(2026, 2, 20))
 
         approve_manual_payment(payment)
+        tenant_bill.refresh_from_db()
+        paid_at = tenant_bill.paid_at
         approve_manual_payment(payment)
 
         tenant_bill.refresh_from_db()
@@ -107,9 +322,18 @@ class BillingWorkflowTests(TestCase):
         self.assertEqual(payment.status, "APPROVED")
         self.assertEqual(tenant_bill.status, "PAID")
         self.assertEqual(tenant_bill.payment_reference, "REF-123")
-        self.assertIsNotNone(tenant_bill.paid_at)
+        self.assertIsNotNone(paid_at)
+        self.assertEqual(tenant_bill.paid_at, paid_at)  # the second approval changed nothing
         self.assertEqual(other_bill.status, "UNPAID")
-        self.assertEqual(parse_bill_ids(payment.bill_ids), [tenant_bill.id, other_bill.id])
+        self.assertFalse(other_bill.manual_payments.exists())
+        # only the payer's own bill is allocated, once, at the amount due on submission;
+        # interest that accrued before approval is frozen into the bill as a shortfall
+        self.assertEqual(
+            list(payment.allocations.values_list("bill_id", "amount", "shortfall")),
+            [(tenant_bill.id, Decimal("10000.00"), tenant_bill.total_due - Decimal("10000.00"))],
+        )
+        self.assertGreater(tenant_bill.interest, 0)
+        self.assertEqual(list(tenant_bill.manual_payments.all()), [payment])
 
     def test_deleting_bill_removes_payment_history_reference(self):
         bill = MonthlyBill.objects.create(
@@ -121,14 +345,45 @@ class BillingWorkflowTests(TestCase):
             interest=Decimal("0.00"),
             total_due=Decimal("10000.00"),
         )
+        kept_bill = MonthlyBill.objects.create(
+            lease=self.lease,
+            billing_month=date(2026, 5, 1),
+            due_date=date(2026, 5, 31),
+            base_rent=Decimal("10000.00"),
+            total_due=Decimal("10000.00"),
+        )
         payment = ManualPayment.objects.create(
             user=self.tenant,
             reference_code="REF-DELETE",
-            bill_ids=f"{bill.id},9999",
             status="APPROVED",
         )
+        allocate_payment(payment, [bill.id, kept_bill.id, 9999])
 
         bill.delete()
-        payment.refresh_from_db()
 
-        self.assertEqual(payment.bill_ids, "9999")
+        self.assertEqual(list(payment.allocations.values_list("bill_id", flat=True)), [kept_bill.id])
+
+
+class BenchmarkBillIndexesCommandTests(TestCase):
+    def setUp(self):
+        generate(LoadProfile(buildings=1, units_per_building=4, years=1, seed=3))
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command("benchmark_bill_indexes", "--repeat=1", *args, stdout=out)
+        return out.getvalue()
+
+    @override_settings(DEBUG=True)
+    def test_reports_every_probe_with_and_without_indexes(self):
+        output = self._run("--no-plans")
+        self.assertIn("Without hot-path indexes", output)
+        self.assertIn("revenue_paid_this_month", output.split("Summary")[1])
+        # the dropped indexes came back with the rollback
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, MonthlyBill._meta.db_table)
+        self.assertIn("bill_status_paid_at_idx", indexes)
+
+    def test_refuses_the_locking_no_index_run_without_debug(self):
+        with self.assertRaisesMessage(CommandError, "--skip-baseline"):
+            self._run()
+        self.assertIn("lease_unpaid_bills", self._run("--skip-baseline"))
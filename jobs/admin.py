@@ -0,0 +1,22 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "attempts",
+        "progress_done",
+        "progress_total",
+        "created_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    ordering = ("-created_at",)
+    list_select_related = ("created_by",)
+    readonly_fields = ("created_at", "updated_at", "finished_at", "locked_at", "locked_by")
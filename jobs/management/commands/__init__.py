@@ -0,0 +1 @@
+"""Commands package for jobs management commands."""
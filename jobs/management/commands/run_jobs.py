@@ -0,0 +1,65 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.registry import registered_tasks
+from jobs.services import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Background job worker: claims queued jobs from the database and runs them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for jobs instead of exiting once the queue is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when idle in --loop mode (default 2).",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Exit after running this many jobs (0 = no limit).",
+        )
+
+    def handle(self, *args, **options):
+        if options["interval"] < 0 or options["max_jobs"] < 0:
+            raise CommandError("--interval and --max-jobs must not be negative.")
+
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker_id} ready; tasks: {', '.join(registered_tasks()) or '(none)'}")
+
+        ran = 0
+        try:
+            while not options["max_jobs"] or ran < options["max_jobs"]:
+                recovered = requeue_stale_jobs()
+                if recovered:
+                    self.stdout.write(self.style.WARNING(f"Recovered {recovered} stale job(s)."))
+
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+
+                started = time.perf_counter()
+                job = run_job(job)
+                ran += 1
+                style = self.style.SUCCESS if job.status == job.SUCCEEDED else self.style.WARNING
+                self.stdout.write(style(
+                    f"Job #{job.pk} {job.name}: {job.status} "
+                    f"(attempt {job.attempts}/{job.max_attempts}, {time.perf_counter() - started:.2f}s)"
+                ))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"Ran {ran} job(s).")
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work, stored in the database and picked up by the
+    run_jobs worker. `name` selects a task registered in some app's tasks.py;
+    `payload` holds its keyword arguments.
+    """
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Earliest time the job may (re)start")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    progress_message = models.CharField(max_length=200, blank=True, default="")
+
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="jobs_job_status_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def claimed_row(self):
+        """This job's row, only while this run still holds it (not requeued as stale and claimed again)."""
+        return Job.objects.filter(pk=self.pk, status=self.RUNNING, locked_by=self.locked_by, attempts=self.attempts)
+
+    def set_progress(self, done, total=None, message=""):
+        """
+        Report progress from inside a running task (written straight to the row).
+        Also a heartbeat: it refreshes locked_at, so a long task that reports
+        progress is not mistaken for a dead worker's by requeue_stale_jobs.
+        """
+        now = timezone.now()
+        self.progress_done = done
+        if total is not None:
+            self.progress_total = total
+        self.progress_message = message[:200]
+        if self.claimed_row().update(
+            progress_done=self.progress_done,
+            progress_total=self.progress_total,
+            progress_message=self.progress_message,
+            locked_at=now,
+            updated_at=now,
+        ):
+            self.locked_at = now
+
+    def as_status_dict(self):
+        percent = None
+        if self.progress_total:
+            percent = round(100 * self.progress_done / self.progress_total, 1)
+        elif self.status == self.SUCCEEDED:
+            percent = 100.0
+        return {
+            "id": self.pk,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "progress": {
+                "done": self.progress_done,
+                "total": self.progress_total,
+                "percent": percent,
+                "message": self.progress_message,
+            },
+            "result": self.result,
+            "error": self.last_error.strip().splitlines()[-1] if self.last_error.strip() else "",
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
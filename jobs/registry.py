@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from typing import Callable
+
+_TASKS: dict[str, "Task"] = {}
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable
+    max_attempts: int = 3
+
+
+def register_task(name: str, *, max_attempts: int = 3):
+    """
+    Register `func(job, **payload)` as a background task under `name`.
+    Apps declare their tasks in a `tasks` module, which JobsConfig.ready()
+    imports at startup.
+    """
+    def decorator(func):
+        if name in _TASKS and _TASKS[name].func is not func:
+            raise ValueError(f"Task {name!r} is already registered.")
+        _TASKS[name] = Task(name=name, func=func, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name: str) -> Task:
+    try:
+        return _TASKS[name]
+    except KeyError:
+        raise KeyError(f"No task registered under {name!r}.") from None
+
+
+def registered_tasks() -> list[str]:
+    return sorted(_TASKS)
@@ -0,0 +1,132 @@
+from datetime import timedelta
+import logging
+import traceback
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# failed attempts are retried after RETRY_BASE_DELAY * 2**(attempt - 1), capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# a RUNNING job with no heartbeat (claim or Job.set_progress) for this long is assumed
+# to belong to a dead worker; long tasks should report progress well within it
+JOB_LOCK_TIMEOUT = timedelta(minutes=30)
+
+
+def enqueue_job(name: str, *, created_by=None, run_after=None, **payload) -> Job:
+    """Queue a registered task; payload must be JSON-serialisable keyword arguments."""
+    task = get_task(name)
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=task.max_attempts,
+        run_after=run_after or timezone.now(),
+        created_by=created_by if getattr(created_by, "is_authenticated", False) else None,
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0)), RETRY_MAX_DELAY)
+
+
+def claim_next_job(worker_id: str = "") -> Job | None:
+    """
+    Atomically move the oldest due QUEUED job to RUNNING. SKIP LOCKED lets
+    several workers poll the same table without handing out a job twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by("run_after", "pk")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = now
+        job.locked_by = worker_id[:100]
+        job.save(update_fields=["status", "attempts", "locked_at", "locked_by", "updated_at"])
+    return job
+
+
+def run_job(job: Job) -> Job:
+    """Execute a claimed job and record success, a scheduled retry, or final failure."""
+    try:
+        task = get_task(job.name)
+    except KeyError as e:
+        return _finish(job, Job.FAILED, error=str(e))
+
+    try:
+        result = task.func(job, **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            logger.warning("Job %s (%s) failed on attempt %s; retrying in %s", job.pk, job.name, job.attempts, delay)
+            return _save_if_claimed(
+                job,
+                status=Job.QUEUED,
+                run_after=timezone.now() + delay,
+                last_error=error,
+                locked_at=None,
+                locked_by="",
+            )
+        logger.error("Job %s (%s) failed permanently after %s attempts", job.pk, job.name, job.attempts)
+        return _finish(job, Job.FAILED, error=error)
+
+    return _finish(job, Job.SUCCEEDED, result=result)
+
+
+def _save_if_claimed(job: Job, **fields) -> Job:
+    """
+    Write this run's outcome, but only if the job is still claimed by it. A
+    run that was requeued as stale (and possibly claimed by another worker)
+    must not overwrite the newer claim, so its outcome is dropped.
+    """
+    now = timezone.now()
+    if job.claimed_row().update(updated_at=now, **fields):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = now
+    else:
+        logger.warning("Job %s (%s) lost its claim while running; discarding this run's outcome", job.pk, job.name)
+        job.refresh_from_db()
+    return job
+
+
+def _finish(job: Job, status: str, *, result=None, error: str = "") -> Job:
+    fields = {
+        "status": status,
+        "result": result,
+        "last_error": error,
+        "finished_at": timezone.now(),
+        "locked_at": None,
+    }
+    if status == Job.SUCCEEDED and job.progress_total:
+        fields["progress_done"] = job.progress_total
+    return _save_if_claimed(job, **fields)
+
+
+def requeue_stale_jobs(timeout: timedelta = JOB_LOCK_TIMEOUT) -> int:
+    """Return RUNNING jobs whose worker died to the queue (or fail them if out of attempts)."""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timeout)
+    error = f"Worker stopped responding (no result after {timeout})."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, last_error=error, finished_at=now, locked_at=None, updated_at=now,
+    )
+    requeued = stale.update(
+        status=Job.QUEUED, last_error=error, run_after=now, locked_at=None, locked_by="", updated_at=now,
+    )
+    return failed + requeued
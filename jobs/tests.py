@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from billing.models import MonthlyBill, RevenueRollup
+from billing.services import rebuild_revenue_rollup
+from jobs.models import Job
+from jobs.registry import register_task
+from jobs.services import claim_next_job, enqueue_job, requeue_stale_jobs, retry_delay, run_job
+from rentals.models import Lease, Unit
+
+FLAKY_CALLS = []
+
+
+def rollup_snapshot():
+    return list(RevenueRollup.objects.order_by("month").values(
+        "month", "paid_total", "paid_count", "billed_total", "billed_count", "unpaid_total", "unpaid_count",
+    ))
+
+
+@register_task("tests.flaky", max_attempts=2)
+def flaky(job, fail_times=0):
+    FLAKY_CALLS.append(job.attempts)
+    if len(FLAKY_CALLS) <= fail_times:
+        raise RuntimeError("boom")
+    job.set_progress(3, 3, "done")
+    return {"calls": len(FLAKY_CALLS)}
+
+
+class JobRunnerTests(TestCase):
+    def setUp(self):
+        FLAKY_CALLS.clear()
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="password123",
+            role=User.Role.ADMIN,
+        )
+
+    def test_failed_job_is_retried_with_backoff_then_succeeds(self):
+        job = enqueue_job("tests.flaky", fail_times=1)
+
+        job = run_job(claim_next_job("worker-1"))
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + retry_delay(1) - timedelta(seconds=5))
+        self.assertIsNone(claim_next_job("worker-1"))  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = run_job(claim_next_job("worker-1"))
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {"calls": 2})
+        self.assertEqual(FLAKY_CALLS, [1, 2])
+
+    def test_job_fails_after_max_attempts_and_stale_jobs_are_recovered(self):
+        job = enqueue_job("tests.flaky", fail_times=5)
+        run_job(claim_next_job())
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = run_job(claim_next_job())
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+        stale = enqueue_job("tests.flaky")
+        claim_next_job("dead-worker")
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.QUEUED)
+
+    def test_lease_bill_job_and_status_endpoint(self):
+        tenant = User.objects.create_user(
+            email="tenant@example.com",
+            username="tenant",
+            password="password123",
+            role=User.Role.TENANT,
+        )
+        lease = Lease.objects.create(
+            tenant=tenant,
+            unit=Unit.objects.create(number="J-1"),
+            monthly_rent=Decimal("5000.00"),
+            due_day=5,
+            start_date=date.today().replace(day=1) - timedelta(days=40),
+            is_active=True,
+        )
+        job = enqueue_job("billing.generate_lease_bills", lease_id=lease.pk, created_by=self.admin)
+        self.assertFalse(MonthlyBill.objects.filter(lease=lease).exists())
+
+        run_job(claim_next_job())
+        self.assertTrue(MonthlyBill.objects.filter(lease=lease).exists())
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin_job_status", args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["status"], Job.SUCCEEDED)
+        self.assertEqual(payload["result"]["created"], MonthlyBill.objects.filter(lease=lease).count())
+
+    def test_long_running_job_reporting_progress_is_not_requeued(self):
+        job = enqueue_job("tests.flaky")
+        job = claim_next_job("worker-1")
+        # the task has been running for hours, but it keeps reporting progress
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        job.set_progress(1, 10, "still working")
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+    def test_requeued_run_cannot_overwrite_the_new_claim(self):
+        enqueue_job("tests.flaky")
+        first = claim_next_job("worker-1")
+        Job.objects.filter(pk=first.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        second = claim_next_job("worker-2")
+
+        with self.assertLogs("jobs.services", "WARNING"):
+            first = run_job(first)  # the slow first worker finally finishes
+        row = Job.objects.get(pk=second.pk)
+        self.assertEqual((row.status, row.locked_by, row.attempts), (Job.RUNNING, "worker-2", 2))
+        self.assertEqual(first.status, Job.RUNNING)
+
+        second = run_job(second)
+        self.assertEqual(second.status, Job.SUCCEEDED)
+
+    def test_data_fix_command_runs_as_a_job_with_progress(self):
+        tenant = User.objects.create_user(email="fix@example.com", username="fix", password="password123")
+        Lease.objects.create(
+            tenant=tenant,
+            unit=Unit.objects.create(number="J-2"),
+            monthly_rent=Decimal("5000.00"),
+            due_day=5,
+            start_date=date.today().replace(day=1) - timedelta(days=400),
+            is_active=True,
+        )
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse("admin_run_data_fix", args=["fix_chart_data"]))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status_url"], reverse("admin_job_status", args=[response.json()["job_id"]]))
+        self.assertEqual(self.client.post(reverse("admin_run_data_fix", args=["flush"])).status_code, 404)
+
+        job = run_job(claim_next_job("worker-1"))
+        self.assertEqual(job.pk, response.json()["job_id"])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.progress_done, job.progress_total), (12, 12))
+        self.assertEqual(MonthlyBill.objects.count(), 12)
+        self.assertEqual(len(job.result["output"]), 5)  # the tail of the command's output
+
+        # the rewritten bills carry frozen interest and the dashboard rollup matches them
+        paid = MonthlyBill.objects.filter(status="PAID").first()
+        self.assertEqual(paid.total_due, paid.base_rent + paid.interest)
+        for command in ("fix_billing_status", "fix_payment_dates"):
+            enqueue_job(f"rentals.{command}", created_by=self.admin)
+            self.assertEqual(run_job(claim_next_job("worker-1")).status, Job.SUCCEEDED)
+        incremental = rollup_snapshot()
+        rebuild_revenue_rollup()
+        self.assertEqual(incremental, rollup_snapshot())
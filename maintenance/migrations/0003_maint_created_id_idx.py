@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0002_maintenancerequest_fixed_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['created_at', 'id'], name='maint_created_id_idx'),
+        ),
+    ]
@@ -41,6 +41,14 @@ class MaintenanceRequest(models.Model):
     # Admin-entered info
     fixed_by = models.CharField(max_length=120, blank=True, default="")
     resolved_at = models.DateTimeField(null=True, blank=True)
+    # lower-cased searchable text, maintained by accounts.search (trigram-indexed on PostgreSQL)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # admin maintenance list: keyset pages on (created_at, id), newest first
+            models.Index(fields=["created_at", "id"], name="maint_created_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
@@ -1,12 +1,21 @@
 from django.contrib import admin
-from .models import ManualPayment
+from .models import ManualPayment, PaymentAllocation
 from billing.services import approve_manual_payment
 
+
+class PaymentAllocationInline(admin.TabularInline):
+    model = PaymentAllocation
+    extra = 0
+    fields = ("bill", "amount")
+    raw_id_fields = ("bill",)
+
+
 @admin.register(ManualPayment)
 class ManualPaymentAdmin(admin.ModelAdmin):
     list_display = ("user", "reference_code", "status", "created_at")
     list_filter = ("status", "created_at")
-    search_fields = ("user__email", "reference_code", "bill_ids")
+    search_fields = ("user__email", "reference_code")
+    inlines = [PaymentAllocationInline]
     ordering = ("-created_at",)
     list_select_related = ("user",)
 
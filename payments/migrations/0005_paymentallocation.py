@@ -0,0 +1,78 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_bill_ids_to_allocations(apps, schema_editor):
+    ManualPayment = apps.get_model("payments", "ManualPayment")
+    MonthlyBill = apps.get_model("billing", "MonthlyBill")
+    PaymentAllocation = apps.get_model("payments", "PaymentAllocation")
+
+    payment_bill_ids = {}
+    for payment_id, raw in ManualPayment.objects.exclude(bill_ids="").values_list("pk", "bill_ids").iterator():
+        bill_ids = []
+        for token in raw.split(","):
+            token = token.strip()
+            if token.isdigit() and int(token) not in bill_ids:
+                bill_ids.append(int(token))
+        if bill_ids:
+            payment_bill_ids[payment_id] = bill_ids
+
+    wanted = {bill_id for bill_ids in payment_bill_ids.values() for bill_id in bill_ids}
+    totals = dict(MonthlyBill.objects.filter(pk__in=wanted).values_list("pk", "total_due"))
+
+    PaymentAllocation.objects.bulk_create(
+        [
+            PaymentAllocation(payment_id=payment_id, bill_id=bill_id, amount=totals[bill_id])
+            for payment_id, bill_ids in payment_bill_ids.items()
+            for bill_id in bill_ids
+            if bill_id in totals  # references to deleted bills are dropped
+        ],
+        batch_size=500,
+    )
+
+
+def copy_allocations_to_bill_ids(apps, schema_editor):
+    ManualPayment = apps.get_model("payments", "ManualPayment")
+    PaymentAllocation = apps.get_model("payments", "PaymentAllocation")
+
+    bill_ids = {}
+    for payment_id, bill_id in PaymentAllocation.objects.order_by("pk").values_list("payment_id", "bill_id"):
+        bill_ids.setdefault(payment_id, []).append(str(bill_id))
+
+    for payment_id, ids in bill_ids.items():
+        ManualPayment.objects.filter(pk=payment_id).update(bill_ids=",".join(ids)[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0009_revenuerollup'),
+        ('payments', '0004_remove_manualpayment_payments_ma_status_cb5faa_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAllocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='billing.monthlybill')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='payments.manualpayment')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('payment', 'bill'), name='payments_allocation_unique_bill')],
+            },
+        ),
+        migrations.AddField(
+            model_name='manualpayment',
+            name='bills',
+            field=models.ManyToManyField(related_name='manual_payments', through='payments.PaymentAllocation', to='billing.monthlybill'),
+        ),
+        migrations.RunPython(copy_bill_ids_to_allocations, copy_allocations_to_bill_ids),
+        migrations.RemoveField(
+            model_name='manualpayment',
+            name='bill_ids',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_paymentallocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='manualpayment',
+            index=models.Index(fields=['created_at', 'id'], name='payment_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_manualpayment_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentallocation',
+            name='shortfall',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -10,13 +10,41 @@ class ManualPayment(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     reference_code = models.CharField(max_length=80)
-    
-    # ADDED: This reconnects your Python code to the database column!
-    # We use a CharField because we are passing a comma-separated string like "27,28"
-    bill_ids = models.CharField(max_length=255, default="") 
+
+    # Bills covered by this payment live in PaymentAllocation (payment.allocations).
+    bills = models.ManyToManyField("billing.MonthlyBill", through="PaymentAllocation", related_name="manual_payments")
     
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
     created_at = models.DateTimeField(auto_now_add=True)
+    # lower-cased searchable text, maintained by accounts.search (trigram-indexed on PostgreSQL)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # admin payments list: keyset pages on (created_at, id), newest first
+            models.Index(fields=["created_at", "id"], name="payment_created_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.reference_code} ({self.status})"
+
+
+class PaymentAllocation(models.Model):
+    """
+    One bill covered by a manual payment. `amount` is what the tenant paid
+    towards it: the bill's amount due when the payment was submitted. Late
+    interest that accrued while the payment waited for approval is frozen
+    into the bill but recorded in `shortfall`, not added to `amount`.
+    """
+    payment = models.ForeignKey(ManualPayment, on_delete=models.CASCADE, related_name="allocations")
+    bill = models.ForeignKey("billing.MonthlyBill", on_delete=models.CASCADE, related_name="allocations")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    shortfall = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["payment", "bill"], name="payments_allocation_unique_bill"),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} - {self.reference_code} ({self.status})"
\ No newline at end of file
+        return f"{self.payment.reference_code} -> bill {self.bill_id} ({self.amount})"
@@ -5,7 +5,8 @@ from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 
 from .models import ManualPayment
-from rentals.models import Notification
+from billing.services import allocate_payment
+from rentals.notification_emitter import NotificationEmitter
 
 @login_required
 @require_http_methods(["GET", "POST"])
@@ -26,24 +27,21 @@ def manual_gcash_payment(request):
                 "bill_ids": bill_ids,
             })
 
-        # 3. FIX: Save the transaction WITH the required bill_ids
-        payment = ManualPayment.objects.create(
-            user=request.user,
-            reference_code=reference_code,
-            bill_ids=bill_ids,  # This stops the NOT NULL IntegrityError
-        )
-        
-        # Create real-time notification for admin about new payment
-        try:
-            notification = Notification.create_notification(
-                title=f" New Payment Received",
-                message=f" {request.user.email} submitted a payment of {amount_to_pay} with reference code {reference_code}. Please review and approve this payment.",
+        # 3. Save the transaction and allocate it to the tenant's selected bills
+        #    (the admin notification is written when the payment commits; a failure
+        #    there is logged and does not block the submission)
+        with NotificationEmitter() as notifications:
+            payment = ManualPayment.objects.create(
+                user=request.user,
+                reference_code=reference_code,
+            )
+            allocate_payment(payment, bill_ids)
+            notifications.emit(
+                title="New Payment Received",
+                message=f"{request.user.email} submitted a payment of {amount_to_pay} with reference code {reference_code}. Please review and approve this payment.",
                 notification_type='PAYMENT',
                 related_tenant=request.user
             )
-        except Exception as e:
-            # Don't block payment submission if notification fails
-            logger.exception(f"Failed to create payment notification: {e}")
         
         messages.success(request, "Payment submitted! Please wait for admin verification.")
         return redirect("tenant_dashboard")
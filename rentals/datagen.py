@@ -0,0 +1,286 @@
+"""
+Synthetic portfolio generator for load testing.
+
+Builds buildings -> units -> tenants -> leases -> monthly bills (plus the manual
+payments that paid them) entirely with bulk_create in fixed-size batches, so
+memory stays flat and a million-bill dataset builds in minutes. Output is
+deterministic for a given LoadProfile (including the seed).
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.search import refresh_search_documents
+from billing.models import MonthlyBill
+from billing.services import (
+    add_months,
+    compute_weekly_interest,
+    due_date_for_month,
+    month_start,
+    months_between,
+    rebuild_revenue_rollup,
+)
+from payments.models import ManualPayment, PaymentAllocation
+from rentals.models import Lease, TenantProfile, Unit
+
+# every generated tenant gets an address on this domain; --clear deletes by it
+LOAD_EMAIL_DOMAIN = "loadtest.local"
+LOAD_PASSWORD = "password123"
+
+# unit type -> (weight, rent range, size range in sqm)
+UNIT_MIX = {
+    "STUDIO": (35, (6500, 9000), (20, 28)),
+    "1BR": (35, (10000, 14000), (30, 42)),
+    "2BR": (20, (16000, 20000), (50, 70)),
+    "3BR": (8, (21000, 26000), (75, 95)),
+    "PENTHOUSE": (2, (45000, 60000), (120, 180)),
+}
+
+# behaviour -> (probability a past bill is paid, range of days paid relative to due date)
+BEHAVIOURS = {
+    "on_time": (1.0, (-7, 0)),
+    "late": (0.95, (1, 21)),
+    "delinquent": (0.55, (7, 60)),
+}
+
+
+@dataclass
+class LoadProfile:
+    buildings: int = 5
+    units_per_building: int = 200
+    tenants: int | None = None  # default: occupancy * units
+    occupancy: float = 0.9
+    years: int = 2
+    behaviour_mix: dict = field(default_factory=lambda: {"on_time": 0.7, "late": 0.2, "delinquent": 0.1})
+    with_payments: bool = True
+    seed: int = 42
+    batch_size: int = 5000
+
+    @property
+    def unit_count(self):
+        return self.buildings * self.units_per_building
+
+    @property
+    def tenant_count(self):
+        if self.tenants is not None:
+            return min(self.tenants, self.unit_count)
+        return int(self.unit_count * self.occupancy)
+
+
+def unit_number(building: int, index: int) -> str:
+    # fits Unit.number (max 10 chars) for up to 999 buildings of 99999 units
+    return f"L{building:03d}-{index:05d}"
+
+
+def clear_load_data() -> int:
+    """
+    Delete everything a previous run generated. Bills, allocations and payments
+    are removed with plain DELETEs (no per-row signals) and the revenue rollup
+    is rebuilt once at the end. Returns the number of tenants removed.
+    """
+    tenants = User.objects.filter(email__endswith=f"@{LOAD_EMAIL_DOMAIN}")
+    with transaction.atomic():
+        # no signals or cascades: .delete() is a single fast DELETE
+        PaymentAllocation.objects.filter(payment__user__in=tenants).delete()
+        # Payments and bills cannot be fast-deleted (allocations still point at them,
+        # and bills have post_delete receivers), so .delete() would load millions of
+        # rows into the collector. Their allocations are gone, nothing else references
+        # them, and the rollup is rebuilt below, so the private _raw_delete is safe.
+        ManualPayment.objects.filter(user__in=tenants)._raw_delete(ManualPayment.objects.db)
+        MonthlyBill.objects.filter(lease__tenant__in=tenants)._raw_delete(MonthlyBill.objects.db)
+        deleted, _ = tenants.delete()
+        Unit.objects.filter(number__regex=r"^L\d{3}-\d{5}$", lease__isnull=True).delete()
+        rebuild_revenue_rollup()
+    return deleted
+
+
+def generate(profile: LoadProfile, today: date | None = None, progress=None) -> dict:
+    """
+    Generate a portfolio for `profile` and return row counts per model.
+    `progress(stage, done, total)` is called after every batch when given.
+    """
+    today = today or timezone.localdate()
+    rng = random.Random(profile.seed)
+    report = progress or (lambda stage, done, total: None)
+    counts = {}
+
+    units = _create_units(profile, rng, report)
+    counts["units"] = len(units)
+
+    tenants = _create_tenants(profile, report)
+    counts["tenants"] = len(tenants)
+
+    leases = _create_leases(profile, rng, units, tenants, today, report)
+    counts["leases"] = len(leases)
+
+    bills, payments = _create_bills(profile, rng, leases, today, report)
+    counts["bills"] = bills
+    counts["payments"] = payments
+
+    _index_for_search(report)
+    rebuild_revenue_rollup()
+    return counts
+
+
+def _index_for_search(report):
+    # everything above was bulk-created, so no post_save filled search_document
+    generated = {"email__endswith": f"@{LOAD_EMAIL_DOMAIN}"}
+    for stage, queryset in (
+        ("search:profiles", TenantProfile.objects.filter(user__in=User.objects.filter(**generated))),
+        ("search:bills", MonthlyBill.objects.filter(lease__tenant__in=User.objects.filter(**generated))),
+        ("search:payments", ManualPayment.objects.filter(user__in=User.objects.filter(**generated))),
+    ):
+        indexed = refresh_search_documents(queryset)
+        report(stage, indexed, indexed)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_create(model, rows, profile, stage, report):
+    created = []
+    for batch in _batches(rows, profile.batch_size):
+        with transaction.atomic():
+            created.extend(model.objects.bulk_create(batch))
+        report(stage, len(created), len(rows))
+    return created
+
+
+def _create_units(profile, rng, report):
+    types = list(UNIT_MIX)
+    weights = [UNIT_MIX[unit_type][0] for unit_type in types]
+    occupied = profile.tenant_count
+
+    units = []
+    for building in range(1, profile.buildings + 1):
+        for index in range(1, profile.units_per_building + 1):
+            unit_type = rng.choices(types, weights)[0]
+            _, (rent_low, rent_high), (size_low, size_high) = UNIT_MIX[unit_type]
+            units.append(Unit(
+                number=unit_number(building, index),
+                unit_type=unit_type,
+                floor_level=1 + (index - 1) // 20,
+                size_sqm=Decimal(rng.randint(size_low, size_high)),
+                monthly_rent=Decimal(rng.randrange(rent_low, rent_high + 1, 100)),
+                status="OCCUPIED" if len(units) < occupied else "AVAILABLE",
+            ))
+    return _bulk_create(Unit, units, profile, "units", report)
+
+
+def _create_tenants(profile, report):
+    password = make_password(LOAD_PASSWORD)  # hash once; every tenant shares it
+    users = [
+        User(
+            email=f"tenant{n:07d}@{LOAD_EMAIL_DOMAIN}",
+            username=f"load_tenant{n:07d}",
+            role=User.Role.TENANT,
+            password=password,
+        )
+        for n in range(1, profile.tenant_count + 1)
+    ]
+    users = _bulk_create(User, users, profile, "tenants", report)
+    profiles = [TenantProfile(user=user, full_name=f"Load Tenant {n:07d}") for n, user in enumerate(users, 1)]
+    _bulk_create(TenantProfile, profiles, profile, "profiles", report)
+    return users
+
+
+def _create_leases(profile, rng, units, tenants, today, report):
+    first_month = add_months(month_start(today), -12 * profile.years + 1)
+    history_months = max(12 * profile.years - 1, 0)
+    billed_through = month_start(today)
+
+    leases = [
+        Lease(
+            tenant=tenant,
+            unit=unit,
+            monthly_rent=unit.monthly_rent,
+            due_day=rng.randint(1, 28),
+            start_date=add_months(first_month, rng.randint(0, history_months)).replace(day=rng.randint(1, 28)),
+            is_active=True,
+            billed_through=billed_through,  # bills are generated below; tenant pages won't regenerate them
+        )
+        for tenant, unit in zip(tenants, units)
+    ]
+    return _bulk_create(Lease, leases, profile, "leases", report)
+
+
+def _create_bills(profile, rng, leases, today, report):
+    behaviours = list(profile.behaviour_mix)
+    behaviour_weights = [profile.behaviour_mix[name] for name in behaviours]
+    end = month_start(today)
+
+    total_bills = sum(
+        max((end.year - lease.start_date.year) * 12 + end.month - lease.start_date.month + 1, 0)
+        for lease in leases
+    )
+    bills_done = payments_done = 0
+    pending = []  # (bill, paid_at | None)
+
+    def flush():
+        nonlocal bills_done, payments_done
+        with transaction.atomic():
+            MonthlyBill.objects.bulk_create([bill for bill, _ in pending])
+            paid = [(bill, paid_at) for bill, paid_at in pending if paid_at]
+            if profile.with_payments and paid:
+                payments = ManualPayment.objects.bulk_create([
+                    ManualPayment(user_id=bill.lease.tenant_id, reference_code=bill.payment_reference, status="APPROVED")
+                    for bill, _ in paid
+                ])
+                PaymentAllocation.objects.bulk_create([
+                    PaymentAllocation(payment=payment, bill=bill, amount=bill.total_due)
+                    for payment, (bill, _) in zip(payments, paid)
+                ])
+                # created_at is auto_now_add; backdate the batch to each bill's paid_at in one UPDATE
+                ManualPayment.objects.filter(pk__in=[payment.pk for payment in payments]).update(
+                    created_at=Subquery(
+                        MonthlyBill.objects.filter(allocations__payment=OuterRef("pk")).values("paid_at")[:1]
+                    )
+                )
+                payments_done += len(payments)
+        bills_done += len(pending)
+        pending.clear()
+        report("bills", bills_done, total_bills)
+
+    for lease in leases:
+        paid_probability, (early, late) = BEHAVIOURS[rng.choices(behaviours, behaviour_weights)[0]]
+        for billing_month in months_between(month_start(lease.start_date), end):
+            due_date = due_date_for_month(billing_month.year, billing_month.month, lease.due_day)
+            water_amount = Decimal(rng.randrange(150, 900)).quantize(Decimal("0.01"))
+            bill = MonthlyBill(
+                lease=lease,
+                billing_month=billing_month,
+                due_date=due_date,
+                base_rent=lease.monthly_rent,
+                water_amount=water_amount,
+                interest=Decimal("0.00"),
+                total_due=lease.monthly_rent + water_amount,
+                status="UNPAID",
+            )
+
+            paid_at = None
+            paid_on = due_date + timedelta(days=rng.randint(early, late))
+            if paid_on < today and rng.random() < paid_probability:
+                interest, _, _ = compute_weekly_interest(lease.monthly_rent, due_date, paid_on)
+                paid_at = timezone.make_aware(datetime.combine(paid_on, time(rng.randint(8, 20), rng.randint(0, 59))))
+                bill.status = "PAID"
+                bill.paid_at = paid_at
+                bill.payment_reference = f"LOAD{lease.pk:07d}{billing_month:%y%m}"
+                bill.interest = interest
+                bill.total_due = bill.base_rent + bill.water_amount + interest
+
+            pending.append((bill, paid_at))
+            if len(pending) >= profile.batch_size:
+                flush()
+
+    if pending:
+        flush()
+    return bills_done, payments_done
@@ -35,10 +35,10 @@ class Command(BaseCommand):
         units_data = [
             {'number': 'A101', 'unit_type': 'STUDIO', 'floor_level': 1, 'monthly_rent': 8000},
             {'number': 'A102', 'unit_type': 'STUDIO', 'floor_level': 1, 'monthly_rent': 8500},
-            {'number': 'B201', 'unit_type': 'ONE_BEDROOM', 'floor_level': 2, 'monthly_rent': 12000},
-            {'number': 'B202', 'unit_type': 'ONE_BEDROOM', 'floor_level': 2, 'monthly_rent': 12500},
-            {'number': 'C301', 'unit_type': 'TWO_BEDROOM', 'floor_level': 3, 'monthly_rent': 18000},
-            {'number': 'C302', 'unit_type': 'TWO_BEDROOM', 'floor_level': 3, 'monthly_rent': 19000},
+            {'number': 'B201', 'unit_type': '1BR', 'floor_level': 2, 'monthly_rent': 12000},
+            {'number': 'B202', 'unit_type': '1BR', 'floor_level': 2, 'monthly_rent': 12500},
+            {'number': 'C301', 'unit_type': '2BR', 'floor_level': 3, 'monthly_rent': 18000},
+            {'number': 'C302', 'unit_type': '2BR', 'floor_level': 3, 'monthly_rent': 19000},
         ]
         
         units = []
@@ -146,7 +146,6 @@ class Command(BaseCommand):
                 defaults={
                     'user': payment_info['user'],
                     'status': payment_info['status'],
-                    'bill_ids': ''  # Empty string for now
                 }
             )
             if created:
@@ -4,6 +4,7 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 from rentals.models import Unit, Lease, TenantProfile, Notification
+from rentals.notification_emitter import NotificationEmitter
 from billing.models import MonthlyBill
 from payments.models import ManualPayment
 from maintenance.models import MaintenanceRequest
@@ -93,26 +94,26 @@ class Command(BaseCommand):
             {'number': 'A202', 'unit_type': 'STUDIO', 'floor_level': 2, 'monthly_rent': 8500, 'bedrooms': 0, 'bathrooms': 1},
             
             # One bedroom units
-            {'number': 'B101', 'unit_type': 'ONE_BEDROOM', 'floor_level': 1, 'monthly_rent': 11000, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B102', 'unit_type': 'ONE_BEDROOM', 'floor_level': 1, 'monthly_rent': 11500, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B103', 'unit_type': 'ONE_BEDROOM', 'floor_level': 1, 'monthly_rent': 12000, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B201', 'unit_type': 'ONE_BEDROOM', 'floor_level': 2, 'monthly_rent': 12500, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B202', 'unit_type': 'ONE_BEDROOM', 'floor_level': 2, 'monthly_rent': 13000, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B301', 'unit_type': 'ONE_BEDROOM', 'floor_level': 3, 'monthly_rent': 13500, 'bedrooms': 1, 'bathrooms': 1},
-            {'number': 'B302', 'unit_type': 'ONE_BEDROOM', 'floor_level': 3, 'monthly_rent': 14000, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B101', 'unit_type': '1BR', 'floor_level': 1, 'monthly_rent': 11000, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B102', 'unit_type': '1BR', 'floor_level': 1, 'monthly_rent': 11500, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B103', 'unit_type': '1BR', 'floor_level': 1, 'monthly_rent': 12000, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B201', 'unit_type': '1BR', 'floor_level': 2, 'monthly_rent': 12500, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B202', 'unit_type': '1BR', 'floor_level': 2, 'monthly_rent': 13000, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B301', 'unit_type': '1BR', 'floor_level': 3, 'monthly_rent': 13500, 'bedrooms': 1, 'bathrooms': 1},
+            {'number': 'B302', 'unit_type': '1BR', 'floor_level': 3, 'monthly_rent': 14000, 'bedrooms': 1, 'bathrooms': 1},
             
             # Two bedroom units
-            {'number': 'C101', 'unit_type': 'TWO_BEDROOM', 'floor_level': 1, 'monthly_rent': 17000, 'bedrooms': 2, 'bathrooms': 2},
-            {'number': 'C102', 'unit_type': 'TWO_BEDROOM', 'floor_level': 1, 'monthly_rent': 17500, 'bedrooms': 2, 'bathrooms': 2},
-            {'number': 'C201', 'unit_type': 'TWO_BEDROOM', 'floor_level': 2, 'monthly_rent': 18000, 'bedrooms': 2, 'bathrooms': 2},
-            {'number': 'C202', 'unit_type': 'TWO_BEDROOM', 'floor_level': 2, 'monthly_rent': 18500, 'bedrooms': 2, 'bathrooms': 2},
-            {'number': 'C301', 'unit_type': 'TWO_BEDROOM', 'floor_level': 3, 'monthly_rent': 19000, 'bedrooms': 2, 'bathrooms': 2},
-            {'number': 'C302', 'unit_type': 'TWO_BEDROOM', 'floor_level': 3, 'monthly_rent': 19500, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C101', 'unit_type': '2BR', 'floor_level': 1, 'monthly_rent': 17000, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C102', 'unit_type': '2BR', 'floor_level': 1, 'monthly_rent': 17500, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C201', 'unit_type': '2BR', 'floor_level': 2, 'monthly_rent': 18000, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C202', 'unit_type': '2BR', 'floor_level': 2, 'monthly_rent': 18500, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C301', 'unit_type': '2BR', 'floor_level': 3, 'monthly_rent': 19000, 'bedrooms': 2, 'bathrooms': 2},
+            {'number': 'C302', 'unit_type': '2BR', 'floor_level': 3, 'monthly_rent': 19500, 'bedrooms': 2, 'bathrooms': 2},
             
             # Three bedroom units
-            {'number': 'D101', 'unit_type': 'THREE_BEDROOM', 'floor_level': 1, 'monthly_rent': 22000, 'bedrooms': 3, 'bathrooms': 2},
-            {'number': 'D201', 'unit_type': 'THREE_BEDROOM', 'floor_level': 2, 'monthly_rent': 23000, 'bedrooms': 3, 'bathrooms': 2},
-            {'number': 'D301', 'unit_type': 'THREE_BEDROOM', 'floor_level': 3, 'monthly_rent': 24000, 'bedrooms': 3, 'bathrooms': 2},
+            {'number': 'D101', 'unit_type': '3BR', 'floor_level': 1, 'monthly_rent': 22000, 'bedrooms': 3, 'bathrooms': 2},
+            {'number': 'D201', 'unit_type': '3BR', 'floor_level': 2, 'monthly_rent': 23000, 'bedrooms': 3, 'bathrooms': 2},
+            {'number': 'D301', 'unit_type': '3BR', 'floor_level': 3, 'monthly_rent': 24000, 'bedrooms': 3, 'bathrooms': 2},
         ]
         
         units = []
@@ -300,7 +301,6 @@ class Command(BaseCommand):
                 defaults={
                     'user': tenant.user,
                     'status': payment_info['status'],
-                    'bill_ids': ''
                 }
             )
             if created:
@@ -378,13 +378,14 @@ class Command(BaseCommand):
             {'title': 'Maintenance Request', 'message': 'New maintenance request from Bob Johnson', 'type': 'MAINTENANCE'},
         ]
         
-        for notif_data in notifications_data:
-            notification = Notification.create_notification(
-                title=notif_data['title'],
-                message=notif_data['message'],
-                notification_type=notif_data['type']
-            )
-            self.stdout.write(f'  Created notification: {notif_data["title"]}')
+        with NotificationEmitter() as notifications:
+            for notif_data in notifications_data:
+                notifications.emit(
+                    title=notif_data['title'],
+                    message=notif_data['message'],
+                    notification_type=notif_data['type']
+                )
+                self.stdout.write(f'  Created notification: {notif_data["title"]}')
 
     def display_summary(self):
         """Display summary of created data"""
@@ -395,9 +396,9 @@ class Command(BaseCommand):
         self.stdout.write(f'Tenants: {TenantProfile.objects.count()}')
         self.stdout.write(f'Units: {Unit.objects.count()}')
         self.stdout.write(f'  - Studio: {Unit.objects.filter(unit_type="STUDIO").count()}')
-        self.stdout.write(f'  - One Bedroom: {Unit.objects.filter(unit_type="ONE_BEDROOM").count()}')
-        self.stdout.write(f'  - Two Bedroom: {Unit.objects.filter(unit_type="TWO_BEDROOM").count()}')
-        self.stdout.write(f'  - Three Bedroom: {Unit.objects.filter(unit_type="THREE_BEDROOM").count()}')
+        self.stdout.write(f'  - One Bedroom: {Unit.objects.filter(unit_type="1BR").count()}')
+        self.stdout.write(f'  - Two Bedroom: {Unit.objects.filter(unit_type="2BR").count()}')
+        self.stdout.write(f'  - Three Bedroom: {Unit.objects.filter(unit_type="3BR").count()}')
         self.stdout.write(f'Leases: {Lease.objects.count()}')
         self.stdout.write(f'  - Active: {Lease.objects.filter(is_active=True).count()}')
         self.stdout.write(f'  - Inactive: {Lease.objects.filter(is_active=False).count()}')
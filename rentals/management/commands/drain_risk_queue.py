@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.models import RiskRecalcRequest
+from rentals.services import RISK_BATCH_SIZE, RISK_RECALC_DEBOUNCE, TenantRiskService
+
+
+class Command(BaseCommand):
+    help = 'Rescore tenants queued by billing and payment events (dirty-tenant risk queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep draining, sleeping --interval seconds whenever the queue is idle.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help='Seconds to sleep between polls in --loop mode (default 10).',
+        )
+        parser.add_argument(
+            '--debounce',
+            type=float,
+            default=RISK_RECALC_DEBOUNCE.total_seconds(),
+            help='Only rescore tenants untouched for this many seconds (default %(default)s).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RISK_BATCH_SIZE,
+            help='Tenants rescored per batch (default %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['interval'] < 0 or options['debounce'] < 0:
+            raise CommandError('--batch-size must be at least 1; --interval and --debounce must not be negative.')
+
+        debounce = timedelta(seconds=options['debounce'])
+        total = 0
+        try:
+            while True:
+                rescored = TenantRiskService.drain_dirty_tenants(debounce=debounce, limit=options['batch_size'])
+                total += rescored
+                if rescored:
+                    if options['verbosity'] >= 2:
+                        self.stdout.write(f'  rescored {rescored} tenant(s)')
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        pending = RiskRecalcRequest.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Rescored {total} tenant(s); {pending} still queued.'))
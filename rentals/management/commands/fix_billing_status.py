@@ -1,12 +1,16 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, time
 from billing.models import MonthlyBill
+from billing.services import set_bill_status
 import random
 
 class Command(BaseCommand):
     help = 'Fix billing status to have realistic unpaid bills for recent months'
 
+    # set by the rentals.fix_billing_status job: progress(done, total)
+    progress = None
+
     def handle(self, *args, **options):
         self.stdout.write('Fixing billing status for realistic data...')
         
@@ -28,21 +32,23 @@ class Command(BaseCommand):
             self.stdout.write(f'Updating bills for {month_date.strftime("%Y-%m")}...')
             
             # Get all bills for this month
-            bills = MonthlyBill.objects.filter(billing_month=month_date)
+            bills = MonthlyBill.objects.filter(billing_month=month_date).select_related('lease__unit')
             
+            # set_bill_status freezes/unfreezes interest and keeps RevenueRollup in step
             for bill in bills:
                 # For recent months, make some bills unpaid (30% chance)
                 if random.random() < 0.3:
-                    bill.status = 'UNPAID'
-                    bill.paid_at = None
+                    set_bill_status(bill, status='UNPAID')
                     self.stdout.write(f'  Made {bill.lease.unit.number} bill UNPAID')
                 else:
                     # Keep as paid but ensure paid_at is set
-                    if not bill.paid_at:
-                        bill.paid_at = month_date.replace(day=random.randint(16, 28))
-                    bill.status = 'PAID'
-                
-                bill.save()
+                    paid_at = bill.paid_at or timezone.make_aware(
+                        datetime.combine(month_date.replace(day=random.randint(16, 28)), time(12, 0))
+                    )
+                    set_bill_status(bill, status='PAID', paid_at=paid_at, payment_reference=bill.payment_reference)
+            
+            if self.progress:
+                self.progress(i + 1, 4)
         
         # Show updated statistics
         total_bills = MonthlyBill.objects.count()
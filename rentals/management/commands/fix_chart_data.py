@@ -1,12 +1,16 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, time
 from billing.models import MonthlyBill
+from billing.services import freeze_interest, rebuild_revenue_rollup
 from rentals.models import Lease
 
 class Command(BaseCommand):
     help = 'Fix chart data to show correct months for 2026'
 
+    # set by the rentals.fix_chart_data job: progress(done, total)
+    progress = None
+
     def handle(self, *args, **options):
         self.stdout.write('Fixing chart data for 2026...')
         
@@ -37,15 +41,24 @@ class Command(BaseCommand):
                     lease=lease,
                     billing_month=month_date,
                     defaults={
+                        'base_rent': lease.monthly_rent,
                         'total_due': lease.monthly_rent,
                         'due_date': month_date.replace(day=15),
                         'status': 'PAID' if i < 8 else 'UNPAID',  # Last 4 months unpaid
-                        'paid_at': month_date.replace(day=20) if i < 8 else None
+                        'paid_at': timezone.make_aware(datetime.combine(month_date.replace(day=20), time(12, 0))) if i < 8 else None
                     }
                 )
+                if created and bill.status == 'PAID':
+                    freeze_interest(bill, bill.paid_at)
+                    bill.save(update_fields=['interest', 'total_due'])
                 if created:
                     self.stdout.write(f'  Created bill for {lease.unit.number} - {month_date.strftime("%Y-%m")}')
+            
+            if self.progress:
+                self.progress(i + 1, 12)
         
+        # get_or_create sends no rollup updates; recount the dashboard totals once
+        rebuild_revenue_rollup()
         self.stdout.write(self.style.SUCCESS(f'Total bills created: {MonthlyBill.objects.count()}'))
         
         # Show date range
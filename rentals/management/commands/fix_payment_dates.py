@@ -1,19 +1,24 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from billing.models import MonthlyBill
+from billing.services import set_bill_status
 import random
 
 class Command(BaseCommand):
     help = 'Fix payment dates to create more realistic payment patterns'
 
+    # set by the rentals.fix_payment_dates job: progress(done, total)
+    progress = None
+
     def handle(self, *args, **options):
         self.stdout.write('Fixing payment dates for realistic patterns...')
         
         # Get all paid bills
-        paid_bills = MonthlyBill.objects.filter(status='PAID')
+        paid_bills = MonthlyBill.objects.filter(status='PAID').select_related('lease__unit')
+        total = paid_bills.count()
         
-        for bill in paid_bills:
+        for done, bill in enumerate(paid_bills, start=1):
             # Create more realistic payment patterns
             # 70% chance of on-time payment, 30% chance of late payment
             if random.random() < 0.7:
@@ -25,13 +30,20 @@ class Command(BaseCommand):
                 days_late = random.randint(1, 10)
                 paid_date = bill.due_date + timedelta(days=days_late)
             
-            bill.paid_at = paid_date
-            bill.save()
+            # re-freezes the interest owed on the new date and moves the bill's revenue month
+            set_bill_status(
+                bill,
+                status='PAID',
+                paid_at=timezone.make_aware(datetime.combine(paid_date, time(12, 0))),
+                payment_reference=bill.payment_reference,
+            )
             
             payment_status = "ON TIME" if paid_date <= bill.due_date else f"{(paid_date - bill.due_date).days} DAYS LATE"
             self.stdout.write(f'Updated {bill.lease.unit.number} - {bill.billing_month}: Paid {paid_date} ({payment_status})')
+            if self.progress and (done % 100 == 0 or done == total):
+                self.progress(done, total)
         
-        self.stdout.write(self.style.SUCCESS(f'Updated payment dates for {paid_bills.count()} bills'))
+        self.stdout.write(self.style.SUCCESS(f'Updated payment dates for {total} bills'))
         
         # Recalculate risk classifications
         from rentals.services import TenantRiskService
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.datagen import LOAD_EMAIL_DOMAIN, LOAD_PASSWORD, LoadProfile, clear_load_data, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic portfolio (buildings, units, tenants, leases, bills, payments) '
+        'for load testing, using batched bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buildings', type=int, default=5, help='Number of buildings (default 5).')
+        parser.add_argument('--units-per-building', type=int, default=200, help='Units per building (default 200).')
+        parser.add_argument('--tenants', type=int, help='Tenants/leases to create (default: --occupancy of all units).')
+        parser.add_argument('--occupancy', type=float, default=0.9, help='Share of units leased when --tenants is not given (default 0.9).')
+        parser.add_argument('--years', type=int, default=2, help='Years of billing history (default 2).')
+        parser.add_argument('--on-time', type=float, default=0.7, help='Share of tenants who pay on time (default 0.7).')
+        parser.add_argument('--late', type=float, default=0.2, help='Share of tenants who pay late (default 0.2).')
+        parser.add_argument('--delinquent', type=float, default=0.1, help='Share of tenants who often do not pay (default 0.1).')
+        parser.add_argument('--no-payments', action='store_true', help='Skip ManualPayment/PaymentAllocation rows for paid bills.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default 5000).')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated load data first.')
+
+    def handle(self, *args, **options):
+        if min(options['buildings'], options['units_per_building'], options['batch_size']) < 1:
+            raise CommandError('--buildings, --units-per-building and --batch-size must be at least 1.')
+        if options['years'] < 1:
+            raise CommandError('--years must be at least 1.')
+        if options['units_per_building'] > 99999 or options['buildings'] > 999:
+            raise CommandError('At most 999 buildings of 99999 units (unit numbers are 10 characters).')
+        mix = {'on_time': options['on_time'], 'late': options['late'], 'delinquent': options['delinquent']}
+        if any(share < 0 for share in mix.values()) or not sum(mix.values()):
+            raise CommandError('Behaviour shares must be non-negative and not all zero.')
+
+        if options['clear']:
+            removed = clear_load_data()
+            self.stdout.write(f'Removed {removed} previously generated records.')
+
+        profile = LoadProfile(
+            buildings=options['buildings'],
+            units_per_building=options['units_per_building'],
+            tenants=options['tenants'],
+            occupancy=options['occupancy'],
+            years=options['years'],
+            behaviour_mix=mix,
+            with_payments=not options['no_payments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f'Generating {profile.unit_count} units, {profile.tenant_count} tenants, '
+            f'{profile.years} year(s) of history (seed {profile.seed})...'
+        )
+
+        started = time.perf_counter()
+        try:
+            counts = generate(profile, progress=self.progress if options['verbosity'] >= 2 else None)
+        except Exception as e:
+            raise CommandError(f'Generation failed ({e}). Re-run with --clear to start from a clean slate.')
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s): " +
+            ', '.join(f'{count:,} {name}' for name, count in counts.items())
+        ))
+        self.stdout.write(f'Tenant logins: tenantNNNNNNN@{LOAD_EMAIL_DOMAIN} / {LOAD_PASSWORD}')
+
+    def progress(self, stage, done, total):
+        self.stdout.write(f'  {stage}: {done:,}/{total:,}')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from rentals.notification_retention import RETENTION_BATCH_SIZE, expired_notifications, prune_notifications, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete read notifications older than their type\'s retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many notifications of each type would be pruned.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RETENTION_BATCH_SIZE,
+            help='Notifications archived and deleted per transaction (default %(default)s).',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            help='Archive to gzip JSONL files (one per month) in this directory instead of the NotificationArchive table.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        if options['dry_run']:
+            days = retention_days()
+            rows = expired_notifications().order_by().values('notification_type').annotate(total=Count('pk'))
+            for row in sorted(rows, key=lambda row: row['notification_type']):
+                self.stdout.write(f"  {row['notification_type']:<12} {row['total']:>8}  (older than {days[row['notification_type']]} days)")
+            self.stdout.write(f"{sum(row['total'] for row in rows)} notification(s) would be pruned.")
+            return
+
+        def progress(done):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  pruned {done}')
+
+        pruned = prune_notifications(
+            batch_size=options['batch_size'],
+            archive_dir=options['archive_dir'],
+            progress=progress,
+        )
+        target = options['archive_dir'] or 'the notification archive table'
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} notification(s), archived to {target}.'))
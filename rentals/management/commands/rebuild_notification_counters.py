@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from rentals.models import NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Recount the denormalized unread-notification counters from the notification table'
+
+    def handle(self, *args, **options):
+        buckets = NotificationCounter.rebuild()
+        unread = NotificationCounter.unread_for(NotificationCounter.ALL)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} counter bucket(s); {unread} unread notification(s).'))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0006_tenantriskclassification_is_new_tenant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lease',
+            name='billed_through',
+            field=models.DateField(blank=True, help_text='Last billing month with generated MonthlyBill rows', null=True),
+        ),
+    ]
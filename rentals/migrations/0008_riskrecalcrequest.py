@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0007_lease_billed_through'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskRecalcRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(blank=True, default='', max_length=50)),
+                ('marked_at', models.DateTimeField(db_index=True)),
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='risk_recalc_request', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['marked_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0008_riskrecalcrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lease',
+            index=models.Index(fields=['tenant', 'is_active'], name='lease_tenant_active_idx'),
+        ),
+    ]
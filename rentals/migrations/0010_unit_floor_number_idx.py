@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0009_lease_tenant_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['floor_level', 'number'], name='unit_floor_number_idx'),
+        ),
+    ]
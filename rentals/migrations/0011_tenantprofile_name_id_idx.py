@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0010_unit_floor_number_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenantprofile',
+            index=models.Index(fields=['full_name', 'id'], name='tenantprofile_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:20
+
+from django.db import migrations, models
+from django.db.models import F, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+# frozen copy of the document definition (accounts.search) when this migration was written
+SEARCH_PATHS = ['full_name', 'contact_no', 'user__email', 'user__username']
+BATCH_SIZE = 500
+
+
+def backfill_search_document(apps, schema_editor):
+    TenantProfile = apps.get_model('rentals', 'TenantProfile')
+    manager = TenantProfile._base_manager.using(schema_editor.connection.alias)
+    parts = []
+    for path in SEARCH_PATHS:
+        if parts:
+            parts.append(Value(' '))
+        parts.append(Coalesce(F(path), Value(''), output_field=TextField()))
+    rows = manager.order_by('pk').annotate(_document=Concat(*parts, output_field=TextField()))
+
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk).values_list('pk', '_document')[:BATCH_SIZE])
+        if not batch:
+            return
+        manager.bulk_update(
+            [TenantProfile(pk=pk, search_document=' '.join((document or '').split()).lower()) for pk, document in batch],
+            ['search_document'],
+        )
+        last_pk = batch[-1][0]
+
+
+def add_trigram_index(apps, schema_editor):
+    # CREATE EXTENSION needs a role allowed to create extensions; otherwise have a DBA run it first
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "tenantprofile_search_trgm_idx" '
+        'ON "rentals_tenantprofile" USING gin ("search_document" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "tenantprofile_search_trgm_idx"')
+
+
+class Migration(migrations.Migration):
+    # the trigram index is built CONCURRENTLY, which cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('rentals', '0011_tenantprofile_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantprofile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+def count_unread(apps, schema_editor):
+    Notification = apps.get_model('rentals', 'Notification')
+    NotificationCounter = apps.get_model('rentals', 'NotificationCounter')
+    db = schema_editor.connection.alias
+
+    unread = Notification.objects.using(db).filter(is_read=False).order_by()
+    counters = [NotificationCounter(bucket='all', unread=unread.count())]
+    counters += [
+        NotificationCounter(bucket=f"user:{row['user_id']}", unread=row['total'])
+        for row in unread.exclude(user=None).values('user_id').annotate(total=models.Count('pk'))
+    ]
+    NotificationCounter.objects.using(db).bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0012_tenantprofile_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('bucket', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0013_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at'], name='notification_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the notifications were created in')),
+                ('notification_type', models.CharField(choices=[('INFO', 'Information'), ('WARNING', 'Warning'), ('SUCCESS', 'Success'), ('ERROR', 'Error'), ('LEASE', 'Lease Related'), ('PAYMENT', 'Payment Related'), ('MAINTENANCE', 'Maintenance Related'), ('UNIT', 'Unit Related')], max_length=20)),
+                ('count', models.PositiveIntegerField()),
+                ('items', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-month', 'notification_type'],
+                'indexes': [models.Index(fields=['month', 'notification_type'], name='notif_archive_month_type_idx')],
+            },
+        ),
+    ]
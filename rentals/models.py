@@ -1,5 +1,7 @@
+from collections import Counter
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 class Unit(models.Model):
@@ -32,6 +34,10 @@ class Unit(models.Model):
 
     class Meta:
         ordering = ['floor_level', 'number']
+        indexes = [
+            # keyset pagination of the admin unit list seeks on (floor_level, number)
+            models.Index(fields=['floor_level', 'number'], name='unit_floor_number_idx'),
+        ]
 
     def __str__(self):
         return f"Unit {self.number} ({self.get_unit_type_display()})"
@@ -64,6 +70,14 @@ class TenantProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=120)
     contact_no = models.CharField(max_length=30, blank=True)
+    # lower-cased searchable text, maintained by accounts.search (trigram-indexed on PostgreSQL)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # admin tenant list: keyset pages on (full_name, id)
+            models.Index(fields=["full_name", "id"], name="tenantprofile_name_id_idx"),
+        ]
 
     def __str__(self):
         return self.full_name
@@ -76,6 +90,15 @@ class Lease(models.Model):
     start_date = models.DateField()
     is_active = models.BooleanField(default=True)
 
+    # Billing freshness watermark (maintained by billing.services.generate_bills)
+    billed_through = models.DateField(null=True, blank=True, help_text="Last billing month with generated MonthlyBill rows")
+
+    class Meta:
+        indexes = [
+            # "this tenant's active lease" and bill lookups joined through lease__tenant
+            models.Index(fields=["tenant", "is_active"], name="lease_tenant_active_idx"),
+        ]
+
     def __str__(self):
         return f"{self.tenant.email} -> {self.unit.number}"
 
@@ -104,22 +127,138 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # dashboard "latest 5" and the feed's default order
+            models.Index(fields=['-created_at'], name='notification_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_notification_type_display()}"
     
     @classmethod
     def create_notification(cls, title, message, notification_type='INFO', user=None, related_unit=None, related_tenant=None):
-        """Helper method to create notifications"""
-        return cls.objects.create(
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            user=user,
-            related_unit=related_unit,
-            related_tenant=related_tenant
+        """Helper method to create notifications (and count them as unread)"""
+        with transaction.atomic():
+            notification = cls.objects.create(
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                user=user,
+                related_unit=related_unit,
+                related_tenant=related_tenant
+            )
+            NotificationCounter.adjust(NotificationCounter.deltas([notification.user_id], +1))
+        return notification
+
+    def mark_read(self):
+        """Mark as read; returns False when it already was (e.g. another admin got there first)."""
+        with transaction.atomic():
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
+            if updated:
+                NotificationCounter.adjust(NotificationCounter.deltas([self.user_id], -1))
+        self.is_read = True
+        return bool(updated)
+
+    @classmethod
+    def mark_all_read(cls, queryset, batch_size=500):
+        """Mark every unread notification in `queryset` as read. Returns how many changed."""
+        with transaction.atomic():
+            rows = list(queryset.filter(is_read=False).select_for_update().values_list('pk', 'user_id'))
+            pks = [pk for pk, _ in rows]
+            for start in range(0, len(pks), batch_size):
+                cls.objects.filter(pk__in=pks[start:start + batch_size]).update(is_read=True)
+            NotificationCounter.adjust(NotificationCounter.deltas([user_id for _, user_id in rows], -1))
+        return len(rows)
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized unread-notification counts, so badges are a primary-key read
+    instead of a COUNT over the notification table. Bucket "all" counts every
+    unread notification (what the admin portal shows); "user:<id>" counts the
+    ones addressed to that user.
+
+    Notification.create_notification, mark_read and mark_all_read adjust the
+    counters in the same transaction as the rows; deletes (including cascades)
+    are handled by a post_delete receiver in accounts.signals. Writes that
+    bypass those paths (raw .update() / bulk_create) must call adjust()
+    themselves, or run `rebuild_notification_counters` afterwards.
+    """
+    ALL = 'all'
+
+    bucket = models.CharField(max_length=40, primary_key=True)
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.bucket}: {self.unread}"
+
+    @staticmethod
+    def user_bucket(user_id):
+        return f"user:{user_id}"
+
+    @classmethod
+    def deltas(cls, user_ids, step):
+        """Bucket -> change for notifications addressed to `user_ids` (None = all admins), `step` each."""
+        user_ids = list(user_ids)
+        changes = Counter({cls.ALL: step * len(user_ids)})
+        for user_id in user_ids:
+            if user_id is not None:
+                changes[cls.user_bucket(user_id)] += step
+        return {bucket: change for bucket, change in changes.items() if change}
+
+    @classmethod
+    def adjust(cls, changes):
+        """Apply bucket -> change in two statements however many buckets there are. Call inside the writing transaction."""
+        if not changes:
+            return
+        cls.objects.bulk_create([cls(bucket=bucket) for bucket in changes], ignore_conflicts=True)
+        cls.objects.filter(bucket__in=list(changes)).update(
+            unread=models.F('unread') + models.Case(
+                *[models.When(bucket=bucket, then=models.Value(change)) for bucket, change in changes.items()],
+                output_field=models.IntegerField(),
+            )
         )
 
+    @classmethod
+    def unread_for(cls, bucket=ALL):
+        return cls.objects.filter(bucket=bucket).values_list('unread', flat=True).first() or 0
+
+    @classmethod
+    def rebuild(cls):
+        """Recount every bucket from the notification table. Returns the number of buckets."""
+        with transaction.atomic():
+            unread = Notification.objects.filter(is_read=False).order_by()
+            counters = [cls(bucket=cls.ALL, unread=unread.count())]
+            counters += [
+                cls(bucket=cls.user_bucket(row['user_id']), unread=row['total'])
+                for row in unread.exclude(user=None).values('user_id').annotate(total=models.Count('pk'))
+            ]
+            cls.objects.all().delete()
+            cls.objects.bulk_create(counters)
+        return len(counters)
+
+class NotificationArchive(models.Model):
+    """
+    Read notifications removed by retention (rentals.notification_retention),
+    packed as one row per month and type for each pruning batch. `items` holds
+    the archived notifications as compact dicts, oldest first.
+    """
+    month = models.DateField(help_text="First day of the month the notifications were created in")
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    count = models.PositiveIntegerField()
+    items = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month', 'notification_type']
+        indexes = [
+            models.Index(fields=['month', 'notification_type'], name='notif_archive_month_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.notification_type}: {self.count}"
+
+
 class TenantRiskClassification(models.Model):
     RISK_LEVELS = [
         ('LOW', 'Low Risk'),
@@ -146,14 +285,35 @@ class TenantRiskClassification(models.Model):
     def __str__(self):
         return f"{self.tenant.email} - {self.get_risk_level_display()}"
     
+    @staticmethod
+    def risk_level_for_score(payment_score):
+        """Map a payment score (0-100) to a risk level"""
+        if payment_score >= 80:
+            return 'LOW'
+        elif payment_score >= 50:
+            return 'MEDIUM'
+        return 'HIGH'
+
     def calculate_risk_level(self):
         """Calculate risk level based on payment score and other factors"""
-        if self.payment_score >= 80:
-            self.risk_level = 'LOW'
-        elif self.payment_score >= 50:
-            self.risk_level = 'MEDIUM'
-        else:
-            self.risk_level = 'HIGH'
+        self.risk_level = self.risk_level_for_score(self.payment_score)
         self.save()
 
+class RiskRecalcRequest(models.Model):
+    """
+    Dirty-tenant queue for risk rescoring. One row per tenant; marking an
+    already-queued tenant just bumps marked_at, so bursts of billing events
+    collapse into a single rescore once the tenant has been quiet for the
+    debounce window.
+    """
+    tenant = models.OneToOneField('accounts.User', on_delete=models.CASCADE, related_name='risk_recalc_request')
+    reason = models.CharField(max_length=50, blank=True, default='')
+    marked_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['marked_at']
+
+    def __str__(self):
+        return f"{self.tenant_id} ({self.reason or 'dirty'}) @ {self.marked_at:%Y-%m-%d %H:%M:%S}"
+
 # Create your models here.
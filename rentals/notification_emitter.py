@@ -0,0 +1,72 @@
+"""
+Buffered notification fan-out.
+
+Notification.create_notification writes one row (plus counter updates) per
+call, inline. NotificationEmitter instead collects notifications for a
+request or a batch job and writes them all when the surrounding transaction
+commits: one bulk_create and one counter adjustment, however many were
+emitted.
+
+    with NotificationEmitter() as notifications:
+        lease = form.save()
+        notifications.emit("New Lease Created", "...", notification_type="LEASE")
+
+The `with` block is a transaction.atomic() block. If it rolls back, nothing
+is written, so admins are never told about work that did not happen. If it
+is nested in an outer transaction, the flush waits for the outer commit.
+The flush runs as a robust on_commit callback: a failure there is logged
+and does not fail the request whose work already committed.
+
+bulk_create sends no post_save, so the flush updates NotificationCounter
+itself. Outside a `with` block, emit() only buffers, and the caller must
+call flush().
+"""
+from django.db import transaction
+
+from rentals.models import Notification, NotificationCounter
+
+NOTIFICATION_BATCH_SIZE = 500
+
+
+class NotificationEmitter:
+    def __init__(self, batch_size=NOTIFICATION_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = []
+        self._atomic = None
+
+    def __enter__(self):
+        self._atomic = transaction.atomic()
+        self._atomic.__enter__()
+        # registered here rather than on the first emit(), so a rolled-back
+        # savepoint inside the block cannot discard the flush
+        transaction.on_commit(self.flush, robust=True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        atomic, self._atomic = self._atomic, None
+        if exc_type is not None:
+            self.pending = []
+        return atomic.__exit__(exc_type, exc_value, traceback)
+
+    def emit(self, title, message, notification_type='INFO', user=None, related_unit=None, related_tenant=None):
+        """Queue a notification (same arguments as Notification.create_notification). It is saved at flush."""
+        notification = Notification(
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            user=user,
+            related_unit=related_unit,
+            related_tenant=related_tenant,
+        )
+        self.pending.append(notification)
+        return notification
+
+    def flush(self):
+        """Write every queued notification and count them as unread. Returns the saved notifications."""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return []
+        with transaction.atomic():
+            created = Notification.objects.bulk_create(pending, batch_size=self.batch_size)
+            NotificationCounter.adjust(NotificationCounter.deltas([n.user_id for n in pending], +1))
+        return created
@@ -1,13 +1,58 @@
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Q, Avg, Max, F
-from rentals.models import TenantRiskClassification, Lease
+from django.db.models import Count, Q, Max, Min, F
+from rentals.models import TenantRiskClassification, Lease, RiskRecalcRequest
 from billing.models import MonthlyBill
 from payments.models import ManualPayment
 import logging
 
 logger = logging.getLogger(__name__)
 
+# tenants scored per round of grouped queries (keeps IN clauses bounded)
+RISK_BATCH_SIZE = 1000
+
+# a dirty tenant is rescored once it has had no new billing events for this long
+RISK_RECALC_DEBOUNCE = timedelta(seconds=30)
+
+
+def mark_tenants_dirty(tenant_ids, reason=''):
+    """
+    Queue tenants for risk rescoring. One upsert regardless of how many tenants
+    are marked; re-marking a queued tenant restarts its debounce window.
+    """
+    tenant_ids = {tenant_id for tenant_id in tenant_ids if tenant_id}
+    if not tenant_ids:
+        return 0
+
+    now = timezone.now()
+    RiskRecalcRequest.objects.bulk_create(
+        [RiskRecalcRequest(tenant_id=tenant_id, reason=reason, marked_at=now) for tenant_id in tenant_ids],
+        update_conflicts=True,
+        unique_fields=['tenant'],
+        update_fields=['reason', 'marked_at'],
+    )
+    return len(tenant_ids)
+
+
+def mark_overdue_tenants_dirty(today=None, window_days=7):
+    """
+    Queue tenants whose UNPAID bills fell due within the last window_days.
+    Meant for the daily billing run: crossing a due date changes the current
+    payment status score without any write to the bill itself.
+    """
+    today = today or timezone.now().date()
+    tenant_ids = (
+        MonthlyBill.objects.filter(
+            status='UNPAID',
+            due_date__lt=today,
+            due_date__gte=today - timedelta(days=window_days),
+        )
+        .values_list('lease__tenant_id', flat=True)
+        .distinct()
+    )
+    return mark_tenants_dirty(tenant_ids, reason='overdue')
+
+
 class TenantRiskService:
     """Service for calculating and managing tenant risk classifications"""
     
@@ -18,293 +63,326 @@ class TenantRiskService:
         Score: 0-100 (higher = better, lower risk)
         """
         try:
-            # Get tenant's leases
-            leases = Lease.objects.filter(tenant=tenant, is_active=True)
-            if not leases:
-                return 50  # Default score for tenants without active leases
-            
-            # Initialize score components
-            payment_timeliness_score = 0
-            payment_consistency_score = 0
-            current_payment_status_score = 0
-            payment_method_score = 0
-            
-            # 1. Payment Timeliness (40% of total score)
-            payment_timeliness_score = TenantRiskService._calculate_payment_timeliness(tenant)
-            
-            # 2. Payment Consistency (30% of total score)
-            payment_consistency_score = TenantRiskService._calculate_payment_consistency(tenant)
-            
-            # 3. Current Payment Status (20% of total score)
-            current_payment_status_score = TenantRiskService._calculate_current_payment_status(tenant)
-            
-            # 4. Payment Method Reliability (10% of total score)
-            payment_method_score = TenantRiskService._calculate_payment_method_reliability(tenant)
-            
-            # Calculate weighted total score
-            total_score = (
-                payment_timeliness_score * 0.4 +
-                payment_consistency_score * 0.3 +
-                current_payment_status_score * 0.2 +
-                payment_method_score * 0.1
-            )
-            
-            # Ensure score is within 0-100 range
-            total_score = max(0, min(100, int(total_score)))
-            
-            return total_score
-            
+            stats = TenantRiskService._collect_stats([tenant.pk])[tenant.pk]
+            return TenantRiskService._score(stats)
         except Exception as e:
             logger.error(f"Error calculating risk score for tenant {tenant.email}: {e}")
             return 50  # Default score on error
     
     @staticmethod
-    def _calculate_payment_timeliness(tenant):
-        """Calculate payment timeliness score (0-100)"""
-        try:
-            # Get paid bills from last 6 months
-            six_months_ago = timezone.now() - timedelta(days=180)
-            paid_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='PAID',
-                paid_at__gte=six_months_ago
+    def _collect_stats(tenant_ids, now=None):
+        """
+        Pull every aggregate the scorer needs for a batch of tenants with three
+        grouped queries (bills, manual payments, active leases).
+        Returns {tenant_id: stats}.
+        """
+        now = now or timezone.now()
+        today = now.date()
+        six_months_ago = now - timedelta(days=180)
+        twelve_months_ago = (now - timedelta(days=365)).date()
+        current_month = today.replace(day=1)
+
+        paid = Q(status='PAID')
+        on_time = Q(paid_at__date__lte=F('due_date'))
+        recent = Q(paid_at__gte=six_months_ago)
+        last_twelve_months = Q(billing_month__gte=twelve_months_ago)
+        this_month = Q(billing_month=current_month)
+        unpaid = Q(status='UNPAID')
+
+        stats = {
+            tenant_id: {
+                'has_active_lease': False,
+                'paid_count': 0,
+                'paid_on_time': 0,
+                'recent_paid': 0,
+                'recent_on_time': 0,
+                'year_bills': 0,
+                'year_paid': 0,
+                'current_bills': 0,
+                'current_unpaid': 0,
+                'overdue': 0,
+                'unpaid_count': 0,
+                'late_payments': 0,
+                'first_paid_at': None,
+                'last_paid_at': None,
+                'payments': 0,
+                'approved_payments': 0,
+            }
+            for tenant_id in tenant_ids
+        }
+
+        bill_rows = (
+            MonthlyBill.objects.filter(lease__tenant_id__in=tenant_ids)
+            .values('lease__tenant_id')
+            .annotate(
+                paid_count=Count('id', filter=paid),
+                paid_on_time=Count('id', filter=paid & on_time),
+                recent_paid=Count('id', filter=paid & recent),
+                recent_on_time=Count('id', filter=paid & recent & on_time),
+                year_bills=Count('id', filter=last_twelve_months),
+                year_paid=Count('id', filter=last_twelve_months & paid),
+                current_bills=Count('id', filter=this_month),
+                current_unpaid=Count('id', filter=this_month & unpaid),
+                overdue=Count('id', filter=unpaid & Q(due_date__lt=today)),
+                unpaid_count=Count('id', filter=unpaid),
+                late_payments=Count('id', filter=paid & Q(paid_at__gt=F('due_date'))),
+                first_paid_at=Min('paid_at', filter=paid),
+                last_paid_at=Max('paid_at', filter=paid),
             )
-            
-            # If no recent payments, check all payment history
-            if paid_bills.count() == 0:
-                all_paid_bills = MonthlyBill.objects.filter(
-                    lease__tenant=tenant,
-                    status='PAID'
-                )
-                
-                # If no payment history at all, give medium score
-                if all_paid_bills.count() == 0:
-                    return 50
-                
-                # Use all payment history instead
-                paid_bills = all_paid_bills
-            
-            # Calculate average days late
-            total_days_late = 0
-            on_time_count = 0
-            
-            for bill in paid_bills:
-                if bill.paid_at and bill.due_date:
-                    days_late = (bill.paid_at.date() - bill.due_date).days
-                    if days_late <= 0:  # On time or early
-                        on_time_count += 1
-                    else:
-                        total_days_late += days_late
-            
-            total_bills = paid_bills.count()
-            on_time_percentage = (on_time_count / total_bills) * 100
-            
-            # Score based on on-time percentage
-            if on_time_percentage >= 90:
-                return 100
-            elif on_time_percentage >= 75:
-                return 85
-            elif on_time_percentage >= 60:
-                return 70
-            elif on_time_percentage >= 40:
-                return 50
-            elif on_time_percentage >= 20:
-                return 30
-            else:
-                return 10
-                
-        except Exception as e:
-            logger.error(f"Error calculating payment timeliness: {e}")
+            .order_by()
+        )
+        for row in bill_rows:
+            stats[row.pop('lease__tenant_id')].update(row)
+
+        payment_rows = (
+            ManualPayment.objects.filter(user_id__in=tenant_ids)
+            .values('user_id')
+            .annotate(payments=Count('id'), approved_payments=Count('id', filter=Q(status='APPROVED')))
+            .order_by()
+        )
+        for row in payment_rows:
+            stats[row.pop('user_id')].update(row)
+
+        active_tenants = Lease.objects.filter(tenant_id__in=tenant_ids, is_active=True).values_list('tenant_id', flat=True)
+        for tenant_id in set(active_tenants):
+            stats[tenant_id]['has_active_lease'] = True
+
+        return stats
+
+    @staticmethod
+    def _score(stats):
+        """Weighted total score (0-100) from the four component scores"""
+        if not stats['has_active_lease']:
+            return 50  # Default score for tenants without active leases
+
+        total_score = (
+            TenantRiskService._payment_timeliness_score(stats) * 0.4 +       # 40% of total score
+            TenantRiskService._payment_consistency_score(stats) * 0.3 +      # 30% of total score
+            TenantRiskService._current_payment_status_score(stats) * 0.2 +   # 20% of total score
+            TenantRiskService._payment_method_reliability_score(stats) * 0.1  # 10% of total score
+        )
+
+        # Ensure score is within 0-100 range
+        return max(0, min(100, int(total_score)))
+
+    @staticmethod
+    def _payment_timeliness_score(stats):
+        """Payment timeliness score (0-100): on-time share of paid bills from the last 6 months"""
+        on_time_count, total_bills = stats['recent_on_time'], stats['recent_paid']
+
+        # If no recent payments, use all payment history instead
+        if total_bills == 0:
+            on_time_count, total_bills = stats['paid_on_time'], stats['paid_count']
+
+        # If no payment history at all, give medium score
+        if total_bills == 0:
             return 50
-    
+
+        on_time_percentage = (on_time_count / total_bills) * 100
+        
+        # Score based on on-time percentage
+        if on_time_percentage >= 90:
+            return 100
+        elif on_time_percentage >= 75:
+            return 85
+        elif on_time_percentage >= 60:
+            return 70
+        elif on_time_percentage >= 40:
+            return 50
+        elif on_time_percentage >= 20:
+            return 30
+        else:
+            return 10
+
+    @staticmethod
+    def _payment_consistency_score(stats):
+        """Payment consistency score (0-100): paid share of bills from the last 12 months"""
+        if stats['year_bills'] == 0:
+            return 50  # No billing history
+
+        payment_rate = (stats['year_paid'] / stats['year_bills']) * 100
+        
+        # Score based on payment rate
+        if payment_rate >= 80:
+            return 100
+        elif payment_rate >= 70:
+            return 85
+        elif payment_rate >= 60:
+            return 70
+        elif payment_rate >= 50:
+            return 50
+        elif payment_rate >= 30:
+            return 30
+        else:
+            return 10
+
+    @staticmethod
+    def _current_payment_status_score(stats):
+        """Current payment status score (0-100): unpaid current-month bills plus overdue bills"""
+        if stats['current_bills'] == 0:
+            return 70  # No current bills
+
+        total_unpaid = stats['current_unpaid'] + stats['overdue']
+        
+        # Score based on unpaid bills
+        if total_unpaid == 0:
+            return 100
+        elif total_unpaid == 1:
+            return 70
+        elif total_unpaid == 2:
+            return 40
+        else:
+            return 10
+
+    @staticmethod
+    def _payment_method_reliability_score(stats):
+        """Payment method reliability score (0-100): approval rate of manual payments"""
+        if stats['payments'] == 0:
+            return 70  # No manual payment history
+
+        approval_rate = (stats['approved_payments'] / stats['payments']) * 100
+        
+        # Score based on approval rate
+        if approval_rate >= 95:
+            return 100
+        elif approval_rate >= 80:
+            return 85
+        elif approval_rate >= 60:
+            return 70
+        elif approval_rate >= 40:
+            return 50
+        else:
+            return 30
+
+    @staticmethod
+    def _new_tenant_flag(stats, today=None):
+        """New tenant: less than 3 months (or fewer than 3 bills) of actual payment history"""
+        if stats['paid_count'] == 0 or not stats['first_paid_at']:
+            return False  # No payment history, not considered new
+
+        today = today or timezone.now().date()
+        first_payment_date = stats['first_paid_at'].date()
+        months_since_first_payment = (today.year - first_payment_date.year) * 12 + \
+                                     (today.month - first_payment_date.month)
+
+        if months_since_first_payment < 3:
+            return True
+
+        return stats['paid_count'] < 3
+
+    @staticmethod
+    def _calculate_payment_timeliness(tenant):
+        """Calculate payment timeliness score (0-100)"""
+        return TenantRiskService._payment_timeliness_score(TenantRiskService._collect_stats([tenant.pk])[tenant.pk])
+
     @staticmethod
     def _calculate_payment_consistency(tenant):
         """Calculate payment consistency score (0-100)"""
-        try:
-            # Get bills from last 12 months
-            twelve_months_ago = timezone.now() - timedelta(days=365)
-            all_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                billing_month__gte=twelve_months_ago
-            )
-            
-            if all_bills.count() == 0:
-                return 50  # No billing history
-            
-            paid_bills = all_bills.filter(status='PAID')
-            payment_rate = (paid_bills.count() / all_bills.count()) * 100
-            
-            # Score based on payment rate
-            if payment_rate >= 80:
-                return 100
-            elif payment_rate >= 70:
-                return 85
-            elif payment_rate >= 60:
-                return 70
-            elif payment_rate >= 50:
-                return 50
-            elif payment_rate >= 30:
-                return 30
-            else:
-                return 10
-                
-        except Exception as e:
-            logger.error(f"Error calculating payment consistency: {e}")
-            return 50
-    
+        return TenantRiskService._payment_consistency_score(TenantRiskService._collect_stats([tenant.pk])[tenant.pk])
+
     @staticmethod
     def _calculate_current_payment_status(tenant):
         """Calculate current payment status score (0-100)"""
-        try:
-            # Get current month bills
-            current_month = timezone.now().date().replace(day=1)
-            current_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                billing_month=current_month
-            )
-            
-            if current_bills.count() == 0:
-                return 70  # No current bills
-            
-            unpaid_current = current_bills.filter(status='UNPAID').count()
-            total_current = current_bills.count()
-            
-            # Also check overdue bills
-            overdue_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='UNPAID',
-                due_date__lt=timezone.now().date()
-            )
-            
-            total_unpaid = unpaid_current + overdue_bills.count()
-            
-            # Score based on unpaid bills
-            if total_unpaid == 0:
-                return 100
-            elif total_unpaid == 1:
-                return 70
-            elif total_unpaid == 2:
-                return 40
-            else:
-                return 10
-                
-        except Exception as e:
-            logger.error(f"Error calculating current payment status: {e}")
-            return 50
-    
+        return TenantRiskService._current_payment_status_score(TenantRiskService._collect_stats([tenant.pk])[tenant.pk])
+
     @staticmethod
     def _calculate_payment_method_reliability(tenant):
         """Calculate payment method reliability score (0-100)"""
-        try:
-            # Get manual payments
-            manual_payments = ManualPayment.objects.filter(user=tenant)
-            
-            if manual_payments.count() == 0:
-                return 70  # No manual payment history
-            
-            # Calculate approval rate
-            approved_payments = manual_payments.filter(status='APPROVED').count()
-            total_payments = manual_payments.count()
-            approval_rate = (approved_payments / total_payments) * 100
-            
-            # Score based on approval rate
-            if approval_rate >= 95:
-                return 100
-            elif approval_rate >= 80:
-                return 85
-            elif approval_rate >= 60:
-                return 70
-            elif approval_rate >= 40:
-                return 50
-            else:
-                return 30
-                
-        except Exception as e:
-            logger.error(f"Error calculating payment method reliability: {e}")
-            return 50
-    
+        return TenantRiskService._payment_method_reliability_score(TenantRiskService._collect_stats([tenant.pk])[tenant.pk])
+
     @staticmethod
     def _is_new_tenant(tenant):
         """Check if tenant is new (less than 3 months of actual payment history)"""
-        try:
-            # Get tenant's paid bills sorted by date
-            paid_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='PAID'
-            ).order_by('paid_at')
-            
-            if paid_bills.count() == 0:
-                return False  # No payment history, not considered new
-            
-            # Check first payment date
-            first_payment = paid_bills.first()
-            if not first_payment or not first_payment.paid_at:
-                return False
-            
-            # Calculate months since first payment
-            months_since_first_payment = (timezone.now().date().year - first_payment.paid_at.date().year) * 12 + \
-                                      (timezone.now().date().month - first_payment.paid_at.date().month)
-            
-            # Check if less than 3 months of payment history
-            if months_since_first_payment < 3:
-                return True
-            
-            # Also check if they have less than 3 paid bills
-            return paid_bills.count() < 3
-            
-        except Exception as e:
-            logger.error(f"Error checking if tenant is new: {e}")
-            return False
-    
+        return TenantRiskService._new_tenant_flag(TenantRiskService._collect_stats([tenant.pk])[tenant.pk])
+
+    @staticmethod
+    def update_tenant_risks(tenant_ids):
+        """
+        Batch scorer: rescores the given tenants with a fixed number of queries per
+        RISK_BATCH_SIZE tenants (three aggregate reads, one read of the existing
+        classifications, one bulk_create and one bulk_update).
+        Returns the number of classifications written.
+        """
+        tenant_ids = list(tenant_ids)
+        now = timezone.now()
+        written = 0
+
+        for start in range(0, len(tenant_ids), RISK_BATCH_SIZE):
+            chunk = tenant_ids[start:start + RISK_BATCH_SIZE]
+            stats_by_tenant = TenantRiskService._collect_stats(chunk, now=now)
+            existing = {
+                classification.tenant_id: classification
+                for classification in TenantRiskClassification.objects.filter(tenant_id__in=chunk)
+            }
+
+            to_create = []
+            to_update = []
+            for tenant_id, stats in stats_by_tenant.items():
+                classification = existing.get(tenant_id)
+                if classification is None:
+                    classification = TenantRiskClassification(tenant_id=tenant_id)
+                    to_create.append(classification)
+                else:
+                    to_update.append(classification)
+
+                risk_score = TenantRiskService._score(stats)
+                classification.payment_score = risk_score
+                classification.risk_level = TenantRiskClassification.risk_level_for_score(risk_score)
+                classification.late_payment_count = stats['late_payments']
+                classification.unpaid_bill_count = stats['unpaid_count']
+                classification.last_payment_date = stats['last_paid_at']
+                classification.is_new_tenant = TenantRiskService._new_tenant_flag(stats, today=now.date())
+                classification.risk_factors = {
+                    'payment_timeliness': TenantRiskService._payment_timeliness_score(stats),
+                    'payment_consistency': TenantRiskService._payment_consistency_score(stats),
+                    'current_payment_status': TenantRiskService._current_payment_status_score(stats),
+                    'payment_method_reliability': TenantRiskService._payment_method_reliability_score(stats),
+                }
+                classification.updated_at = now
+
+            TenantRiskClassification.objects.bulk_create(to_create)
+            TenantRiskClassification.objects.bulk_update(to_update, [
+                'payment_score',
+                'risk_level',
+                'late_payment_count',
+                'unpaid_bill_count',
+                'last_payment_date',
+                'is_new_tenant',
+                'risk_factors',
+                'updated_at',
+            ])
+            written += len(to_create) + len(to_update)
+
+        return written
+
+    @staticmethod
+    def drain_dirty_tenants(debounce=RISK_RECALC_DEBOUNCE, limit=RISK_BATCH_SIZE):
+        """
+        Rescore up to `limit` queued tenants whose debounce window has elapsed and
+        drop them from the queue. A tenant re-marked while being scored keeps its
+        (newer) row and is picked up on the next drain.
+        Returns the number of tenants rescored.
+        """
+        cutoff = timezone.now() - debounce
+        tenant_ids = list(
+            RiskRecalcRequest.objects.filter(marked_at__lte=cutoff)
+            .order_by('marked_at')
+            .values_list('tenant_id', flat=True)[:limit]
+        )
+        if not tenant_ids:
+            return 0
+
+        TenantRiskService.update_tenant_risks(tenant_ids)
+        RiskRecalcRequest.objects.filter(tenant_id__in=tenant_ids, marked_at__lte=cutoff).delete()
+        return len(tenant_ids)
+
     @staticmethod
     def update_tenant_risk_classification(tenant):
         """Update or create tenant risk classification"""
         try:
-            # Calculate risk score
-            risk_score = TenantRiskService.calculate_tenant_risk_score(tenant)
-            
-            # Get additional risk factors
-            late_payments = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='PAID',
-                paid_at__gt=F('due_date')
-            ).count()
-            
-            unpaid_bills = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='UNPAID'
-            ).count()
-            
-            last_payment = MonthlyBill.objects.filter(
-                lease__tenant=tenant,
-                status='PAID'
-            ).order_by('-paid_at').first()
-            
-            # Check if tenant is new (less than 3 months of payment history)
-            is_new_tenant = TenantRiskService._is_new_tenant(tenant)
-            
-            # Create or update risk classification
-            risk_classification, created = TenantRiskClassification.objects.update_or_create(
-                tenant=tenant,
-                defaults={
-                    'payment_score': risk_score,
-                    'late_payment_count': late_payments,
-                    'unpaid_bill_count': unpaid_bills,
-                    'last_payment_date': last_payment.paid_at if last_payment else None,
-                    'is_new_tenant': is_new_tenant,
-                    'risk_factors': {
-                        'payment_timeliness': TenantRiskService._calculate_payment_timeliness(tenant),
-                        'payment_consistency': TenantRiskService._calculate_payment_consistency(tenant),
-                        'current_payment_status': TenantRiskService._calculate_current_payment_status(tenant),
-                        'payment_method_reliability': TenantRiskService._calculate_payment_method_reliability(tenant)
-                    }
-                }
-            )
-            
-            # Calculate and set risk level
-            risk_classification.calculate_risk_level()
-            
-            logger.info(f"Updated risk classification for {tenant.email}: {risk_classification.get_risk_level_display()} ({risk_score}) - New Tenant: {is_new_tenant}")
+            TenantRiskService.update_tenant_risks([tenant.pk])
+            risk_classification = TenantRiskClassification.objects.get(tenant=tenant)
+            logger.info(f"Updated risk classification for {tenant.email}: {risk_classification.get_risk_level_display()} ({risk_classification.payment_score}) - New Tenant: {risk_classification.is_new_tenant}")
             return risk_classification
             
         except Exception as e:
@@ -316,12 +394,8 @@ class TenantRiskService:
         """Update risk classifications for all tenants"""
         from accounts.models import User
         
-        tenants = User.objects.filter(role='TENANT')
-        updated_count = 0
-        
-        for tenant in tenants:
-            if TenantRiskService.update_tenant_risk_classification(tenant):
-                updated_count += 1
+        tenant_ids = User.objects.filter(role='TENANT').order_by('pk').values_list('pk', flat=True)
+        updated_count = TenantRiskService.update_tenant_risks(tenant_ids)
         
         logger.info(f"Updated risk classifications for {updated_count} tenants")
         return updated_count
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.core.management import call_command, load_command_class
+
+from accounts.models import User
+from jobs.registry import register_task
+from rentals.notification_retention import prune_notifications
+from rentals.services import RISK_BATCH_SIZE, TenantRiskService
+
+
+@register_task('rentals.rescore_tenant_risks')
+def rescore_tenant_risks(job, tenant_ids=None):
+    """Rescore the given tenants (default: every tenant), reporting progress per batch."""
+    if tenant_ids is None:
+        tenant_ids = list(User.objects.filter(role='TENANT').order_by('pk').values_list('pk', flat=True))
+
+    total = len(tenant_ids)
+    job.set_progress(0, total, 'Scoring tenants')
+    for start in range(0, total, RISK_BATCH_SIZE):
+        TenantRiskService.update_tenant_risks(tenant_ids[start:start + RISK_BATCH_SIZE])
+        job.set_progress(min(start + RISK_BATCH_SIZE, total), total, 'Scoring tenants')
+
+    return {'rescored': total}
+
+
+@register_task('rentals.prune_notifications')
+def prune_old_notifications(job, archive_dir=None):
+    """Archive and delete read notifications past their retention period."""
+    job.set_progress(0, None, 'Pruning notifications')
+    pruned = prune_notifications(
+        archive_dir=archive_dir,
+        progress=lambda done: job.set_progress(done, None, 'Pruning notifications'),
+    )
+    return {'pruned': pruned}
+
+
+def _run_data_fix(job, command_name, message):
+    """Run a data-fix management command in the worker, reporting its progress on the job."""
+    command = load_command_class('rentals', command_name)
+    command.progress = lambda done, total: job.set_progress(done, total, message)
+    output = StringIO()
+    call_command(command, stdout=output)
+    return {'output': output.getvalue().strip().splitlines()[-5:]}
+
+
+@register_task('rentals.fix_billing_status', max_attempts=1)
+def fix_billing_status(job):
+    """Randomise paid/unpaid status on the last four months of bills (demo data)."""
+    return _run_data_fix(job, 'fix_billing_status', 'Updating bill statuses')
+
+
+@register_task('rentals.fix_payment_dates', max_attempts=1)
+def fix_payment_dates(job):
+    """Spread paid_at around due dates (demo data), then rescore every tenant."""
+    return _run_data_fix(job, 'fix_payment_dates', 'Updating payment dates')
+
+
+@register_task('rentals.fix_chart_data', max_attempts=1)
+def fix_chart_data(job):
+    """Replace all bills with twelve months of chart-friendly demo bills."""
+    return _run_data_fix(job, 'fix_chart_data', 'Recreating bills')
@@ -1,3 +1,375 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from billing.models import MonthlyBill, RevenueRollup
+from billing.services import add_months, allocate_payment, set_bill_status
+from payments.models import ManualPayment, PaymentAllocation
+from rentals.datagen import LoadProfile, clear_load_data, generate
+from rentals.models import Lease, Notification, NotificationArchive, NotificationCounter, RiskRecalcRequest, TenantRiskClassification, Unit
+from rentals.notification_emitter import NotificationEmitter
+from rentals.notification_retention import prune_notifications
+from rentals.services import TenantRiskService, mark_overdue_tenants_dirty, mark_tenants_dirty
+
+
+class TenantRiskServiceTests(TestCase):
+    def setUp(self):
+        self.current_month = timezone.now().date().replace(day=1)
+        self.good = self._tenant("good")
+        self.late = self._tenant("late")
+
+        for months_back in (4, 3, 2):
+            billing_month = add_months(self.current_month, -months_back)
+            due_date = billing_month + timedelta(days=4)
+            self._bill(self.good, billing_month, status="PAID", paid_at=self._at(due_date - timedelta(days=1)))
+
+        for months_back in (2, 1, 0):
+            billing_month = add_months(self.current_month, -months_back)
+            self._bill(self.late, billing_month)
+
+    def _tenant(self, name):
+        tenant = User.objects.create_user(
+            email=f"{name}@example.com",
+            username=name,
+            password="password123",
+            role=User.Role.TENANT,
+        )
+        tenant.lease = Lease.objects.create(
+            tenant=tenant,
+            unit=Unit.objects.create(number=f"R-{name}"),
+            monthly_rent=Decimal("9000.00"),
+            due_day=5,
+            start_date=add_months(self.current_month, -6),
+            is_active=True,
+        )
+        return tenant
+
+    def _at(self, day):
+        return timezone.make_aware(datetime.combine(day, time(9, 0)))
+
+    def _bill(self, tenant, billing_month, status="UNPAID", paid_at=None):
+        return MonthlyBill.objects.create(
+            lease=tenant.lease,
+            billing_month=billing_month,
+            due_date=billing_month + timedelta(days=4) if billing_month < self.current_month else billing_month + timedelta(days=40),
+            base_rent=Decimal("9000.00"),
+            total_due=Decimal("9000.00"),
+            status=status,
+            paid_at=paid_at,
+        )
+
+    def test_batch_scores_tenants_from_aggregates(self):
+        written = TenantRiskService.update_all_tenant_risks()
+        self.assertEqual(written, 2)
+
+        good = TenantRiskClassification.objects.get(tenant=self.good)
+        self.assertEqual(good.payment_score, 91)
+        self.assertEqual(good.risk_level, "LOW")
+        self.assertEqual(good.unpaid_bill_count, 0)
+        self.assertFalse(good.is_new_tenant)
+        self.assertEqual(good.risk_factors, {
+            "payment_timeliness": 100,
+            "payment_consistency": 100,
+            "current_payment_status": 70,
+            "payment_method_reliability": 70,
+        })
+
+        late = TenantRiskClassification.objects.get(tenant=self.late)
+        self.assertEqual(late.payment_score, 32)
+        self.assertEqual(late.risk_level, "HIGH")
+        self.assertEqual(late.unpaid_bill_count, 3)
+        self.assertIsNone(late.last_payment_date)
+
+    def test_batch_query_count_does_not_grow_with_tenants(self):
+        with CaptureQueriesContext(connection) as first_run:
+            TenantRiskService.update_tenant_risks([self.good.pk])
+
+        for index in range(5):
+            tenant = self._tenant(f"extra{index}")
+            self._bill(tenant, add_months(self.current_month, -1))
+        tenant_ids = User.objects.filter(role=User.Role.TENANT).values_list("pk", flat=True)
+
+        with CaptureQueriesContext(connection) as batch_run:
+            TenantRiskService.update_tenant_risks(tenant_ids)
+
+        self.assertLessEqual(len(batch_run.captured_queries), len(first_run.captured_queries) + 2)
+        self.assertEqual(TenantRiskClassification.objects.count(), 7)
+        self.assertEqual(
+            TenantRiskService.update_tenant_risk_classification(self.good).payment_score,
+            TenantRiskService.calculate_tenant_risk_score(self.good),
+        )
+
+    def test_billing_events_queue_tenant_and_drain_rescores_after_debounce(self):
+        bill = MonthlyBill.objects.get(lease=self.late.lease, billing_month=add_months(self.current_month, -2))
+        set_bill_status(bill, status="PAID")
+        set_bill_status(bill, status="PAID")  # no status change, nothing new to score
+
+        queued = RiskRecalcRequest.objects.get()
+        self.assertEqual((queued.tenant_id, queued.reason), (self.late.pk, "bill_status"))
+
+        # Still inside the debounce window: nothing is scored yet.
+        self.assertEqual(TenantRiskService.drain_dirty_tenants(), 0)
+        self.assertFalse(TenantRiskClassification.objects.exists())
+
+        self.assertEqual(TenantRiskService.drain_dirty_tenants(debounce=timedelta(0)), 1)
+        self.assertFalse(RiskRecalcRequest.objects.exists())
+        self.assertEqual(TenantRiskClassification.objects.get().tenant_id, self.late.pk)
+
+    def test_marking_is_one_row_per_tenant(self):
+        mark_tenants_dirty([self.good.pk, self.late.pk], reason="admin_refresh")
+        mark_tenants_dirty([self.late.pk], reason="payment_approved")
+        self.assertEqual(
+            dict(RiskRecalcRequest.objects.values_list("tenant_id", "reason")),
+            {self.good.pk: "admin_refresh", self.late.pk: "payment_approved"},
+        )
+
+        RiskRecalcRequest.objects.all().delete()
+        self.assertEqual(mark_overdue_tenants_dirty(today=add_months(self.current_month, -1) + timedelta(days=6)), 1)
+        self.assertEqual(RiskRecalcRequest.objects.get().tenant_id, self.late.pk)
+
+
+class TenantBillingViewTests(TestCase):
+    def setUp(self):
+        self.tenant = User.objects.create_user(
+            email="payer@example.com",
+            username="payer",
+            password="password123",
+            role=User.Role.TENANT,
+        )
+        self.lease = Lease.objects.create(
+            tenant=self.tenant,
+            unit=Unit.objects.create(number="B-1"),
+            monthly_rent=Decimal("7000.00"),
+            due_day=5,
+            start_date=add_months(timezone.now().date().replace(day=1), -24),
+            is_active=True,
+        )
+        self.client.force_login(self.tenant)
+
+    def _pay(self, count):
+        bills = MonthlyBill.objects.filter(lease=self.lease).exclude(allocations__isnull=False).order_by("billing_month")
+        for bill in bills[:count]:
+            payment = ManualPayment.objects.create(user=self.tenant, reference_code=f"REF-{bill.pk}", status="APPROVED")
+            allocate_payment(payment, [bill.pk])
+
+    def test_transaction_history_is_aggregated_and_paginated(self):
+        self.client.get(reverse("tenant_billing"))  # generate the bills
+        self._pay(1)
+        with CaptureQueriesContext(connection) as one_payment:
+            response = self.client.get(reverse("tenant_billing"))
+        self.assertEqual(len(response.context["transactions"]), 1)
+
+        self._pay(20)
+        with CaptureQueriesContext(connection) as many_payments:
+            response = self.client.get(reverse("tenant_billing"))
+
+        self.assertEqual(len(many_payments.captured_queries), len(one_payment.captured_queries))
+        page = response.context["page_obj"]
+        self.assertEqual(page.paginator.count, 21)
+        self.assertEqual(len(page.object_list), 10)
+        self.assertEqual(page[0]["months_paid"], 1)
+        newest = ManualPayment.objects.latest("created_at", "pk")
+        self.assertEqual(page[0]["reference"], newest.reference_code)
+        self.assertEqual(page[0]["total_amount"], newest.allocations.get().amount)
+
+        response = self.client.get(reverse("tenant_billing"), {"page": 3})
+        self.assertEqual(len(response.context["page_obj"].object_list), 1)
+
+
+class LoadDataGeneratorTests(TestCase):
+    def test_generator_is_deterministic_and_clearable(self):
+        profile = LoadProfile(buildings=2, units_per_building=5, occupancy=0.8, years=1, seed=7, batch_size=7)
+        counts = generate(profile)
+
+        self.assertEqual((counts["units"], counts["tenants"], counts["leases"]), (10, 8, 8))
+        self.assertEqual(MonthlyBill.objects.count(), counts["bills"])
+        self.assertEqual(PaymentAllocation.objects.count(), counts["payments"])
+        self.assertEqual(MonthlyBill.objects.filter(status="PAID").count(), counts["payments"])
+        valid_types = {unit_type for unit_type, _ in Unit.UNIT_TYPES}
+        self.assertTrue(set(Unit.objects.values_list("unit_type", flat=True)) <= valid_types)
+        self.assertTrue(RevenueRollup.objects.exists())
+        snapshot = list(MonthlyBill.objects.order_by("lease__unit__number", "billing_month").values_list("total_due", "status"))
+
+        clear_load_data()
+        self.assertFalse(Unit.objects.exists())
+        self.assertFalse(MonthlyBill.objects.exists())
+
+        generate(profile)
+        self.assertEqual(
+            list(MonthlyBill.objects.order_by("lease__unit__number", "billing_month").values_list("total_due", "status")),
+            snapshot,
+        )
+
+
+class NotificationCounterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="password123",
+            role=User.Role.ADMIN,
+        )
+        self.bucket = NotificationCounter.user_bucket(self.admin.pk)
+
+    def counts(self):
+        return NotificationCounter.unread_for(NotificationCounter.ALL), NotificationCounter.unread_for(self.bucket)
+
+    def test_counters_follow_every_write_path(self):
+        for index in range(3):
+            Notification.create_notification(f"Broadcast {index}", "...")
+        mine = [Notification.create_notification(f"Mine {index}", "...", user=self.admin) for index in range(2)]
+        self.assertEqual(self.counts(), (5, 2))
+
+        self.assertTrue(mine[0].mark_read())
+        self.assertFalse(Notification.objects.get(pk=mine[0].pk).mark_read())  # already read: no double count
+        self.assertEqual(self.counts(), (4, 1))
+
+        Notification.objects.filter(title="Broadcast 0").delete()
+        mine[0].delete()  # already read
+        self.assertEqual(self.counts(), (3, 1))
+
+        self.assertEqual(Notification.mark_all_read(Notification.objects.filter(user=self.admin)), 1)
+        self.assertEqual(self.counts(), (2, 0))
+
+        Notification.create_notification("Mine again", "...", user=self.admin)
+        self.admin.delete()  # cascades to the user's notifications
+        self.assertEqual(NotificationCounter.unread_for(), 2)
+        self.assertEqual(NotificationCounter.unread_for(), Notification.objects.filter(is_read=False).count())
+
+    def test_unread_count_is_a_primary_key_read(self):
+        Notification.create_notification("Hello", "...")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(NotificationCounter.unread_for(), 1)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn("bucket", queries.captured_queries[0]["sql"])
+        self.assertNotIn("COUNT(", queries.captured_queries[0]["sql"].upper())
+
+    def test_rebuild_repairs_drift(self):
+        Notification.create_notification("Broadcast", "...")
+        Notification.create_notification("Mine", "...", user=self.admin)
+        Notification.objects.update(is_read=False, title="bypassed")  # no-op for counts
+        Notification.objects.filter(user=self.admin).update(is_read=True)  # bypasses the counters
+        self.assertEqual(self.counts(), (2, 1))
+
+        NotificationCounter.rebuild()
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.old_read = self.notify("Old read payment", "PAYMENT", days_ago=400, is_read=True)
+        self.old_unread = self.notify("Old unread payment", "PAYMENT", days_ago=400)
+        self.recent_read = self.notify("Recent read payment", "PAYMENT", days_ago=10, is_read=True)
+        self.old_info = self.notify("Old read info", "INFO", days_ago=45, is_read=True)
+
+    def notify(self, title, notification_type, days_ago, is_read=False):
+        notification = Notification.create_notification(title, "...", notification_type=notification_type)
+        if is_read:
+            notification.mark_read()
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return notification
+
+    def remaining(self):
+        return set(Notification.objects.values_list("title", flat=True))
+
+    def test_prunes_expired_read_notifications_into_the_archive(self):
+        self.assertEqual(prune_notifications(now=self.now, batch_size=1), 2)
+
+        self.assertEqual(self.remaining(), {"Old unread payment", "Recent read payment"})
+        archived = {row.notification_type: row for row in NotificationArchive.objects.all()}
+        self.assertEqual(set(archived), {"PAYMENT", "INFO"})
+        self.assertEqual(archived["PAYMENT"].count, 1)
+        self.assertEqual(archived["PAYMENT"].items[0]["id"], self.old_read.pk)
+        self.assertEqual(archived["PAYMENT"].items[0]["title"], "Old read payment")
+        self.assertEqual(archived["PAYMENT"].month, timezone.localtime(self.now - timedelta(days=400)).date().replace(day=1))
+        # only read rows go, so the unread badge is untouched
+        self.assertEqual(NotificationCounter.unread_for(), 1)
+
+    def test_batches_delete_without_per_row_signals(self):
+        deleted = []
+        receiver = lambda instance, **kwargs: deleted.append(instance.pk)
+        post_delete.connect(receiver, sender=Notification)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Notification)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(prune_notifications(now=self.now), 2)
+        self.assertEqual(deleted, [])
+        deletes = [q for q in queries if q["sql"].startswith('DELETE FROM "rentals_notification"')]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(NotificationCounter.unread_for(), 1)
+        # the raw delete is only safe while nothing references a notification
+        self.assertEqual(Notification._meta.related_objects, ())
+
+    @override_settings(NOTIFICATION_RETENTION_DAYS={"PAYMENT": None, "INFO": 60})
+    def test_retention_is_configurable_per_type(self):
+        self.assertEqual(prune_notifications(now=self.now), 0)
+
+    def test_archives_to_gzip_jsonl_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(prune_notifications(now=self.now, archive_dir=directory), 2)
+            lines = []
+            for path in sorted(Path(directory).glob("notifications-*.jsonl.gz")):
+                with gzip.open(path, "rt", encoding="utf-8") as archive:
+                    lines += [json.loads(line) for line in archive]
+        self.assertEqual({line["title"] for line in lines}, {"Old read payment", "Old read info"})
+        self.assertFalse(NotificationArchive.objects.exists())
+
+
+class NotificationEmitterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="password123",
+            role=User.Role.ADMIN,
+        )
+
+    def test_flushes_with_bulk_inserts_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with NotificationEmitter(batch_size=500) as notifications:
+                for index in range(1200):
+                    notifications.emit(f"Event {index}", "...", user=self.admin if index % 2 else None)
+                self.assertFalse(Notification.objects.exists())  # nothing written before commit
+        self.assertEqual(Notification.objects.count(), 1200)
+        self.assertEqual(NotificationCounter.unread_for(), 1200)
+        self.assertEqual(NotificationCounter.unread_for(NotificationCounter.user_bucket(self.admin.pk)), 600)
+
+    def test_insert_round_trips_are_per_batch_not_per_notification(self):
+        emitter = NotificationEmitter(batch_size=500)
+        for index in range(1200):
+            emitter.emit(f"Event {index}", "...")
+        with CaptureQueriesContext(connection) as queries:
+            created = emitter.flush()
+        self.assertEqual(len(created), 1200)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "rentals_notification"')]
+        # 3 on PostgreSQL; SQLite further splits batches to stay under its parameter limit
+        self.assertLessEqual(len(inserts), 12)
+
+    def test_rolled_back_block_emits_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with NotificationEmitter() as notifications:
+                    notifications.emit("Never happened", "...")
+                    raise ValueError
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(NotificationCounter.unread_for(), 0)
+
+    def test_create_unit_view_notifies_after_commit(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("admin_create_unit"), {"number": "Z-9", "is_active": "on"})
+        self.assertRedirects(response, reverse("admin_units"), fetch_redirect_response=False)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.notification_type, notification.related_unit.number), ("UNIT", "Z-9"))
+        self.assertEqual(NotificationCounter.unread_for(), 1)
@@ -4,25 +4,28 @@ from decimal import Decimal
 from django import forms
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db import models
+from django.db.models import Count, F, Sum
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
 from announcements.models import Announcement
 from billing.models import MonthlyBill
 from billing.services import (
+    accrue_interest,
     add_months,
-    ensure_bills_since_move_in,
-    ensure_bills_up_to,
-    get_or_update_monthly_bill,
+    ensure_billing_fresh,
     month_start,
-    parse_bill_ids,
 )
 from payments.models import ManualPayment
 from payments.views import manual_gcash_payment
 
 from .models import Lease, TenantProfile, Unit
 
+# payment history rows per page on the tenant billing page
+TRANSACTIONS_PER_PAGE = 10
+
 # Temporary inline form to resolve import issue
 class UnitForm(forms.ModelForm):
     class Meta:
@@ -106,8 +109,9 @@ class UnitForm(forms.ModelForm):
 @login_required
 def tenant_dashboard(request):
     """
-    Main landing page for tenants. Synchronizes all billing and displays
-    the current status, rent, and announcements.
+    Main landing page for tenants. Reads the precomputed bills (regenerating them
+    only when the lease's billing watermark is stale) and displays the current
+    status, rent, and announcements.
     """
     user = request.user
     profile = TenantProfile.objects.filter(user=user).first()
@@ -119,7 +123,9 @@ def tenant_dashboard(request):
     next_billing_month = None
 
     if lease:
-        ensure_bills_since_move_in(lease)
+        today_start = month_start(date.today())
+        next_month = add_months(today_start, 1)
+        ensure_billing_fresh(lease, next_month)
 
         current_balance = MonthlyBill.objects.filter(
             lease=lease,
@@ -127,11 +133,7 @@ def tenant_dashboard(request):
         ).order_by("billing_month").first()
 
         if current_balance:
-            current_balance = get_or_update_monthly_bill(lease, current_balance.billing_month)
-
-        today_start = month_start(date.today())
-        next_month = add_months(today_start, 1)
-        ensure_bills_up_to(lease, next_month)
+            accrue_interest([current_balance])
 
         next_bill = MonthlyBill.objects.filter(lease=lease, billing_month=next_month).first()
         if next_bill:
@@ -161,23 +163,14 @@ def tenant_billing(request):
         messages.warning(request, "An active lease is required to view billing.")
         return redirect("tenant_dashboard")
 
-    ensure_bills_since_move_in(lease)
-
-    current_bill = MonthlyBill.objects.filter(
-        lease=lease,
-        status="UNPAID",
-    ).order_by("billing_month").first()
-
-    if current_bill:
-        current_bill = get_or_update_monthly_bill(lease, current_bill.billing_month)
+    ensure_billing_fresh(lease)
 
-    all_bills = MonthlyBill.objects.filter(lease=lease, status="UNPAID").order_by("billing_month")
+    all_bills = accrue_interest(MonthlyBill.objects.filter(lease=lease, status="UNPAID").order_by("billing_month"))
+    current_bill = all_bills[0] if all_bills else None
     ongoing_rows = []
     today = date.today()
 
     for bill in all_bills:
-        bill = get_or_update_monthly_bill(lease, bill.billing_month)
-
         if bill.due_date < today:
             display_status = "OVERDUE"
         elif bill.due_date == today:
@@ -198,32 +191,22 @@ def tenant_billing(request):
             "status": display_status,
         })
 
-    approved_payments = ManualPayment.objects.filter(
-        user=user,
-        status="APPROVED",
-    ).order_by("-created_at")
-
-    transactions = []
-    for payment in approved_payments:
-        bill_id_list = parse_bill_ids(payment.bill_ids)
-        if not bill_id_list:
-            continue
-
-        bills_paid = MonthlyBill.objects.filter(id__in=bill_id_list)
-        total_paid = sum((bill.total_due or Decimal("0.00")) for bill in bills_paid)
-
-        transactions.append({
-            "paid_at": payment.created_at,
-            "reference": payment.reference_code,
-            "months_paid": bills_paid.count(),
-            "total_amount": total_paid,
-        })
+    # one grouped payment/allocation query per page (+ the paginator's count)
+    transactions = (
+        ManualPayment.objects.filter(user=user, status="APPROVED")
+        .annotate(months_paid=Count("allocations"), total_amount=Sum("allocations__amount"))
+        .filter(months_paid__gt=0)
+        .values("months_paid", "total_amount", paid_at=F("created_at"), reference=F("reference_code"))
+        .order_by("-created_at", "-pk")
+    )
+    page_obj = Paginator(transactions, TRANSACTIONS_PER_PAGE).get_page(request.GET.get("page"))
 
     return render(request, "billing/tenant_billing.html", {
         "lease": lease,
         "current_bill": current_bill,
         "ongoing_rows": ongoing_rows,
-        "transactions": transactions,
+        "transactions": page_obj,
+        "page_obj": page_obj,
     })
 
 
@@ -244,7 +227,7 @@ def tenant_pay_advance(request):
     except ValueError:
         months_to_pay = 1
 
-    ensure_bills_since_move_in(lease)
+    ensure_billing_fresh(lease)
 
     today = date.today()
     all_unpaid_qs = MonthlyBill.objects.filter(lease=lease, status="UNPAID").order_by("billing_month")
@@ -270,14 +253,15 @@ def tenant_pay_advance(request):
                 current_future_month = add_months(current_future_month, 1)
 
         extra_months = months_to_pay - len(bills_to_process)
-        for _ in range(extra_months):
-            ensure_bills_up_to(lease, current_future_month)
-            future_bill = MonthlyBill.objects.get(lease=lease, billing_month=current_future_month)
-            bills_to_process.append(future_bill)
-            current_future_month = add_months(current_future_month, 1)
-
-    for bill in bills_to_process:
-        bill = get_or_update_monthly_bill(lease, bill.billing_month)
+        last_future_month = add_months(current_future_month, extra_months - 1)
+        ensure_billing_fresh(lease, last_future_month)
+        bills_to_process.extend(MonthlyBill.objects.filter(
+            lease=lease,
+            billing_month__gte=current_future_month,
+            billing_month__lte=last_future_month,
+        ).order_by("billing_month"))
+
+    for bill in accrue_interest(bills_to_process, today=today):
         preview_rows.append({
             "month_label": bill.billing_month.strftime("%B %Y"),
             "rent": bill.base_rent,